@@ -1,22 +1,26 @@
-from threading import Lock, Thread, Event
-from typing import Any, Dict, List, Union, Optional, TypeVar
+from threading import Lock, Event, Condition
+from typing import Any, Dict, List, Union, Optional, TypeVar, TYPE_CHECKING
 from collections.abc import Iterable
+from contextlib import ExitStack
 from maspy.environment import Environment
 from maspy.communication import Channel
 from maspy.agent import Agent
 from maspy.utils import bcolors
-from maspy.learning.modelling import EnvModel
+from maspy.printer import PrintBuffer
+from maspy.report import ReportWriter, FULL_COLUMNS, SHORT_COLUMNS
 import pprint
 import signal
 import json
 import logging.config
 import logging.handlers
-import pandas as pd # type: ignore
-from time import sleep, time
+from time import time
 from pathlib import Path
 import atexit
 import os
-import sys, queue
+import sys
+
+if TYPE_CHECKING:
+    from maspy.learning.modelling import EnvModel
 
 MASPY_VERSION = "2025.11.09"
 
@@ -100,7 +104,7 @@ class AdminMeta(type):
 class Admin(metaclass=AdminMeta):
     """Administrator Singleton Class in charge of configuration, exectution, debugging and logging of the MASPY program."""   
     def __init__(self:'Admin', all_log= False, console_log=False, file_log=False, listener_log=False) -> None:
-        self.print_queue: queue.Queue = queue.Queue()
+        self.printer: PrintBuffer = PrintBuffer()
         self.logger = logging.getLogger("maspy")
         self.sys_settings()
         signal.signal(signal.SIGINT, self.stop_system)
@@ -129,18 +133,24 @@ class Admin(metaclass=AdminMeta):
         self._agent_class_color: Dict[str, str] = dict()
         self._channels: Dict[str, Channel] = dict()
         self._environments: Dict[str, Environment] = dict()
-        self._models: Dict[str, EnvModel] = dict()
+        self._models: Dict[str, 'EnvModel'] = dict()
         
         self.start_event: Event = Event()
+        self._running_cond: Condition = Condition()
+        self._running_count: int = 0
+        self._running_classes: Dict[str, int] = dict()
         
         self.report_buffer = ""
         self.full_report = False
         self.report = False
+        self.report_format = "xlsx"
         self._report_lock = False
         self.recording = False
         self.record_rate = 5
         self.start_time: float|None = None
         self.system_info: Dict[str, Any] = dict()
+        self.ticks: int = 0
+        self.ticks_per_s: float = 0.0
     
     def start_logger(self, enable_console, enable_file, enable_listener):
         if self.logging:
@@ -149,33 +159,28 @@ class Admin(metaclass=AdminMeta):
         setup_logging(enable_console, enable_file, enable_listener)
         self.logger.info(f"Starting MASPY Logging - {MASPY_VERSION}", extra={"class_name": "Admin", "my_name": ""})
         
-    def sys_settings(self, recording=False, print_running=False, cycle_speed=1):
+    def sys_settings(self, recording=False, print_running=False, cycle_speed=1, synchronous=False, max_ticks: int | None = None):
+        """
+        Parameters
+        ----------
+            recording : bool
+                Records the system information while it runs.
+            print_running : bool
+                Prints how many agents are still running.
+            cycle_speed : int | float
+                Seconds between those checks in the threaded mode.
+            synchronous : bool
+                Runs the agents in lockstep ticks from the start_system thread
+                instead of one free running thread each, see _run_ticks.
+            max_ticks : int, optional
+                Ticks after which a synchronous system stops.
+        """
         self.recording = recording
         self.number_running = print_running
         self.cycle_speed = cycle_speed
+        self.synchronous = synchronous
+        self.max_ticks = max_ticks
 
-    def print_buffer(self):
-        buffer = []
-        while True:
-            try:
-                msg = self.print_queue.get(timeout=0.1)
-                if msg is None:
-                    if buffer:
-                        sys.stdout.write("\n".join(buffer) + "\n")
-                        sys.stdout.flush()
-                        buffer.clear()
-                    break
-                buffer.append(msg)
-                if len(buffer) >= 1000: 
-                    sys.stdout.write("\n".join(buffer) + "\n")
-                    sys.stdout.flush()
-                    buffer.clear()
-            except queue.Empty:
-                if buffer:
-                    sys.stdout.write("\n".join(buffer) + "\n")
-                    sys.stdout.flush()
-                    buffer.clear()
-    
     def reset_instance(self, *args, **kwargs):
         for env in self._environments.values():
             type(env)._instances.pop(env.my_name)
@@ -187,7 +192,7 @@ class Admin(metaclass=AdminMeta):
         """Formatted MASPY Print Function"""
         f_args = "".join(map(str, args))
         f_kwargs = "".join(f"{key}={value}" for key, value in kwargs.items())
-        self.print_queue.put(f"{bcolors.GOLD}{self._name}> {f_args}{f_kwargs}{bcolors.ENDCOLOR}")
+        self.printer.put(bcolors.GOLD, self._name, f"{f_args}{f_kwargs}")
     
     def get_agents(self) -> Dict[tuple, str]:
         return self._agent_list
@@ -265,7 +270,7 @@ class Admin(metaclass=AdminMeta):
             f"Registering {type(channel).__name__}:{channel.my_name}"
         ) if self.show_exec else ...
 
-    def _add_model(self, model: EnvModel) -> None:
+    def _add_model(self, model: 'EnvModel') -> None:
         self._models[model.name] = model
         self.print(
             f"Registering {type(model).__name__}:{model.name}"
@@ -315,8 +320,7 @@ class Admin(metaclass=AdminMeta):
         no_agents = True
         #for model in self._models.values():
         #    model.reset_percepts()
-        pb_thread = Thread(target=self.print_buffer, daemon=True)
-        pb_thread.start()
+        self.printer.start()
         
         self.start_time = time()
         if self.recording:
@@ -337,42 +341,96 @@ class Admin(metaclass=AdminMeta):
             self.sys_running = True
             self.start_event.set()
             self.print("Starting System")
-            sleep(1)
-            while self.running_agents():
+            if self.synchronous:
+                self._run_ticks()
+            while self._wait_agents(self.cycle_speed):
                 if self.recording:
                     #sleep(self.record_rate)
                     self.record_info()
                 if self.number_running:
                     self.print_running_number()
-                sleep(self.cycle_speed)
             
             self.stop_system()
             self.sys_running = False
-            self.print_queue.put(None)   # send stop signal
-            pb_thread.join()
+            self.printer.close()
             self.logger.info("MASPY Program Ended", extra={"class_name": "Admin", "my_name": ""})
         except Exception as e:
             self.print(e)
             pass
 
+    def _run_ticks(self) -> None:
+        """
+        Runs the started agents in lockstep until they all stop or max_ticks is reached
+
+        Every tick first perceives the environments and reads the mail for
+        all running agents, then runs one reasoning cycle of each, with plans
+        run to completion and no delays. Environment changes, and the calls
+        queued with Environment.queue_actions, are collected in one batch per
+        environment and published together when the tick ends, so agents
+        only ever perceive the state between ticks. Nothing else runs
+        meanwhile, so askOneReply and askAllReply are answered by the
+        target as soon as they are sent, while Agent.wait and waiting on a
+        call queued in the same tick raise a RuntimeError.
+        """
+        self.ticks = 0
+        start = time()
+        while self._running_count > 0 and (self.max_ticks is None or self.ticks < self.max_ticks):
+            self.start_event.wait()
+            agents = [agent for agent in self._started_agents if agent.running]
+            for agent in agents:
+                with agent.update_lock:
+                    agent._perception()
+                    agent._mail()
+            with ExitStack() as commit:
+                envs = list(self._environments.values())
+                for env in envs:
+                    commit.enter_context(env.batch())
+                for agent in agents:
+                    if agent.running:
+                        agent._tick()
+                # calls queued during the tick are applied before it is published
+                for env in envs:
+                    env.apply_actions()
+            self.ticks += 1
+            if self.recording:
+                self.record_info()
+            if self.number_running:
+                self.print_running_number()
+        elapsed = time() - start
+        self.ticks_per_s = round(self.ticks / elapsed, 2) if elapsed > 0 else 0.0
+        self.print(f"Ran {self.ticks} ticks in {elapsed:.4f}s, {self.ticks_per_s} ticks/s")
+        self.logger.info(f"Ran {self.ticks} ticks", extra={"class_name": "Admin", "my_name": "", "ticks_per_s": self.ticks_per_s})
+        for agent in self._started_agents:
+            if agent.running:
+                agent.stop_cycle()
+    
+    def _set_running(self, agent: Agent, running: bool) -> bool:
+        """Flips an Agent's running flag and updates the running counters, returns if it changed"""
+        with self._running_cond:
+            if agent.running == running:
+                return False
+            agent.running = running
+            step = 1 if running else -1
+            self._running_count += step
+            cls = agent.tuple_name[0]
+            self._running_classes[cls] = self._running_classes.get(cls, 0) + step
+            self._running_cond.notify_all()
+            return True
+    
+    def _wait_agents(self, timeout: float | None = None) -> bool:
+        """Blocks until no agent is running or the timeout ends, returns if any agent is still running"""
+        with self._running_cond:
+            self._running_cond.wait_for(lambda: self._running_count == 0, timeout)
+            return self._running_count > 0
+    
     def running_class_agents(self, cls) -> bool:
-        for agent in self._agents.values():
-            if agent.tuple_name[0] == cls and agent.running:
-                return True
-        return False
+        return self._running_classes.get(cls, 0) > 0
     
     def running_agents(self:'Admin') -> bool:
-        for agent in self._agents.values():
-            if agent.running:
-                return True
-        return False
+        return self._running_count > 0
     
     def print_running_number(self:'Admin') -> None:
-        count = 0
-        for agent in self._agents.values():
-            if agent.running:
-                count += 1
-        self.print(f"Still Running: {count}")
+        self.print(f"Still Running: {self._running_count}")
 
     def print_running(self:'Admin', cls=None) -> bool:
         buffer = "Still running agent(s):\n"
@@ -408,6 +466,12 @@ class Admin(metaclass=AdminMeta):
 
             agent = self._agents[agent_name]
             self._started_agents.append(agent)
+            if self.synchronous:
+                agent.synchronous = True
+                agent.cycle_counter = 1
+                agent.idle_counter = 0
+                self._set_running(agent, True)
+                return
             agent.start_cycle(self.start_event)
         except KeyError:
             self.print(f"'Agent' {agent_name} not connected")
@@ -460,92 +524,78 @@ class Admin(metaclass=AdminMeta):
         if self.recording:
             #json_string = json.dumps(self.system_info, indent=2)
             pprint.pprint(self.system_info, indent=2, sort_dicts=False)
-        if (self.full_report or self.report) and not self._report_lock:
+        if self.full_report or self.report:
             self.print("Making System Report...")
-            return self._print_report()
-            self.print("System Report Completed")
+            try:
+                self._print_report()
+                self.print("System Report Completed")
+            except ImportError as e:
+                self.print(f"System Report not written: {e}")
         #sleep(2)
         #os._exit(0) 
     
     def _print_report(self) -> None:
         buffer = "\n# System Report #\n"
-        #print(f'Confirmation (spots_sold): {self._environments["Parking"].print_percepts}')
         buffer += f'Elapsed Time: {round(self.elapsed_time,4)} seconds\n'
         buffer += f'Total Agents: {len(self._agents)}\n'
+        if self.synchronous:
+            buffer += f'Ticks: {self.ticks} ({self.ticks_per_s} ticks/s)\n'
         for name, counter in self._num_agent.items():
             buffer += f'  {name}: {counter}\n'
-        buffer += f'Total Msgs: {self._channels["Parking"].send_counter}\n'
-        for sender, counter in self._channels["Parking"].send_counter_agent.items():
-            buffer += f'  By {sender}\'s: {counter} msgs\n'
+        buffer += f'Total Msgs: {sum(ch.send_counter for ch in self._channels.values())}\n'
+        for channel in self._channels.values():
+            for sender, counter in channel.send_counter_agent.items():
+                buffer += f'  By {sender}\'s: {counter} msgs\n'
         self.report_buffer = buffer
-        return
-        log_dict: Dict[float, Dict[str, Dict[str, Any]]] = dict() 
+
+        main_name = os.path.basename(sys.argv[0]).split(".py")[0]
+        self.write_report(self._cycle_logs(), f"{main_name}_report")
+    
+    def _cycle_logs(self):
         for instance in self._agents.values():
-            for key, value in instance.cycle_log.items():
+            for sys_time, value in instance.cycle_log.items():
                 for idx, log in enumerate(value):
                     if len(value) > 1:
-                        instance_name = f"{instance.my_name} ({idx})"
-                    else:
-                        instance_name = instance.my_name
-                    if key in log_dict:
-                        log_dict[key][instance_name] = log
+                        yield sys_time, f"{instance.my_name} ({idx})", log
                     else:
-                        log_dict[key] = {instance_name: log}
-
-        main_name = os.path.basename(sys.argv[0]).split(".py")[0]
-        self.dict_to_excel(log_dict, f"{main_name}_report")
+                        yield sys_time, instance.my_name, log
     
-    def dict_to_excel(self, data_dict: Dict, output_file):
-        rows = []
-        total_iterations = sum(len(instances) for instances in data_dict.values())
-        processed_iterations = 0
-        self.print("Managing Data...")
-        for sys_time, instances in data_dict.items():
-            assert isinstance(instances, dict)
-            for instance, instance_data in instances.items():
-                assert isinstance(instance_data, dict)
-                processed_iterations += 1
-                percentage = (processed_iterations / total_iterations) * 100
-                #self.print_progress_bar(percentage)
-                row = {
-                    "Time": sys_time,
-                    "Instance": instance,
-                    "Cycle": instance_data.get("cycle", None),
-                    "Operation": instance_data.get("decision", None),
-                    "Description": instance_data.get("description", None),
-                    "Completed Goal": instance_data.get("running_goal", None),
-                    "Received Msgs": instance_data.get("last_recv", None),
-                    "Event": instance_data.get("event", None),
-                    "Completed Event": instance_data.get("last_event", None),
-                    "Retrieved Plans": instance_data.get("retrieved_plans", None),
-                    "Events": instance_data.get("events", None),
-                    "Connected Envs": instance_data.get("connected_envs", None),
-                    "Connected Chs": instance_data.get("connected_chs", None),
-                    "Intentions": instance_data.get("intentions", None),
-                    "Beliefs": instance_data.get("beliefs", None),
-                    "Goals": instance_data.get("goals", None),
-                }
-                rows.append(row)
-        if self.full_report:
-            df = pd.DataFrame(rows, columns=["Time", "Instance", "Cycle", "Operation", "Description", "Received Msgs", "Event", "Retrieved Plans", "Events","Intentions", "Completed Event", "Connected Envs", "Connected Chs", "Beliefs", "Goals"])
-        elif self.report:
-            df = pd.DataFrame(rows, columns=["Time", "Instance", "Cycle", "Operation", "Description"])
-            
-        df['Instance_numeric'] = df['Instance'].str.extract(r'_(\d+)$').fillna(0).astype(int)
-        df = df.sort_values(by=["Time","Instance_numeric"]).drop(columns='Instance_numeric')
+    def write_report(self, logs, output_file: str, fmt: str | None = None) -> str:
+        """
+        Streams cycle logs into a report sorted by Time and Instance
 
-        
+        Parameters
+        ----------
+            logs : Iterable of (time, instance name, log dict)
+                The cycle log entries, in any order.
+            output_file : str
+                Base name of the report, written inside the 'reports' folder.
+            fmt : str, optional
+                One of 'csv', 'parquet' or 'xlsx'. Defaults to Admin().report_format.
+        """
+        fmt = fmt if fmt is not None else self.report_format
         if not os.path.exists("reports"):
             os.makedirs("reports")
         counter = 1
         filename = f"{output_file}_{counter}"
-        while os.path.exists(f"reports/{filename}.xlsx"):
+        while os.path.exists(f"reports/{filename}.{fmt}"):
             counter += 1
             filename = f"{output_file}_{counter}"
-            
-        self.print("Writing to Excel...")
-        #self.to_excel_with_progress(df, f"reports/{filename}.xlsx")    
-        df.to_excel(f"reports/{filename}.xlsx", index=False)
+        
+        columns = FULL_COLUMNS if self.full_report else SHORT_COLUMNS
+        writer = ReportWriter(f"reports/{filename}", fmt, columns, progress=self.print_progress_bar)
+        self.print("Managing Data...")
+        writer.add_logs(logs)
+        self.print(f"Writing {writer.total_rows} rows to {fmt}...")
+        return writer.close()
+    
+    def dict_to_excel(self, data_dict: Dict, output_file):
+        logs = (
+            (sys_time, instance, instance_data)
+            for sys_time, instances in data_dict.items()
+            for instance, instance_data in instances.items()
+        )
+        return self.write_report(logs, output_file, "xlsx")
     
     def print_progress_bar(self, percentage, bar_length=40):
         percentage = min(max(percentage, 0), 100)
@@ -555,37 +605,6 @@ class Admin(metaclass=AdminMeta):
         sys.stdout.flush()
         if percentage >= 100:
             print()
-
-    def write_to_excel(self, df, file_path):
-        df.to_excel(file_path, index=False)
-    
-    def estimate_duration(self, df):
-        sample_size = min(10, len(df)) 
-        sample_df = df.iloc[:sample_size]
-        
-        start_time = time()
-        sample_df.to_excel("sample_output.xlsx", index=False)
-        duration = time() - start_time
-    
-        return (duration / sample_size) * len(df)
-    
-    def to_excel_with_progress(self, df, file_path): 
-        estimated_duration = self.estimate_duration(df)  
-        
-        thread = Thread(target=self.write_to_excel, args=(df, file_path))
-        thread.start()
-        start_time = time()
-        
-        while thread.is_alive():
-            elapsed = time() - start_time
-            if elapsed < estimated_duration:
-                estimated_duration = (1 - 0.05) * estimated_duration + 0.05 * elapsed
-            percentage = min((elapsed / estimated_duration) * 100, 100)
-            self.print_progress_bar(percentage)
-        
-            sleep(0.1)  
-            
-        self.print_progress_bar(100)
             
     def connect_to(self, agents: list[TAgent] | TAgent, targets: list[TEnv | Environment | TChannel | Channel | str] | Environment | Channel | str) -> None:
         if not isinstance(agents, list): 
@@ -4,13 +4,12 @@ from logging import getLogger
 from dataclasses import dataclass, field
 from maspy.environment import Environment, Percept	
 from maspy.communication import Channel, Act, broadcast
-from maspy.learning import EnvModel
 from maspy.error import (
     InvalidBeliefError,
     InvalidPlanError,
     RunPlanError,
 )
-from maspy.utils import set_changes, merge_dicts, manual_deepcopy, fill_anys, bcolors, Condition
+from maspy.utils import set_changes, merge_dicts, manual_deepcopy, fill_anys, Condition
 from typing import List, Optional, Dict, Set, Any, Union, Type, cast, _SpecialForm, TypeGuard, TypeVar, TYPE_CHECKING
 from collections.abc import Iterable, Callable, Sequence
 from collections import deque
@@ -22,6 +21,9 @@ from contextlib import nullcontext
 import inspect
 import sys
 
+if TYPE_CHECKING:
+    from maspy.learning import EnvModel
+
 Event_Change = Enum('gain | lose | test | success | failure', ['gain', 'lose', 'test', 'success', 'failure']) # type: ignore[misc]
 
 gain = Event_Change.gain
@@ -351,13 +353,15 @@ class Agent:
         self.tuple_name: tuple[str, int] = (name, 0)
         self.my_name = name
         Admin().add_agents(self)
-        self.print_queue = Admin().print_queue
+        self.printer = Admin().printer
         self.sys_time = Admin().sys_time
         self.logger = getLogger("maspy")
         self.delay: int|float = 0
         self.stop_flag: threading.Event | None = None
         self.running: bool = False
         self.thread: threading.Thread | None = None
+        # set by the Admin's synchronous mode, plans then run to completion inside the tick
+        self.synchronous: bool = False
         
         self.lock = threading.Lock()
         self.env_lock = threading.Lock()
@@ -374,8 +378,12 @@ class Agent:
         self._environments: Dict[str, Environment] = dict()
         self._channels: Dict[str, Channel] = dict()
         self._dicts: Dict[str, Union[Dict[str, Environment], Dict[str, Channel]]] = {"environment":self._environments, "channel":self._channels}
+        # environment methods already resolved by __getattr__, see _reset_dispatch. Its own
+        # reentrant lock, as env_lock is held while environment code may look up attributes
+        self._dispatch_lock = threading.RLock()
+        self._dispatch: Dict[str, Callable] = dict()
         
-        self._strategies: list[EnvModel] = []
+        self._strategies: list['EnvModel'] = []
         self.auto_action: bool = False
 
         self.max_intentions: int = max_intentions
@@ -433,8 +441,7 @@ class Agent:
         f_args = "".join(map(str, args))
         f_kwargs = "".join(f"{key}={value}" for key, value in kwargs.items())
         name = self.my_name if not self.unique else self.tuple_name[0]
-        msg = f"{self.tcolor}Agent:{name}> {f_args}{f_kwargs}{bcolors.ENDCOLOR}"
-        self.print_queue.put(msg)
+        self.printer.put(self.tcolor, f"Agent:{name}", f"{f_args}{f_kwargs}")
         
     @property
     def print_beliefs(self):
@@ -580,6 +587,7 @@ class Agent:
             case Environment():
                 with self.env_lock:
                     self._environments[target.my_name] = target
+                    self._reset_dispatch()
             case Channel():
                 with self.ch_lock:
                     self._channels[target.my_name] = target
@@ -608,12 +616,13 @@ class Agent:
                 with self.env_lock:
                     target._rm_agent(self)
                     del self._environments[target.my_name]
+                    self._reset_dispatch()
             case Channel():
                 with self.ch_lock:
                     target._rm_agent(self)
                     del self._channels[target.my_name]
                 
-    def add_policy(self, policy: EnvModel):
+    def add_policy(self, policy: 'EnvModel'):
         """
         Adds a policy to the Agent's Reasoning Cycle
 
@@ -873,6 +882,8 @@ class Agent:
         if found_data:
             return found_data  
         else:
+            if not self.printing:
+                return None
             current_frame = inspect.currentframe()
             assert current_frame is not None
             caller_frame = current_frame.f_back
@@ -902,6 +913,9 @@ class Agent:
     def wait(self, timeout: Optional[float] = None, event: Optional[Event] = None):
         """
         Suspends the current intention for a given time or until a certain event is received.
+
+        Not available in the Admin's synchronous mode, where the plan runs
+        on the tick's thread and nothing else could end the wait.
         
         Parameters
         ----------
@@ -920,6 +934,8 @@ class Agent:
             else:
                 reason += "_event"
             
+        if (timeout is not None or event is not None) and self.synchronous:
+            raise RuntimeError(f"{self.my_name} cannot wait in synchronous mode, it would stop every agent's tick")
         if timeout is not None or event is not None: 
             tracing = True
             level = 1
@@ -1045,29 +1061,29 @@ class Agent:
         return change,belief_goal
     
     def _compare_data(self, data1: Belief | Goal | Percept, data2: Belief | Goal | Percept, ck_type: bool, ck_values: bool, ck_src: bool):
-        buffer = f"Comparing: {data1}  &  {data2}"
+        show = self.show_slct and self.printing
         if ck_type and type(data1) is not type(data2):
-            self.print(f"{buffer} >> Different type") if self.show_slct else ...
+            self.print(f"Comparing: {data1}  &  {data2} >> Different type") if show else ...
             return False
         if data1.name != data2.name:
-            self.print(f"{buffer} >> Different key") if self.show_slct else ...
+            self.print(f"Comparing: {data1}  &  {data2} >> Different key") if show else ...
             return False
         if ck_src and data2.source != DEFAULT_SOURCE and data1.source != data2.source:
-            self.print(f"{buffer} >> Different source") if self.show_slct else ...
+            self.print(f"Comparing: {data1}  &  {data2} >> Different source") if show else ...
             return False
         if not ck_values:
             return True
         if data1.values_len != data2.values_len:
-            self.print(f"{buffer} >> Different values length") if self.show_slct else ...
+            self.print(f"Comparing: {data1}  &  {data2} >> Different values length") if show else ...
             return False
         for arg1,arg2 in zip(data1._values,data2._values):
             if arg1 is Any or arg2 is Any or arg1 == arg2:
                 continue
             else:
-                self.print(f"{buffer} >> Different values {arg1} x {arg2}") if self.show_slct else ...
+                self.print(f"Comparing: {data1}  &  {data2} >> Different values {arg1} x {arg2}") if show else ...
                 return False
         else:
-            self.print(f"{buffer} >> Compatible") if self.show_slct else ...
+            self.print(f"Comparing: {data1}  &  {data2} >> Compatible") if show else ...
             return True
     
     def send(self, target: str | List[str] | broadcast, msg_act: Act, msg: MSG, channel: str = DEFAULT_CHANNEL) -> None | Belief | Goal | Plan | Iterable[Belief | Goal | Plan]: 
@@ -1100,8 +1116,12 @@ class Agent:
                     
                 #self._channels[channel]._send(self.my_name,target,msg_act,msg)
                 msg.reply_event.clear()
-                send_thread = threading.Thread(target=self._channels[channel]._send,args=(self.my_name,target,msg_act,msg))
-                send_thread.start()
+                if self.synchronous:
+                    # synchronous targets answer on delivery, see _save_msg
+                    self._channels[channel]._send(self.my_name,target,msg_act,msg)
+                else:
+                    send_thread = threading.Thread(target=self._channels[channel]._send,args=(self.my_name,target,msg_act,msg))
+                    send_thread.start()
                 self.last_sent.append((self.my_name,target,msg_act.name,msg))
                 was_set = msg.reply_event.wait(timeout=2)
                 
@@ -1248,7 +1268,9 @@ class Agent:
         return None
     
     def _save_msg(self, typ: str | Act, msg: Belief | Goal | Ask | Plan | List[Belief | Goal | Ask | Plan], msg_flag: bool) -> None:
-        if self.instant_mail: 
+        # in synchronous mode the asker blocks the tick, so its question cannot wait for the mail phase
+        sync_ask = self.synchronous and not msg_flag and cast(Act, typ).name in ('askOneReply','askAllReply')
+        if self.instant_mail or sync_ask: 
             try:
                 self._recieve_msgf(cast(str,typ),msg) if msg_flag else self._recieve_msg(cast(Act,typ),msg)
             except AssertionError:
@@ -1526,28 +1548,54 @@ class Agent:
             return None
 
     def __getattr__(self, name):
-        for instance in self._environments.values():
-            if hasattr(instance, name):
-                method = getattr(instance, name)
-                def wrapper(*args, **kwargs):
-                    try:
-                        return method(self.my_name, *args, **kwargs) 
-                    except TypeError as e:
-                        if "object is not callable" not in str(e):
-                            raise 
-                return wrapper
+        dispatch = self.__dict__.get("_dispatch")
+        if dispatch is None:
+            raise AttributeError(name)
+        with self._dispatch_lock:
+            for instance in list(self._environments.values()):
+                if hasattr(instance, name):
+                    attribute = getattr(instance, name)
+                    wrapper = self._delegate(instance, attribute)
+                    if callable(attribute):
+                        # stored on the instance too, so later lookups never reach __getattr__
+                        dispatch[name] = self.__dict__[name] = wrapper
+                    return wrapper
         raise AttributeError(f"{self.my_name} doesnt have the method '{name}' and is not connected to any environment with the method '{name}'.")
     
+    def _delegate(self, instance: Environment, method: Any) -> Callable:
+        is_callable = callable(method)
+        name = getattr(method, "__name__", None)
+        def wrapper(*args, **kwargs):
+            # only actions, or methods named to queue_actions, return a Future while queueing
+            if is_callable and instance._action_queue is not None and name in instance._queued_methods:
+                return instance.enqueue(method, (self.my_name, *args), kwargs)
+            try:
+                return method(self.my_name, *args, **kwargs) 
+            except TypeError as e:
+                if "object is not callable" not in str(e):
+                    raise 
+        return wrapper
+    
+    def _reset_dispatch(self) -> None:
+        """Forgets the resolved environment methods, called whenever the connected environments change"""
+        with self._dispatch_lock:
+            for name, wrapper in self._dispatch.items():
+                if self.__dict__.get(name) is wrapper:
+                    del self.__dict__[name]
+            self._dispatch.clear()
+    
     def start_cycle(self, start_flag: threading.Event | None = None) -> None:
         """Starts the Agent's Reasoning Cycle"""    
-        self.running = True
+        from maspy.admin import Admin
+        Admin()._set_running(self, True)
         self.stop_flag = threading.Event()
         self.thread = threading.Thread(target=self._cycle,args=(start_flag,self.stop_flag,))
         self.thread.start()
     
     def stop_cycle(self, log_flag=False) -> None:
         """Stops the Agent's Reasoning Cycle"""
-        self.running = False
+        from maspy.admin import Admin
+        Admin()._set_running(self, False)
         self.logger.debug("Ending Reasoning", extra=self.agent_info) if self.logging else ...
         # self.save_cycle_log(decision="End of Reasoning")
         if self.stop_flag is not None:
@@ -1569,11 +1617,7 @@ class Agent:
                 self._perception()
                 self._mail()
             
-            num_running_intentions = self.__running_intentions.__len__()
-            self.curr_event, pending_flag = self._select_event()
-            self.relevant_plans = self._retrieve_plans(self.curr_event)
-            self._create_intention(self.relevant_plans, self.curr_event, pending_flag)
-            intention = self._select_intention()
+            num_running_intentions, intention = self._deliberate()
             
             if stop_flag.is_set():
                 break
@@ -1583,6 +1627,21 @@ class Agent:
             self._delay()
             self.cycle_counter += 1
     
+    def _deliberate(self) -> tuple[int, Intention | None]:
+        num_running_intentions = self.__running_intentions.__len__()
+        self.curr_event, pending_flag = self._select_event()
+        self.relevant_plans = self._retrieve_plans(self.curr_event)
+        self._create_intention(self.relevant_plans, self.curr_event, pending_flag)
+        return num_running_intentions, self._select_intention()
+    
+    def _tick(self) -> None:
+        """One reasoning cycle of the Admin's synchronous mode, which perceives for every agent beforehand"""
+        num_running_intentions, intention = self._deliberate()
+        if not self.running:
+            return
+        self._execute_intention(intention, num_running_intentions)
+        self.cycle_counter += 1
+    
     def _delay(self):
         sleep(self.delay)
 
@@ -1591,7 +1650,10 @@ class Agent:
         if intention is None: 
             if num_running_intentions < self.max_intentions and self._strategies and self.auto_action:
                 self.idle_counter = 0
-                threading.Thread(target=self._execute_strategy).start()
+                if self.synchronous:
+                    self._execute_strategy()
+                else:
+                    threading.Thread(target=self._execute_strategy).start()
             elif num_running_intentions > 0:
                 self.idle_counter = 0
                 if self.last_log != "Running Intention":
@@ -1604,7 +1666,10 @@ class Agent:
                     self.logger.debug("Idle", extra=self.agent_info) if self.logging else ...
                 try:
                     self.idle_counter += 1
-                    threading.Thread(target=self.on_idle).start()
+                    if self.synchronous:
+                        self.on_idle()
+                    else:
+                        threading.Thread(target=self.on_idle).start()
                 except Exception as e:
                     ...
         else:
@@ -1617,7 +1682,7 @@ class Agent:
             state, terminated = strat.get_state()
             if terminated:
                 continue
-            int_action = strat.get_action(state)
+            int_action = strat.best_action(state)
             env = self._environments[strat.env.my_name]
             str_action = strat.actions_list[int_action]
             action = strat.actions_dict[str_action]
@@ -1647,7 +1712,7 @@ class Agent:
                 state, terminated = strat.get_state()
                 if terminated:
                     continue
-                int_action = strat.get_action(state)
+                int_action = strat.best_action(state)
                 env = self._environments[strat.name]
                 str_action = strat.actions_list[int_action]
                 action = strat.actions_dict[str_action]
@@ -1689,13 +1754,13 @@ class Agent:
                 continue
             if set_state is not None:
                 state = set_state
-                int_action = strat.get_action(set_state)
+                int_action = strat.best_action(set_state)
             else:
                 state, terminated = strat.get_state()
                 
                 if terminated:
                     continue
-                int_action = strat.get_action(state)
+                int_action = strat.best_action(state)
                 
             str_action = strat.actions_list[int_action]
             action = strat.actions_dict[str_action]
@@ -1717,7 +1782,7 @@ class Agent:
         percept_dict: Dict[str, dict] = dict()
         with self.env_lock:
             for env_name in self._environments:
-                percepts = self._environments[env_name]._perception()
+                percepts = self._environments[env_name]._perception(self.my_name, self.percept_filter)
                 percepts = self._apply_filters(percepts,env_name)
                 merge_dicts(percepts,percept_dict)
         if percept_dict == {}:
@@ -1758,7 +1823,7 @@ class Agent:
         if isinstance(env_name, list):
             for name in env_name:
                 try:
-                    percepts = self._environments[name]._perception()
+                    percepts = self._environments[name]._perception(self.my_name, self.percept_filter)
                     percepts = self._apply_filters(percepts,name)
                     self.logger.info(f"Perceiving {name} : {percepts}", extra=self.agent_info) if self.logging else ...
                     merge_dicts(percepts,percept_dict)
@@ -1767,7 +1832,7 @@ class Agent:
                     self.logger.warning(f"Not Connected to Environment:{name}", extra=self.agent_info) if self.logging else ...
         else:
             try:
-                percept_dict = self._environments[env_name]._perception()
+                percept_dict = self._environments[env_name]._perception(self.my_name, self.percept_filter)
                 percept_dict = self._apply_filters(percept_dict,env_name)
                 self.logger.info(f"Perceiving {env_name} : {percept_dict}", extra=self.agent_info) if self.logging else ...
             except KeyError:
@@ -2096,6 +2161,9 @@ class Agent:
             #assert trigger is not None, f"Unexpected None Trigger with {chosen_plan}:{args}"
             self.__running_intentions.append(intention)
             
+            if self.synchronous:
+                self._run_plan(intention)
+                return None
             plan_thread = threading.Thread(target=self._run_plan, args=(intention,))
             plan_thread.start()
             
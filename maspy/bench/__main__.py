@@ -0,0 +1,102 @@
+from typing import Any, Dict, List
+import argparse
+import platform
+import json
+import sys
+
+from maspy.bench.scenarios import SCENARIOS, QUICK
+from maspy.bench.runner import run_scenario
+from maspy.bench.import_time import measure_import
+from maspy.admin import MASPY_VERSION
+
+COLUMNS = [
+    ("elapsed_s", "time(s)"),
+    ("cycles_per_s", "cycles/s"),
+    ("messages_per_s", "msgs/s"),
+    ("percepts_per_s", "percepts/s"),
+    ("latency_p50_ms", "p50(ms)"),
+    ("latency_p99_ms", "p99(ms)"),
+    ("peak_rss_mb", "rss(MB)"),
+]
+
+def _parse_value(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+def _parse_params(pairs: List[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = dict()
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected key=value, got '{pair}'")
+        params[key] = _parse_value(value)
+    return params
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'scenario':<14}" + "".join(f"{title:>12}" for _, title in COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        cells = "".join(f"{'-' if result.get(key) is None else result[key]:>12}" for key, _ in COLUMNS)
+        print(f"{result['scenario']:<14}{cells}")
+        if "episodes" in result:
+            print(f"{'':<14}  {result['episodes_per_s']} episodes/s, {result['steps_per_s']} steps/s, model built in {result['build_s']}s")
+        if "ticks" in result:
+            print(f"{'':<14}  {result['ticks_per_s']} ticks/s, {result['mutations_per_s']} mutations/s")
+        if "torn" in result:
+            print(f"{'':<14}  {result['mutations_per_s']} mutations/s, {result['torn']} torn perceptions")
+        if "rollouts" in result:
+            print(f"{'':<14}  {result['rollouts_per_s']} rollouts/s, {result['mutations_per_s']} mutations/s")
+        if "builds" in result:
+            print(f"{'':<14}  {result['build_ms']} ms per build, {result['transitions_per_s']} transitions/s")
+        if result["status"] == "timed_out":
+            print(f"{'':<14}  killed after --timeout, no counters")
+        elif result["timed_out"]:
+            print(f"{'':<14}  timed out, counters are partial")
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m maspy.bench", description="Runs the MASPY benchmark scenarios")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run, all by default ({', '.join(SCENARIOS)})")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="KEY=VALUE",
+                        help="scenario parameter, e.g. -p agents=200 (ignored by scenarios without it)")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="runs per scenario")
+    parser.add_argument("--quick", action="store_true", help="use small sizes for a smoke run")
+    parser.add_argument("--import-time", action="store_true", help="also measure the import time of maspy")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a run is killed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}, choose from {', '.join(SCENARIOS)}")
+    params = _parse_params(args.param)
+    results: List[Dict[str, Any]] = []
+    for name in args.scenarios or SCENARIOS:
+        scenario_params = {**QUICK[name], **params} if args.quick else params
+        for run in range(args.repeat):
+            result = run_scenario(name, scenario_params, args.timeout)
+            result["run"] = run
+            results.append(result)
+
+    report: Dict[str, Any] = {
+        "maspy": MASPY_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.import_time:
+        report["import_time"] = measure_import()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_table(results)
+        if args.import_time:
+            print(f"\nimport: median {report['import_time']['median_ms']} ms")
+    return 1 if any(result["timed_out"] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from typing import Any, Dict, List
+from statistics import median
+import subprocess
+import argparse
+import json
+import sys
+
+DEFAULT_STATEMENT = "from maspy import Agent, Environment, Belief"
+HEAVY_MODULES = ("pandas", "numpy")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def _probe(statement: str) -> Dict[str, Any]:
+    code = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def measure_import(statement: str = DEFAULT_STATEMENT, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times an import statement, each run in a fresh interpreter
+
+    Parameters
+    ----------
+        statement : str
+            The import statement to time.
+        repeat : int
+            Number of fresh interpreters to sample.
+
+    Returns
+    -------
+        Dict with the statement, the sampled times in milliseconds, their
+        median and which heavy modules (pandas, numpy) the statement loaded.
+    """
+    _probe(statement) # warms the bytecode cache
+    samples: List[float] = []
+    loaded: set[str] = set()
+    for _ in range(repeat):
+        result = _probe(statement)
+        samples.append(result["elapsed"] * 1000)
+        loaded.update(result["loaded"])
+    return {
+        "statement": statement,
+        "samples_ms": [round(s, 2) for s in samples],
+        "median_ms": round(median(samples), 2),
+        "heavy_modules": sorted(loaded),
+    }
+
+def check_lazy_imports(statement: str = DEFAULT_STATEMENT) -> None:
+    """Raises AssertionError if the statement loads pandas or numpy"""
+    loaded = _probe(statement)["loaded"]
+    assert not loaded, f"'{statement}' should not import {loaded}"
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measures the import time of MASPY")
+    parser.add_argument("statement", nargs="?", default=DEFAULT_STATEMENT)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+    
+    result = measure_import(args.statement, args.repeat)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['statement']}: median {result['median_ms']} ms over {args.repeat} runs")
+        if result["heavy_modules"]:
+            print(f"  loaded heavy modules: {', '.join(result['heavy_modules'])}")
+    return 1 if result["heavy_modules"] and args.statement == DEFAULT_STATEMENT else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List
+from tempfile import TemporaryDirectory
+import subprocess
+import inspect
+import json
+import sys
+import os
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 2)
+
+def _percentile(ordered: List[float], percent: float) -> float | None:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def _rate(count: int, elapsed: float) -> float:
+    return round(count / elapsed, 2) if elapsed > 0 else 0.0
+
+def summarize(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns the raw counters of a scenario into the reported metrics"""
+    elapsed = raw["elapsed"]
+    latencies = sorted(raw.pop("latencies"))
+    p50, p99 = _percentile(latencies, 50), _percentile(latencies, 99)
+    metrics = {
+        "elapsed_s": round(elapsed, 4),
+        "timed_out": raw["timed_out"],
+        "cycles": raw["cycles"],
+        "cycles_per_s": _rate(raw["cycles"], elapsed),
+        "messages": raw["messages"],
+        "messages_per_s": _rate(raw["messages"], elapsed),
+        "percepts": raw["percepts"],
+        "percepts_per_s": _rate(raw["percepts"], elapsed),
+        "latency_samples": len(latencies),
+        "latency_p50_ms": None if p50 is None else round(p50 * 1000, 3),
+        "latency_p99_ms": None if p99 is None else round(p99 * 1000, 3),
+    }
+    if "episodes" in raw:
+        metrics.update(
+            build_s=round(raw["build"], 4),
+            episodes=raw["episodes"],
+            episodes_per_s=_rate(raw["episodes"], elapsed),
+            steps=raw["steps"],
+            steps_per_s=_rate(raw["steps"], elapsed),
+        )
+    if "ticks" in raw:
+        metrics.update(
+            ticks=raw["ticks"],
+            ticks_per_s=_rate(raw["ticks"], elapsed),
+            mutations=raw["mutations"],
+            mutations_per_s=_rate(raw["mutations"], elapsed),
+        )
+    if "torn" in raw:
+        metrics.update(
+            mutations=raw["mutations"],
+            mutations_per_s=_rate(raw["mutations"], elapsed),
+            torn=raw["torn"],
+        )
+    if "rollouts" in raw:
+        metrics.update(
+            rollouts=raw["rollouts"],
+            rollouts_per_s=_rate(raw["rollouts"], elapsed),
+            mutations=raw["mutations"],
+            mutations_per_s=_rate(raw["mutations"], elapsed),
+        )
+    if "builds" in raw:
+        metrics.update(
+            builds=raw["builds"],
+            build_ms=round(elapsed / raw["builds"] * 1000, 3) if raw["builds"] else None,
+            transitions=raw["transitions"],
+            transitions_per_s=_rate(raw["transitions"], elapsed),
+        )
+    return metrics
+
+def scenario_params(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps only the parameters the scenario accepts"""
+    from maspy.bench.scenarios import SCENARIOS
+    accepted = inspect.signature(SCENARIOS[name]).parameters
+    return {key: value for key, value in params.items() if key in accepted}
+
+def run_in_process(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs a scenario in the current interpreter, which must not have used Admin yet"""
+    from maspy.bench.scenarios import SCENARIOS
+    metrics = summarize(SCENARIOS[name](**params))
+    metrics["peak_rss_mb"] = _peak_rss_mb()
+    return metrics
+
+def run_scenario(name: str, params: Dict[str, Any] | None = None, timeout: float | None = None) -> Dict[str, Any]:
+    """
+    Runs a scenario in a fresh interpreter and returns its metrics
+
+    Admin, Environments and Channels are process-wide singletons, and peak
+    RSS is only meaningful per process, so every run gets its own interpreter.
+
+    Parameters
+    ----------
+        name : str
+            A key of ``maspy.bench.scenarios.SCENARIOS``.
+        params : dict
+            Keyword arguments for the scenario, unknown keys are dropped.
+        timeout : float
+            Seconds before the interpreter is killed.
+
+    Returns
+    -------
+        Dict with the scenario name, the parameters used and the metrics.
+        ``status`` is "ok", "partial" when the scenario stopped at its own
+        timeout, or "timed_out" when the interpreter was killed, with no metrics.
+    """
+    params = scenario_params(name, params or {})
+    with TemporaryDirectory(prefix="maspy_bench_") as tmp:
+        output = os.path.join(tmp, "result.json")
+        command = [sys.executable, "-m", "maspy.bench.runner", name, output, json.dumps(params)]
+        try:
+            process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"scenario": name, "params": params, "status": "timed_out", "timed_out": True}
+        if process.returncode != 0 or not os.path.exists(output):
+            raise RuntimeError(f"Scenario '{name}' failed:\n{process.stderr}")
+        with open(output, encoding="utf-8") as f:
+            metrics = json.load(f)
+    status = "partial" if metrics["timed_out"] else "ok"
+    return {"scenario": name, "params": params, "status": status, **metrics}
+
+def _child(argv: List[str]) -> int:
+    name, output, params = argv
+    metrics = run_in_process(name, json.loads(params))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(metrics, f)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(_child(sys.argv[1:]))
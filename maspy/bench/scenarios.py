@@ -0,0 +1,565 @@
+from typing import Any, Callable, Dict, List
+from threading import Lock, Timer
+from time import perf_counter, sleep
+from random import Random
+from contextlib import nullcontext
+
+from maspy import Agent, Environment, Channel, Percept, Belief, Goal, Admin
+from maspy.environment import DEFAULT_GROUP
+from maspy import pl, gain, achieve, tell, broadcast, action
+from maspy.learning.groups import listed, cartesian
+
+BENCH_CHANNEL = "Bench"
+BENCH_ENV = "BenchField"
+
+class Stats:
+    """Thread-safe counters shared by the agents of a scenario"""
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.messages = 0
+        self.percepts = 0
+        self.torn = 0
+        self.latencies: List[float] = []
+
+    def record(self, stamp: float, messages: int = 0) -> None:
+        latency = perf_counter() - stamp
+        with self.lock:
+            self.latencies.append(latency)
+            self.messages += messages
+
+def _setup(prints: bool) -> Admin:
+    admin = Admin()
+    admin.sys_settings(cycle_speed=0.1)
+    if not prints:
+        admin.block_prints()
+    return admin
+
+def _run_system(agents: List[Agent], stats: Stats, timeout: float) -> Dict[str, Any]:
+    """Runs the system until every agent stops or the timeout ends"""
+    def expire():
+        result["timed_out"] = True
+        for agent in agents:
+            if agent.running:
+                agent.stop_cycle()
+
+    result: Dict[str, Any] = {"timed_out": False}
+    timer = Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    start = perf_counter()
+    Admin().start_system()
+    result["elapsed"] = perf_counter() - start
+    timer.cancel()
+    result.update(
+        cycles=sum(agent.cycle_counter for agent in agents),
+        messages=stats.messages,
+        percepts=stats.percepts,
+        latencies=stats.latencies,
+    )
+    return result
+
+# Broadcast: modelled on ex-parking, a manager broadcasts a price and waits for every driver's answer
+
+class BenchManager(Agent):
+    def __init__(self, stats: Stats, drivers: int, rounds: int):
+        super().__init__("Manager", read_all_mail=True)
+        self.stats = stats
+        self.drivers = drivers
+        self.rounds = rounds
+        self.answers = 0
+        self.answer_lock = Lock()
+        self.add(Goal("round", 0))
+
+    @pl(gain, Goal("round", Any))
+    def start_round(self, src, number):
+        self.send(broadcast, achieve, Goal("price", (number, perf_counter())), BENCH_CHANNEL)
+
+    @pl(gain, Goal("answer", (Any, Any)))
+    def answer(self, src, answer):
+        number, stamp = answer
+        self.stats.record(stamp, messages=1)
+        with self.answer_lock:
+            self.answers += 1
+            if self.answers < self.drivers:
+                return
+            self.answers = 0
+        if number + 1 < self.rounds:
+            self.add(Goal("round", number + 1))
+        else:
+            self.send(broadcast, tell, Belief("closed"), BENCH_CHANNEL)
+            self.stop_cycle()
+
+class BenchDriver(Agent):
+    def __init__(self, stats: Stats):
+        super().__init__("Driver")
+        self.stats = stats
+
+    @pl(gain, Goal("price", (Any, Any)))
+    def check_price(self, src, price):
+        number, stamp = price
+        self.stats.record(stamp, messages=1)
+        self.send(src, achieve, Goal("answer", (number, perf_counter())), BENCH_CHANNEL)
+
+    @pl(gain, Belief("closed"))
+    def closed(self, src):
+        self.stop_cycle()
+
+def broadcast_scenario(agents: int = 50, rounds: int = 10, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """One manager broadcasting to ``agents`` drivers for ``rounds`` request/answer rounds"""
+    _setup(prints)
+    stats = Stats()
+    channel = Channel(BENCH_CHANNEL)
+    drivers = [BenchDriver(stats) for _ in range(agents)]
+    manager = BenchManager(stats, agents, rounds)
+    Admin().connect_to([manager, *drivers], channel)
+    return _run_system([manager, *drivers], stats, timeout)
+
+# Contract-net: every initiator calls for proposals from every participant and awards the best one
+
+class BenchInitiator(Agent):
+    def __init__(self, stats: Stats, participants: List[str]):
+        super().__init__("Initiator", read_all_mail=True)
+        self.stats = stats
+        self.participants = participants
+        self.proposals: Dict[str, int] = dict()
+        self.proposal_lock = Lock()
+        self.add(Goal("call_for_proposals"))
+
+    @pl(gain, Goal("call_for_proposals"))
+    def call_for_proposals(self, src):
+        self.send(self.participants, achieve, Goal("cfp", (self.my_name, perf_counter())))
+
+    @pl(gain, Goal("propose", (Any, Any)))
+    def propose(self, src, proposal):
+        offer, stamp = proposal
+        self.stats.record(stamp, messages=1)
+        with self.proposal_lock:
+            self.proposals[src] = offer
+            if len(self.proposals) < len(self.participants):
+                return
+        best = min(self.proposals, key=self.proposals.__getitem__)
+        others = [name for name in self.proposals if name != best]
+        self.send(best, achieve, Goal("award", ("accept", perf_counter())))
+        if others:
+            self.send(others, achieve, Goal("award", ("reject", perf_counter())))
+        self.stop_cycle()
+
+class BenchParticipant(Agent):
+    def __init__(self, stats: Stats, initiators: int, seed: int):
+        super().__init__("Participant", read_all_mail=True)
+        self.stats = stats
+        self.initiators = initiators
+        self.awards = 0
+        self.award_lock = Lock()
+        self.rng = Random(seed)
+
+    @pl(gain, Goal("cfp", (Any, Any)))
+    def cfp(self, src, call):
+        _, stamp = call
+        self.stats.record(stamp, messages=1)
+        self.send(src, achieve, Goal("propose", (self.rng.randint(10, 30), perf_counter())))
+
+    @pl(gain, Goal("award", (Any, Any)))
+    def award(self, src, award):
+        _, stamp = award
+        self.stats.record(stamp, messages=1)
+        with self.award_lock:
+            self.awards += 1
+            if self.awards < self.initiators:
+                return
+        self.stop_cycle()
+
+def contract_net_scenario(initiators: int = 10, participants: int = 30, seed: int = 0, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """Contract-net fan-out, every initiator negotiates with every participant"""
+    _setup(prints)
+    stats = Stats()
+    bidders = [BenchParticipant(stats, initiators, seed + n) for n in range(participants)]
+    names = [bidder.my_name for bidder in bidders]
+    callers = [BenchInitiator(stats, names) for _ in range(initiators)]
+    return _run_system([*callers, *bidders], stats, timeout)
+
+# Large percept: many agents perceiving an environment with many percepts while one agent changes it
+
+class BenchField(Environment):
+    def __init__(self, percepts: int):
+        super().__init__(BENCH_ENV)
+        self.create([Percept("cell", (n, 0)) for n in range(percepts)])
+        self.create(Percept("tick", (0, perf_counter())))
+
+    def advance(self, agt, number):
+        # replaced rather than changed, so perceiving agents get a gain event
+        self.delete(self.get(Percept("tick", (Any, Any))))
+        self.create(Percept("tick", (number, perf_counter())))
+
+class BenchTicker(Agent):
+    def __init__(self, ticks: int, interval: float):
+        super().__init__("Ticker")
+        self.ticks = ticks
+        self.interval = interval
+        self.add(Goal("run"))
+
+    @pl(gain, Goal("run"))
+    def run(self, src):
+        for number in range(1, self.ticks + 1):
+            self.advance(number)
+            sleep(self.interval)
+        self.stop_cycle()
+
+class BenchWatcher(Agent):
+    def __init__(self, stats: Stats, ticks: int):
+        super().__init__("Watcher")
+        self.stats = stats
+        self.ticks = ticks
+
+    @pl(gain, Belief("tick", (Any, Any), BENCH_ENV))
+    def seen(self, src, tick):
+        number, stamp = tick
+        self.stats.record(stamp)
+        if number >= self.ticks:
+            self.stop_cycle()
+
+def large_percept_scenario(agents: int = 20, percepts: int = 1000, ticks: int = 20, interval: float = 0.05, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """``agents`` watchers perceiving ``percepts`` percepts while a ticker changes one of them"""
+    _setup(prints)
+    stats = Stats()
+    env = BenchField(percepts)
+    watchers = [BenchWatcher(stats, ticks) for _ in range(agents)]
+    ticker = BenchTicker(ticks, interval)
+    Admin().connect_to([ticker, *watchers], env)
+    result = _run_system([ticker, *watchers], stats, timeout)
+    # every reasoning cycle perceives the whole environment
+    result["percepts"] = sum(watcher.cycle_counter for watcher in watchers) * (percepts + 1)
+    return result
+
+# Contention: hundreds of agents perceiving while movers change two linked percepts in one batch
+
+class BenchYard(Environment):
+    def __init__(self, percepts: int, total: int):
+        super().__init__("BenchYard")
+        self.total = total
+        self.shifts = 0
+        self.create([Percept("crate", (n, 0)) for n in range(percepts)])
+        self.index_percept("crate", 0)
+        self.create(Percept("left", (0, perf_counter())))
+        self.create(Percept("right", (0, perf_counter())))
+
+    def shift(self, agt):
+        # anyone perceiving left and right must see them with the same number
+        with self.batch():
+            self.shifts += 1
+            number = self.shifts
+            crates = len(self._name_index["crate"])
+            self.change(self.get(Percept("crate", (number % crates, Any))), (number % crates, number))
+            self.change(self.get(Percept("left", (Any, Any))), (number, perf_counter()))
+            self.change(self.get(Percept("right", (Any, Any))), (number, perf_counter()))
+
+class BenchMover(Agent):
+    def __init__(self, moves: int, interval: float):
+        super().__init__("Mover")
+        self.moves = moves
+        self.interval = interval
+        self.add(Goal("run"))
+
+    @pl(gain, Goal("run"))
+    def run(self, src):
+        for _ in range(self.moves):
+            self.shift()
+            sleep(self.interval)
+        self.stop_cycle()
+
+class BenchInspector(Agent):
+    def __init__(self, stats: Stats, total: int):
+        super().__init__("Inspector")
+        self.stats = stats
+        self.total = total
+
+    @pl(gain, Belief("left", (Any, Any), "BenchYard"))
+    def inspect(self, src, left):
+        number, stamp = left
+        self.stats.record(stamp)
+        # the event may be older than the beliefs, both are compared as perceived last
+        current = self.get(Belief("left", (Any, Any), "BenchYard"))
+        right = self.get(Belief("right", (Any, Any), "BenchYard"))
+        if not isinstance(right, Belief) or not isinstance(current, Belief) or right.values[0] != current.values[0]:
+            with self.stats.lock:
+                self.stats.torn += 1
+        if number >= self.total:
+            self.stop_cycle()
+
+def contention_scenario(agents: int = 200, movers: int = 2, moves: int = 20, percepts: int = 500, interval: float = 0.01, queued: bool = False, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """``agents`` inspectors perceiving ``percepts`` percepts while ``movers`` agents change them in batches, through the action queue when ``queued``"""
+    _setup(prints)
+    stats = Stats()
+    env = BenchYard(percepts, movers * moves)
+    if queued:
+        env.queue_actions(methods=["shift"])
+    inspectors = [BenchInspector(stats, movers * moves) for _ in range(agents)]
+    shifters = [BenchMover(moves, interval) for _ in range(movers)]
+    Admin().connect_to([*shifters, *inspectors], env)
+    result = _run_system([*shifters, *inspectors], stats, timeout)
+    result["percepts"] = sum(inspector.cycle_counter for inspector in inspectors) * (percepts + 2)
+    result["mutations"] = env.shifts * 3
+    result["torn"] = stats.torn
+    return result
+
+# Lockstep: the synchronous mode, where every agent takes one step of a walk per tick
+
+class BenchArena(Environment):
+    def __init__(self):
+        super().__init__("BenchArena")
+        self.index_percept("walker", 0)
+        self.create(Percept("arena", "open"))
+        # walkers only perceive the arena, not the position of every other walker
+        self.subscribe(BenchWalker, [DEFAULT_GROUP])
+
+    def step(self, agt, number):
+        walker = self.get(Percept("walker", (agt, Any), "Walkers"))
+        if walker is None:
+            self.create(Percept("walker", (agt, number), "Walkers"))
+        else:
+            self.change(walker, (agt, number))
+
+class BenchWalker(Agent):
+    def __init__(self, steps: int):
+        super().__init__("Walker")
+        self.steps = steps
+        self.add(Goal("walk", 0))
+
+    @pl(gain, Goal("walk", Any))
+    def walk(self, src, number):
+        self.step(number)
+        if number + 1 < self.steps:
+            self.add(Goal("walk", number + 1))
+        else:
+            self.stop_cycle()
+
+def lockstep_scenario(agents: int = 200, steps: int = 100, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """``agents`` walkers run in synchronous ticks, each changing its own percept ``steps`` times"""
+    admin = _setup(prints)
+    admin.sys_settings(cycle_speed=0.1, synchronous=True)
+    stats = Stats()
+    env = BenchArena()
+    walkers = [BenchWalker(steps) for _ in range(agents)]
+    admin.connect_to(walkers, env)
+    result = _run_system(walkers, stats, timeout)
+    result["ticks"] = admin.ticks
+    result["mutations"] = agents * steps
+    return result
+
+# Deep plans: a large plan library on the same trigger, where only the last plan is applicable
+
+class BenchPlanner(Agent):
+    def __init__(self, stats: Stats, plans: int, depth: int):
+        super().__init__("Planner")
+        self.stats = stats
+        self.depth = depth
+        self.add(Belief("mode", plans - 1))
+        self.add(Goal("step", (0, perf_counter())))
+
+    def next_step(self, step):
+        number, stamp = step
+        self.stats.record(stamp)
+        if number + 1 < self.depth:
+            self.add(Goal("step", (number + 1, perf_counter())))
+        else:
+            self.stop_cycle()
+
+def _planner_class(plans: int) -> type:
+    """Builds an Agent class with ``plans`` plans for Goal step, each requiring a different mode"""
+    namespace: Dict[str, Any] = dict()
+    for mode in range(plans):
+        def step(self, src, step, *context):
+            self.next_step(step)
+        namespace[f"step_{mode}"] = pl(gain, Goal("step", (Any, Any)), Belief("mode", mode))(step)
+    return type("BenchPlanner", (BenchPlanner,), namespace)
+
+def deep_plans_scenario(agents: int = 4, plans: int = 200, depth: int = 100, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """``agents`` planners each chaining ``depth`` goals through a library of ``plans`` plans"""
+    _setup(prints)
+    stats = Stats()
+    planner = _planner_class(plans)
+    planners = [planner(stats, plans, depth) for _ in range(agents)]
+    return _run_system(planners, stats, timeout)
+
+# Taxi: the Q-learning model of ex-learn-taxi
+
+TAXI_MAP = [
+    "+---------+",
+    "|R: | : :G|",
+    "| : | : : |",
+    "| : : : : |",
+    "| | : | : |",
+    "|Y| : |B: |",
+    "+---------+",
+]
+
+class BenchTaxi(Environment):
+    def __init__(self, env_name: str = "BenchTaxi"):
+        super().__init__(env_name)
+        self.desc = [row.encode() for row in TAXI_MAP]
+        self.destinations = {"R":(1,2), "G":(4,4), "Y":(3,4), "B":(1,3)}
+        self.create(Percept("taxi_location", (5,5), cartesian))
+        self.create(Percept("Passenger_loc", ["R","G","Y","B","T"], listed))
+        self.create(Percept("Destination", list(self.destinations.values()), listed))
+        self.possible_starts = {"taxi_location": [(0,0),(2,2)], "Passenger_loc": ["R","G","Y","B"], "Destination": [(1,2),(4,4),(3,4),(1,3)]}
+
+    def moviment(self, position, direction):
+        row, col = position
+        if direction == "down":
+            row = min(row + 1, 4)
+        if direction == "up":
+            row = max(row - 1, 0)
+        if direction == "right" and self.desc[1 + row][2 * col + 2:2 * col + 3] == b":":
+            col = min(col + 1, 4)
+        if direction == "left" and self.desc[1 + row][2 * col:2 * col + 1] == b":":
+            col = max(col - 1, 0)
+        return (col, row)
+
+    def move_transition(self, state: dict, direction: str):
+        reward = 1 if state["Passenger_loc"] == "T" else -1
+        state["taxi_location"] = self.moviment(state["taxi_location"], direction)
+        return state, reward
+
+    def pickup_transition(self, state: dict):
+        passenger = state["Passenger_loc"]
+        if passenger != "T" and self.destinations[passenger] == state["taxi_location"]:
+            state["Passenger_loc"] = "T"
+            return state, 1
+        return state, -10
+
+    def drop_off_transition(self, state: dict):
+        if state["Passenger_loc"] == "T" and state["Destination"] == state["taxi_location"]:
+            state["Passenger_loc"] = "D"
+            return state, 100, True
+        return state, -10, False
+
+    @action(listed, ["down","up","right","left"], move_transition)
+    def move(self, agt, direction: str):
+        pass
+
+    @action(listed, "pickup", pickup_transition)
+    def pickup(self, agt):
+        pass
+
+    @action(listed, "dropoff", drop_off_transition)
+    def drop_off(self, agt):
+        pass
+
+def taxi_scenario(episodes: int = 300, max_steps: int = 200, q_backend: str = "dict", num_envs: int = 0, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """Q-learning on the Taxi model for ``episodes`` episodes, batched over ``num_envs`` episodes when set"""
+    from maspy.learning import EnvModel, qlearning
+    _setup(prints)
+    start = perf_counter()
+    model = EnvModel(BenchTaxi())
+    build = perf_counter() - start
+    start = perf_counter()
+    if num_envs:
+        model.learn_batch(num_envs, num_episodes=episodes, max_steps=max_steps, seed=0)
+    else:
+        model.learn(qlearning, num_episodes=episodes, max_steps=max_steps, q_backend=q_backend)
+    elapsed = perf_counter() - start
+    return {
+        "timed_out": False,
+        "elapsed": elapsed,
+        "build": build,
+        "episodes": episodes,
+        "steps": sum(model.episode_steps),
+        "cycles": 0,
+        "messages": 0,
+        "percepts": 0,
+        "latencies": [],
+    }
+
+def taxi_build_scenario(builds: int = 20, lazy: bool = False, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """Builds the Taxi model ``builds`` times, timing the transition table construction"""
+    from maspy.learning import EnvModel
+    _setup(prints)
+    env = BenchTaxi()
+    transitions = 0
+    start = perf_counter()
+    for _ in range(builds):
+        model = EnvModel(env, lazy=lazy)
+        transitions += sum(len(row) for row in model.P.values())
+    elapsed = perf_counter() - start
+    return {
+        "timed_out": False,
+        "elapsed": elapsed,
+        "builds": builds,
+        "transitions": transitions,
+        "cycles": 0,
+        "messages": 0,
+        "percepts": 0,
+        "latencies": [],
+    }
+
+# Rollouts: what-if simulation of a parking lot on a fork, rolled back after every rollout
+
+class BenchLot(Environment):
+    def __init__(self, spots: int):
+        super().__init__("BenchLot")
+        self.index_percept("spot", 0, 1)
+        for number in range(spots):
+            self.create(Percept("spot", (number, "free"), "Spots"))
+
+    def park(self, agt, number):
+        spot = self.get(Percept("spot", (number, "free"), "Spots"))
+        if spot is not None:
+            self.change(spot, (number, agt))
+
+    def leave(self, agt):
+        spot = self.get(Percept("spot", (Any, agt), "Spots"))
+        if spot is not None:
+            self.change(spot, (spot.values[0], "free"))
+
+def rollouts_scenario(spots: int = 100, rollouts: int = 2000, depth: int = 10, batched: bool = True, seed: int = 0, timeout: float = 120, prints: bool = False) -> Dict[str, Any]:
+    """``rollouts`` random walks of ``depth`` parks and leaves on a fork of the lot, each restored to the start"""
+    _setup(prints)
+    lot = BenchLot(spots)
+    rng = Random(seed)
+    start = perf_counter()
+    scratch = lot.fork()
+    for _ in range(rollouts):
+        token = scratch.snapshot()
+        with scratch.batch() if batched else nullcontext():
+            for step in range(depth):
+                if rng.random() < 0.6:
+                    scratch.park(f"Drv_{step}", rng.randrange(spots))
+                else:
+                    scratch.leave(f"Drv_{rng.randrange(step + 1)}")
+            scratch.restore(token)
+    elapsed = perf_counter() - start
+    return {
+        "timed_out": False,
+        "elapsed": elapsed,
+        "rollouts": rollouts,
+        "mutations": rollouts * depth,
+        "cycles": 0,
+        "messages": 0,
+        "percepts": 0,
+        "latencies": [],
+    }
+
+SCENARIOS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "broadcast": broadcast_scenario,
+    "contract_net": contract_net_scenario,
+    "large_percept": large_percept_scenario,
+    "contention": contention_scenario,
+    "deep_plans": deep_plans_scenario,
+    "lockstep": lockstep_scenario,
+    "taxi": taxi_scenario,
+    "taxi_build": taxi_build_scenario,
+    "rollouts": rollouts_scenario,
+}
+
+# Parameters small enough for a quick smoke run
+QUICK: Dict[str, Dict[str, Any]] = {
+    "broadcast": {"agents": 10, "rounds": 3},
+    "contract_net": {"initiators": 3, "participants": 8},
+    "large_percept": {"agents": 5, "percepts": 200, "ticks": 5},
+    "contention": {"agents": 30, "movers": 2, "moves": 10, "percepts": 100},
+    "deep_plans": {"agents": 2, "plans": 50, "depth": 20},
+    "lockstep": {"agents": 20, "steps": 20},
+    "taxi": {"episodes": 50},
+    "taxi_build": {"builds": 3},
+    "rollouts": {"rollouts": 200},
+}
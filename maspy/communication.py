@@ -1,6 +1,5 @@
 from threading import Lock
 from typing import Dict, Set, List, TYPE_CHECKING, Union, Any, Optional
-from maspy.utils import bcolors
 from logging import getLogger
 from enum import Enum
 
@@ -57,7 +56,7 @@ class Channel(metaclass=CommsMultiton):
         
         self.tcolor = ""
         from maspy.admin import Admin
-        self.print_queue = Admin().print_queue
+        self.printer = Admin().printer
         self.my_name = comm_name
         self.sys_time = Admin().sys_time
         Admin()._add_channel(self)
@@ -78,10 +77,11 @@ class Channel(metaclass=CommsMultiton):
         
     def print(self,*args, **kwargs):
         """Formatted MASPY Print Function"""
+        if not self.printing:
+            return
         f_args = "".join(map(str, args))
         f_kwargs = "".join(f"{key}={value}" for key, value in kwargs.items())
-        msg = f"{self.tcolor}{self._name}> {f_args}{f_kwargs}{bcolors.ENDCOLOR}"
-        self.print_queue.put(msg)
+        self.printer.put(self.tcolor, self._name, f"{f_args}{f_kwargs}")
     
     @property
     def get_info(self):
@@ -1,11 +1,16 @@
-from threading import Lock
+from threading import Lock, RLock, Thread, Condition
 from typing import Dict, Set, List, TYPE_CHECKING, Union, Optional, Any, Sequence, Callable
 from dataclasses import dataclass, field
+from contextlib import contextmanager
+from concurrent.futures import Future
+from collections import deque
 from collections.abc import Iterable
-from maspy.utils import manual_deepcopy, merge_dicts, bcolors
+from copy import copy
+from maspy.utils import manual_deepcopy, merge_dicts
+from maspy.spatial import GridIndex, Coordinates, as_coordinates
 from logging import getLogger
-from maspy.learning.modelling import Group
-from itertools import product, combinations, permutations
+from maspy.learning.groups import Group
+from maspy.learning.statespace import ListedSpace, CombinationSpace, PermutationSpace, CartesianSpace
 import inspect
 
 if TYPE_CHECKING:
@@ -13,6 +18,75 @@ if TYPE_CHECKING:
 
 DEFAULT_GROUP = "none"
 
+# bucket of the arguments _index_key cannot normalise, lookups skip indexes holding one
+_UNINDEXED = object()
+
+def _index_key(value: Any) -> Any:
+    """
+    Hashable stand-in of a percept argument, equal arguments get equal keys
+
+    Tuples become tuples of their keys, lists tagged ones, sets frozensets
+    and dicts tagged frozensets of their items, so ``[1]`` and ``[1.0]``
+    share a bucket like ``==`` would match them. Other unhashable values
+    go to the ``_UNINDEXED`` bucket.
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    if isinstance(value, tuple):
+        return tuple(_index_key(item) for item in value)
+    if isinstance(value, list):
+        return (list, tuple(_index_key(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return (dict, frozenset((key, _index_key(item)) for key, item in value.items()))
+    return _UNINDEXED
+
+@dataclass
+class EnvBatch:
+    """Summary of the mutations applied inside one Environment.batch"""
+    created: int = 0
+    changed: int = 0
+    deleted: int = 0
+    names: Set[str] = field(default_factory=set)
+    # (group, name) of the percept sets to publish when the batch ends
+    touched: Set[tuple[str, str]] = field(default_factory=set, repr=False)
+
+class QueuedCall(Future):
+    """
+    Future of a call queued with Environment.queue_actions
+
+    Waiting on it while holding the environment's write lock, e.g. from a
+    plan of a synchronous tick, raises instead of blocking forever, the
+    call can only run after the lock is released.
+    """
+    def __init__(self, env: 'Environment') -> None:
+        super().__init__()
+        self._env = env
+
+    def _check_wait(self) -> None:
+        if not self.done() and self._env._write_lock._is_owned():
+            raise RuntimeError(f"Waiting on a call queued to {self._env.my_name} before its batch ends, it would never run")
+
+    def result(self, timeout: float | None = None) -> Any:
+        self._check_wait()
+        return super().result(timeout)
+
+    def exception(self, timeout: float | None = None) -> BaseException | None:
+        self._check_wait()
+        return super().exception(timeout)
+
+@dataclass(frozen=True)
+class EnvSnapshot:
+    """Percepts of an Environment at one moment, see Environment.snapshot"""
+    # a published snapshot, shared and never changed, so taking one copies nothing
+    percepts: Dict[str, Dict[str, frozenset['Percept']]] = field(repr=False)
+    states: Dict[str, Sequence] = field(repr=False)
+    state_percepts: Dict[str, 'Percept'] = field(repr=False)
+
 @dataclass
 class Percept:
     """Represents a Observable (Perceivable) component of the Environment"""
@@ -160,11 +234,20 @@ class Environment(metaclass=EnvironmentMultiton):
         self.show_exec = full_log
         self.printing = True
         self.lock = Lock()
+        # serializes every mutation, held for the whole of a batch
+        self._write_lock = RLock()
+        self._batch: EnvBatch | None = None
+        # calls of agents waiting to be applied, only while queue_actions is on
+        self._action_queue: deque[tuple[Callable, tuple, dict, Future]] | None = None
+        self._queue_cond = Condition()
+        self._worker: Thread | None = None
+        # names of the methods agents enqueue, the actions and those given to queue_actions
+        self._queued_methods: Set[str] = set()
         self.tcolor = ""
         
         from maspy.admin import Admin
         Admin()._add_environment(self)
-        self.print_queue = Admin().print_queue
+        self.printer = Admin().printer
         self.sys_time = Admin().sys_time
         self.logger = getLogger("maspy")
         self.last_msg = ""
@@ -174,10 +257,25 @@ class Environment(metaclass=EnvironmentMultiton):
         self._name = f"Environment:{self.my_name}"
         self.perceiving_agents: int = 0
         self._percepts: Dict[str, Dict[str, Set[Percept]]] = dict()
+        # what agents perceive: a copy of _percepts swapped in after each mutation, never
+        # changed in place, so perception reads it without locks and unchanged sets are shared
+        self._snapshot: Dict[str, Dict[str, frozenset[Percept]]] = dict()
+        # bumped on every create, change or delete of a percept name
+        self._percept_versions: Dict[str, int] = dict()
+        # the stored percepts by name and, for names given to index_percept, by argument value
+        self._name_index: Dict[str, Dict[int, Percept]] = dict()
+        self._arg_indexes: Dict[str, Dict[int, Dict[Any, Dict[int, Percept]]]] = dict()
+        # grids of the names given to spatial_index and the local view of agents
+        self._spatial: Dict[str, tuple[GridIndex, int | Sequence[int] | None]] = dict()
+        self._view: tuple[float, Callable[[str], Any], Set[str] | None] | None = None
+        # percept groups each agent, or each agent class, is limited to, see subscribe
+        self._scopes: Dict[str, Set[str]] = dict()
+        self._class_scopes: Dict[str, Set[str]] = dict()
         
         self.possible_starts: dict | str = dict()
         self._actions: List[Action]
-        self._states: Dict[str, list] = dict()
+        # lazy StateSpace of each state percept, nothing is enumerated until EnvModel asks
+        self._states: Dict[str, Sequence] = dict()
         self._state_percepts: Dict[str, Percept] = dict()
         try:    
             if not self._actions:
@@ -193,8 +291,7 @@ class Environment(metaclass=EnvironmentMultiton):
             return 
         f_args = "".join(map(str, args))
         f_kwargs = "".join(f"{key}={value}" for key, value in kwargs.items())
-        msg = f"{self.tcolor}{self._name}> {f_args}{f_kwargs}{bcolors.ENDCOLOR}"
-        self.print_queue.put(msg)
+        self.printer.put(self.tcolor, self._name, f"{f_args}{f_kwargs}")
     
     @property
     def get_info(self):
@@ -207,13 +304,528 @@ class Environment(metaclass=EnvironmentMultiton):
                     
         return {"percepts": percept_list, "connected_agents": list(self._agents.keys()).copy()}
     
-    def _perception(self) -> Dict[str, Dict[str, Set[Percept]]]:
+    def percept_versions(self, names: Iterable[str]) -> tuple:
+        """
+        Version counters of the given percept names
+
+        A counter changes whenever a percept with that name is created,
+        changed or deleted, so equal versions mean unchanged percepts.
+        """
+        versions = self._percept_versions
+        return tuple(versions.get(name, 0) for name in names)
+    
+    def _touch(self, names: Iterable[str]) -> None:
+        versions = self._percept_versions
+        for name in names:
+            versions[name] = versions.get(name, 0) + 1
+    
+    @contextmanager
+    def batch(self):
+        """
+        Applies every create, change and delete of the block as one mutation
+
+        The block holds the write lock throughout and its changes are
+        published together at the end, so agents perceive the environment
+        either before or after all of its mutations. Versions move once and
+        a single summarized record is logged. Nested batches join the outer
+        one. Mutations done before an exception are kept and published.
+
+        Returns
+        -------
+            EnvBatch: The counters of the mutations done so far.
+        """
+        with self._write_lock:
+            if self._batch is not None:
+                yield self._batch
+                return
+            summary = self._batch = EnvBatch()
+            action, agt = self._check_caller()
+            try:
+                yield summary
+            finally:
+                self._batch = None
+                self._publish(summary.touched)
+                if summary.created or summary.changed or summary.deleted:
+                    extras = self.env_info
+                    extras.update({"batch": {"created": summary.created, "changed": summary.changed, "deleted": summary.deleted},
+                                   "names": sorted(summary.names), "action": action, "agent": agt})
+                    if self.show_exec:
+                        self.print(f'Batch of {summary.created} created, {summary.changed} changed and {summary.deleted} deleted')
+                    self.logger.info('Batch of Percepts', extra=extras)
+    
+    def _publish(self, touched: Iterable[tuple[str, str]]) -> None:
+        """Swaps in a snapshot where only the touched percept sets are copied, and bumps their versions"""
+        self._snapshot, names = self._published_with(touched)
+        self._touch(names)
+    
+    def _published_with(self, touched: Iterable[tuple[str, str]]) -> tuple[Dict[str, Dict[str, frozenset[Percept]]], Set[str]]:
+        """The published snapshot with the touched percept sets taken from the live percepts"""
+        snapshot = dict(self._snapshot)
+        copied: Dict[str, Dict[str, frozenset[Percept]]] = dict()
+        names = set()
+        for group, name in touched:
+            group_keys = copied.get(group)
+            if group_keys is None:
+                group_keys = copied[group] = snapshot[group] = dict(snapshot.get(group, {}))
+            percept_set = self._percepts.get(group, {}).get(name)
+            if percept_set is None:
+                group_keys.pop(name, None)
+            else:
+                group_keys[name] = frozenset(percept_set)
+            names.add(name)
+        return snapshot, names
+    
+    def _commit(self, touched: Iterable[tuple[str, str]]) -> EnvBatch | None:
+        """Publishes a mutation, or holds it back until the running batch ends"""
+        batch = self._batch
+        if batch is None:
+            self._publish(touched)
+        else:
+            for group, name in touched:
+                batch.touched.add((group, name))
+                batch.names.add(name)
+        return batch
+    
+    def _current(self) -> Dict[str, Dict[str, frozenset[Percept]]]:
+        """The live percepts as a snapshot, mutations of a running batch included"""
+        if self._batch is None:
+            return self._snapshot
+        return self._published_with(self._batch.touched)[0]
+    
+    def snapshot(self) -> EnvSnapshot:
+        """
+        Checkpoints the percepts of the environment, to go back to with restore
+
+        Percepts are never changed in place, so the checkpoint shares them
+        with the environment and costs a few dict copies.
+
+        Returns
+        -------
+            EnvSnapshot: The token to give to restore.
+        """
+        with self._write_lock:
+            return EnvSnapshot(self._current(), dict(self._states), dict(self._state_percepts))
+    
+    def restore(self, snapshot: EnvSnapshot):
+        """
+        Brings the percepts back to a snapshot of this environment or of its forks
+
+        Only the percept names changed since the snapshot are compared, and
+        only the percepts that differ are replaced and reindexed. Their versions move forward, as for any change, so
+        agents and models perceive the rollback.
+
+        Parameters
+        ----------
+            snapshot : EnvSnapshot
+                A token returned by snapshot.
+        """
+        with self._write_lock:
+            live, published, batch = self._percepts, self._snapshot, self._batch
+            pending = batch.touched if batch is not None else ()
+            touched = []
+            for group in live.keys() | snapshot.percepts.keys():
+                saved_keys = snapshot.percepts.get(group, {})
+                published_keys = published.get(group, {})
+                live_keys = live.setdefault(group, dict())
+                for name in live_keys.keys() | saved_keys.keys():
+                    saved = saved_keys.get(name)
+                    # unchanged since the snapshot, the published set is still the saved one
+                    if saved is published_keys.get(name) and (group, name) not in pending:
+                        continue
+                    current = live_keys.setdefault(name, set())
+                    saved = saved if saved is not None else frozenset()
+                    # only the percepts that differ are reindexed, equal ones keep their stored object
+                    removed, added = current - saved, saved - current
+                    for percept in removed:
+                        self._index_remove(percept)
+                    current -= removed
+                    current |= added
+                    for percept in added:
+                        self._index_add(percept)
+                    if name not in saved_keys:
+                        del live_keys[name]
+                    touched.append((group, name))
+            self._states = dict(snapshot.states)
+            self._state_percepts = dict(snapshot.state_percepts)
+            # published from the live sets, as their equal percepts may be other objects
+            # than the saved ones and the indexes only know the live objects
+            self._commit(touched)
+            if batch is not None:
+                batch.changed += len(touched)
+        if self.show_exec:
+            self.print(f'Restoring {len(touched)} percept names')
+        if batch is None and touched:
+            extras = self.env_info
+            extras.update({"names": sorted({name for _, name in touched})})
+            self.logger.info('Restoring Percepts', extra=extras)
+    
+    def fork(self) -> 'Environment':
+        """
+        A scratch copy of the environment to simulate on
+
+        The copy starts with the same percepts, indexes, subscriptions and
+        connected agents, but is not registered: agents call its methods
+        directly and never perceive it, nothing done to it reaches the
+        original. It neither prints nor logs. Attributes of subclasses are
+        copied shallowly, an ``on_fork(original)`` method, when defined,
+        runs on the copy to duplicate the mutable ones. Rollouts are cheapest
+        with one fork and a snapshot/restore per rollout.
+
+        Returns
+        -------
+            Environment: The scratch copy.
+        """
+        with self._write_lock:
+            scratch = copy(self)
+            percepts = self._current()
+            scratch.lock = Lock()
+            scratch._write_lock = RLock()
+            scratch._batch = None
+            scratch._action_queue = None
+            scratch._queue_cond = Condition()
+            scratch._worker = None
+            scratch._queued_methods = set()
+            scratch.perceiving_agents = 0
+            scratch.printing = False
+            scratch.show_exec = False
+            scratch.logger = getLogger("maspy.fork")
+            scratch.logger.disabled = True
+            scratch.agent_list = manual_deepcopy(self.agent_list)
+            scratch._agents = dict(self._agents)
+            scratch._percepts = {
+                group: {name: set(percept_set) for name, percept_set in group_keys.items()}
+                for group, group_keys in percepts.items()
+            }
+            scratch._snapshot = percepts
+            scratch._percept_versions = dict(self._percept_versions)
+            scratch._name_index = dict()
+            scratch._arg_indexes = {name: {position: dict() for position in indexes} for name, indexes in self._arg_indexes.items()}
+            scratch._spatial = {name: (GridIndex(grid.cell_size), coords) for name, (grid, coords) in self._spatial.items()}
+            for group_keys in scratch._percepts.values():
+                for percept_set in group_keys.values():
+                    for percept in percept_set:
+                        scratch._index_add(percept)
+            scratch._scopes = dict(self._scopes)
+            scratch._class_scopes = dict(self._class_scopes)
+            scratch.possible_starts = self.possible_starts.copy() if isinstance(self.possible_starts, dict) else self.possible_starts
+            scratch._states = dict(self._states)
+            scratch._state_percepts = dict(self._state_percepts)
+        if hasattr(scratch, 'on_fork'):
+            getattr(scratch, 'on_fork')(self)
+        return scratch
+    
+    def queue_actions(self, enabled: bool = True, worker: bool = True, methods: Iterable[str] = ()):
+        """
+        Makes the agents enqueue their calls to this environment's actions instead of running them
+
+        Only the methods decorated with ``@action`` and those named in
+        ``methods`` are queued, any other method, e.g. one that queries the
+        environment, still runs at once and returns its result.
+
+        A queued call returns a concurrent.futures.Future right away. The
+        calls are applied in order, all that are waiting inside one batch,
+        by a worker thread of the environment or, without it, by
+        apply_actions, which the Admin calls at the end of every
+        synchronous tick. Waiting on the result of a call queued in the
+        same tick, or inside a batch, raises a RuntimeError.
+
+        Parameters
+        ----------
+            enabled : bool
+                Turns the queue on or, applying what is left, off.
+            worker : bool
+                Starts a thread that applies calls as soon as they arrive.
+            methods : iterable of str
+                Names of methods to queue besides the actions.
+        """
+        if not enabled:
+            # taken in the same hold that turns the queue off, so no call is left behind
+            with self._queue_cond:
+                queue, self._action_queue = self._action_queue, None
+                self._queued_methods = set()
+                self._queue_cond.notify_all()
+            if queue:
+                self._apply(list(queue))
+            return
+        with self._queue_cond:
+            self._queued_methods = {action.func.__name__ for action in self._actions} | set(methods)
+            if self._action_queue is None:
+                self._action_queue = deque()
+            if worker and self._worker is None:
+                self._worker = Thread(target=self._work, name=f"{self._name} actions", daemon=True)
+                self._worker.start()
+    
+    def enqueue(self, method: Callable, args: tuple = (), kwargs: Dict[str, Any] | None = None) -> Future:
+        """Queues a call of one of this environment's methods, it runs at once when queue_actions is off"""
+        future = QueuedCall(self)
+        with self._queue_cond:
+            queue = self._action_queue
+            if queue is not None:
+                queue.append((method, args, kwargs or {}, future))
+                self._queue_cond.notify()
+                return future
+        self._run_action(method, args, kwargs or {}, future)
+        return future
+    
+    def apply_actions(self) -> int:
+        """Applies the queued calls in a single batch, returns how many were taken"""
+        with self._queue_cond:
+            queue = self._action_queue
+            if not queue:
+                return 0
+            actions = list(queue)
+            queue.clear()
+        self._apply(actions)
+        return len(actions)
+
+    def _apply(self, actions: List[tuple[Callable, tuple, dict, Future]]) -> None:
+        with self.batch():
+            for method, args, kwargs, future in actions:
+                self._run_action(method, args, kwargs, future)
+    
+    def _run_action(self, method: Callable, args: tuple, kwargs: Dict[str, Any], future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(method(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+    
+    def _work(self) -> None:
+        while True:
+            with self._queue_cond:
+                self._queue_cond.wait_for(lambda: self._action_queue is None or len(self._action_queue) > 0)
+                if self._action_queue is None:
+                    # cleared in the same hold, so turning the queue back on starts a new worker
+                    self._worker = None
+                    return
+            self.apply_actions()
+    
+    def index_percept(self, name: str, *positions: int):
+        """
+        Indexes the percepts of a name by the value of some arguments
+
+        ``index_percept("spot", 0, 1)`` makes ``get(Percept("spot", (3, Any)))``
+        and ``get(Percept("spot", (Any, [agt])))`` look only at the spots
+        with that value instead of every spot.
+
+        Parameters
+        ----------
+            name : str
+                The name of the percepts to index.
+            positions : int
+                Argument positions to index, starting at 0.
+        """
+        with self._write_lock:
+            indexes = self._arg_indexes.setdefault(name, dict())
+            for position in positions:
+                if position in indexes:
+                    continue
+                buckets: Dict[Any, Dict[int, Percept]] = dict()
+                indexes[position] = buckets
+                for percept in self._name_index.get(name, {}).values():
+                    if position < len(percept._values):
+                        buckets.setdefault(_index_key(percept._values[position]), dict())[id(percept)] = percept
+    
+    def spatial_index(self, name: str, coords: int | Sequence[int] | None = None, cell_size: float = 1.0):
+        """
+        Indexes the percepts of a name by position, for near, in_rect and local_view
+
+        Parameters
+        ----------
+            name : str
+                The name of the percepts to index.
+            coords : int, sequence of ints or None
+                Where the position is in the percept arguments: the
+                argument at that index (``Percept("dirt", ((2, 3), True))``
+                with 0), the arguments at those indexes, or all of them by
+                default (``Percept("robot", (2, 3))``). Percepts without a
+                numeric position are left out of the index.
+            cell_size : float
+                Side of the grid cells, around the usual query radius.
+        """
+        with self._write_lock:
+            grid = GridIndex(cell_size)
+            self._spatial[name] = (grid, coords)
+            for percept in self._name_index.get(name, {}).values():
+                position = self._percept_position(percept, coords)
+                if position is not None:
+                    grid.insert(percept, position)
+    
+    def _percept_position(self, percept: Percept, coords: int | Sequence[int] | None) -> Coordinates | None:
+        values = percept._values
+        try:
+            if coords is None:
+                return as_coordinates(values)
+            if isinstance(coords, int):
+                return as_coordinates(values[coords])
+            return as_coordinates(tuple(values[i] for i in coords))
+        except IndexError:
+            return None
+    
+    def near(self, name: str, center: Sequence[float], radius: float) -> List[Percept]:
+        """Percepts of a spatially indexed name within ``radius`` of ``center``"""
+        assert name in self._spatial, f"{name} has no spatial index, see spatial_index()"
+        return self._spatial[name][0].near(center, radius)
+    
+    def in_rect(self, name: str, low: Sequence[float], high: Sequence[float]) -> List[Percept]:
+        """Percepts of a spatially indexed name inside the box from ``low`` to ``high``"""
+        assert name in self._spatial, f"{name} has no spatial index, see spatial_index()"
+        return self._spatial[name][0].in_rect(low, high)
+    
+    def local_view(self, radius: float | None, locate: Callable[[str], Any] | None = None, names: Iterable[str] | None = None):
+        """
+        Makes agents perceive only the spatially indexed percepts around them
+
+        Parameters
+        ----------
+            radius : float or None
+                How far agents see, None turns the local view off.
+            locate : callable
+                ``locate(agent_name)`` returns the position of an agent, or
+                None for an agent that sees everything.
+            names : iterable of str, optional
+                The indexed names to restrict, all of them by default.
+        """
+        if radius is None:
+            self._view = None
+            return
+        assert locate is not None, "local_view needs a locate function"
+        self._view = (radius, locate, None if names is None else set(names))
+    
+    def _index_add(self, percept: Percept) -> None:
+        self._name_index.setdefault(percept.name, dict())[id(percept)] = percept
+        for position, buckets in self._arg_indexes.get(percept.name, {}).items():
+            if position < len(percept._values):
+                buckets.setdefault(_index_key(percept._values[position]), dict())[id(percept)] = percept
+        spatial = self._spatial.get(percept.name)
+        if spatial is not None:
+            coordinates = self._percept_position(percept, spatial[1])
+            if coordinates is not None:
+                spatial[0].insert(percept, coordinates)
+    
+    def _index_remove(self, percept: Percept) -> None:
+        stored = self._name_index.get(percept.name)
+        if stored is not None:
+            stored.pop(id(percept), None)
+            if not stored:
+                del self._name_index[percept.name]
+        for position, buckets in self._arg_indexes.get(percept.name, {}).items():
+            if position < len(percept._values):
+                key = _index_key(percept._values[position])
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    bucket.pop(id(percept), None)
+                    if not bucket:
+                        del buckets[key]
+        spatial = self._spatial.get(percept.name)
+        if spatial is not None:
+            spatial[0].remove(percept)
+    
+    def _candidates(self, percept: Percept, ck_values: bool) -> tuple:
+        """The stored percepts that can match, narrowed by the argument indexes when values are checked"""
+        candidates = self._name_index.get(percept.name)
+        if not candidates:
+            return ()
+        indexes = self._arg_indexes.get(percept.name)
+        if ck_values and indexes:
+            for position, buckets in indexes.items():
+                if position >= len(percept._values) or percept._values[position] is Any or Any in buckets or _UNINDEXED in buckets:
+                    continue
+                key = _index_key(percept._values[position])
+                if key is _UNINDEXED:
+                    continue
+                bucket = buckets.get(key)
+                if not bucket:
+                    return ()
+                if len(bucket) < len(candidates):
+                    candidates = bucket
+        return tuple(candidates.values())
+    
+    def _stored(self, percept: Percept) -> Percept | None:
+        for candidate in self._candidates(percept, True):
+            if candidate is percept or candidate == percept:
+                return candidate
+        return None
+    
+    def subscribe(self, agent: Union[str, type, 'Agent'], groups: Iterable[str] | str | None):
+        """
+        Limits the percept groups an agent, or every agent of a class, perceives
+
+        Parameters
+        ----------
+            agent : str, Agent or Agent class
+                An agent name (e.g. "Driver_2"), an agent, or a class
+                whose agents all share the subscription.
+            groups : iterable of str, str or None
+                The groups to perceive, None removes the subscription.
+        """
+        if isinstance(agent, type):
+            scopes, key = self._class_scopes, agent.__name__
+        else:
+            scopes, key = self._scopes, agent if isinstance(agent, str) else agent.my_name
+        if groups is None:
+            scopes.pop(key, None)
+        else:
+            scopes[key] = {groups} if isinstance(groups, str) else set(groups)
+    
+    def _scope(self, agent_name: str, percept_filter: Dict[str, Set[str]] | None) -> Set[str] | None:
+        """The groups an agent perceives, None for all of them"""
+        scope = self._scopes.get(agent_name)
+        if scope is None and self._class_scopes:
+            agent = self._agents.get(agent_name)
+            if agent is not None:
+                scope = self._class_scopes.get(type(agent).__name__)
+        if percept_filter:
+            # the agent's own filter, so ignored groups are never copied
+            if percept_filter.get("focus"):
+                scope = percept_filter["focus"] if scope is None else scope & percept_filter["focus"]
+            elif percept_filter.get("ignore"):
+                scope = (scope if scope is not None else set(self._snapshot)) - percept_filter["ignore"]
+        return scope
+    
+    def _perception(self, agent_name: str | None = None, percept_filter: Dict[str, Set[str]] | None = None) -> Dict[str, Dict[str, Set[Percept]]]:
         with self.lock:
             self.perceiving_agents += 1
-        percepts = manual_deepcopy(self._percepts)
-        with self.lock:
-            self.perceiving_agents -= 1
+        try:
+            if agent_name is not None and hasattr(self, 'perceive_for'):
+                # the hook reads the live percepts, so no mutation may run meanwhile
+                with self._write_lock:
+                    chosen = getattr(self, 'perceive_for')(agent_name)
+                if chosen is not None:
+                    return self._clean(list(chosen), set_source=False)
+            snapshot = self._snapshot
+            scope = None if agent_name is None else self._scope(agent_name, percept_filter)
+            if scope is None:
+                percepts = manual_deepcopy(snapshot)
+            else:
+                percepts = {
+                    group: {key: set(percept_set) for key, percept_set in group_keys.items()}
+                    for group, group_keys in snapshot.items() if group in scope
+                }
+            if agent_name is not None and self._view is not None:
+                with self._write_lock:
+                    self._restrict_view(percepts, agent_name)
+        finally:
+            with self.lock:
+                self.perceiving_agents -= 1
         return percepts
+    
+    def _restrict_view(self, percepts: Dict[str, Dict[str, Set[Percept]]], agent_name: str) -> None:
+        assert self._view is not None
+        radius, locate, names = self._view
+        center = locate(agent_name)
+        if center is None:
+            return
+        center = as_coordinates(center)
+        for name, (grid, _) in self._spatial.items():
+            if names is not None and name not in names:
+                continue
+            visible = {id(percept) for percept in grid.near(center, radius)}
+            for group_keys in percepts.values():
+                if name in group_keys:
+                    # percepts without a position stay visible
+                    group_keys[name] = {p for p in group_keys[name] if id(p) in visible or p not in grid}
 
     @property
     def print_percepts(self):
@@ -221,10 +833,11 @@ class Environment(metaclass=EnvironmentMultiton):
         Prints all the environment's current percepts
         """
         percepts = ""
-        for group_keys in self._percepts.values():
-            for percept_set in group_keys.values():
-                for percept in percept_set:
-                    percepts += f"\n\t{percept}"
+        with self._write_lock:
+            for group_keys in self._percepts.values():
+                for percept_set in group_keys.values():
+                    for percept in percept_set:
+                        percepts += f"\n\t{percept}"
         self.print(f"{percepts}\r")
         
     @property
@@ -239,7 +852,7 @@ class Environment(metaclass=EnvironmentMultiton):
         return {
             "class_name": "Environment",
             "my_name": self.my_name,
-            "percepts": [percept for percept in [percept_set for percept_set in self._percepts.values()]],
+            "percepts": [percept for percept in [percept_set for percept_set in self._snapshot.values()]],
             "connected_agents": list(self._agents.keys())
         }
         
@@ -308,19 +921,29 @@ class Environment(metaclass=EnvironmentMultiton):
                 The one or multiple Percepts to be added to the environment.
         """
         percept_dict = self._clean(percept)
-        with self.lock:
-            aux_percepts = manual_deepcopy(self._percepts)
-        merge_dicts(percept_dict, aux_percepts)
-        with self.lock:
-            self._percepts = aux_percepts
-        
-        if isinstance(percept, list):
-            for prcpt in percept:
-                if prcpt.group in Group:
-                    self._add_state(prcpt)
-        elif percept.group in Group._member_names_:
-            self._add_state(percept)    
+        with self._write_lock:
+            # an equal percept already stored is kept by the merge, so only new ones are indexed
+            added = [
+                prcpt for group, group_keys in percept_dict.items() for name, percept_set in group_keys.items()
+                for prcpt in percept_set if prcpt not in self._percepts.get(group, {}).get(name, ())
+            ]
+            # agents perceive the snapshot, so the working percepts are merged in place
+            merge_dicts(percept_dict, self._percepts)
+            for prcpt in added:
+                self._index_add(prcpt)
+            
+            if isinstance(percept, list):
+                for prcpt in percept:
+                    if prcpt.group in Group:
+                        self._add_state(prcpt)
+            elif percept.group in Group._member_names_:
+                self._add_state(percept)    
+            batch = self._commit((group, name) for group, group_keys in percept_dict.items() for name in group_keys)
         
+        if batch is not None:
+            batch.created += len(percept) if isinstance(percept, list) else 1
+            self.print(f'Creating {percept}') if self.show_exec else ...
+            return
         action, agt = self._check_caller()
         extras = self.env_info
         extras.update({"percept(s)": str(percept), "action":action, "agent": agt})
@@ -334,20 +957,14 @@ class Environment(metaclass=EnvironmentMultiton):
         self._state_percepts[percept.name] = percept
         match percept.group:
             case "listed":
-                states = percept.values
+                states = ListedSpace(percept.values) if isinstance(percept.values, Sequence) else percept.values
             case "combination":
                 if percept.values_len == 2 and isinstance(percept.values[0], Sequence) and isinstance(percept.values[1], int):
-                    comb = list(combinations(percept.values[0], percept.values[1]))
+                    states = CombinationSpace(percept.values[0], (percept.values[1],))
                 else:
-                    comb = []
-                    for i in range(1, len(percept.values) + 1):
-                        comb.extend(combinations(percept.values, i))
-                states = comb
+                    states = CombinationSpace(percept.values, range(1, len(percept.values) + 1))
             case "permutation":
-                perm: list = []
-                for i in range(1, len(percept.values) + 1):
-                    perm.extend(permutations(percept.values, i))
-                states = perm
+                states = PermutationSpace(percept.values, range(1, len(percept.values) + 1))
             case "cartesian":
                 ranges: list = []
                 for arg in percept._values:
@@ -359,10 +976,9 @@ class Environment(metaclass=EnvironmentMultiton):
                         ranges.append(range(arg))
                     else:
                         self.logger.warning(f'{arg}:{type(arg)} is not a valid type',extra=self.env_info)
-                cart = list(product(*ranges))
-                states = cart
+                states = CartesianSpace(ranges)
         if percept.name in self._states:
-            self._states[percept.name] += states
+            self._states[percept.name] = self._states[percept.name] + states
         else: 
             self._states[percept.name] = states
                         
@@ -389,17 +1005,19 @@ class Environment(metaclass=EnvironmentMultiton):
         """
         found_data = []
         ## self.logger.debug(f'Getting percept like: {percept}', extra=self.env_info)
-        for group_keys in self._percepts.values():
-            for percept_set in group_keys.values():
-                for prcpt in percept_set:
-                    if self._compare_data(prcpt,percept,ck_group,ck_values):
-                        if not all:
-                            return prcpt
-                        else:
-                            found_data.append(prcpt)
+        with self._write_lock:
+            candidates = self._candidates(percept, ck_values)
+        for prcpt in candidates:
+            if self._compare_data(prcpt,percept,ck_group,ck_values):
+                if not all:
+                    return prcpt
+                else:
+                    found_data.append(prcpt)
         if found_data:
             return found_data  
         else:
+            if not self.printing:
+                return None
             current_frame = inspect.currentframe()
             assert current_frame is not None
             caller_frame = current_frame.f_back
@@ -411,58 +1029,81 @@ class Environment(metaclass=EnvironmentMultiton):
             return None
                     
     def _compare_data(self, data1: Percept, data2: Percept, ck_group:bool,ck_args:bool) -> bool:
-        self.print(f"Comparing: \n\t{data1} and {data2}") if self.show_exec else ...
+        show = self.show_exec and self.printing
+        self.print(f"Comparing: \n\t{data1} and {data2}") if show else ...
         if ck_group and data1.group != data2.group:
-            self.print("Failed at group") if self.show_exec else ...
+            self.print("Failed at group") if show else ...
             return False
         if data1.name != data2.name:
-            self.print("Failed at key") if self.show_exec else ...
+            self.print("Failed at key") if show else ...
             return False
         if not ck_args:
             return True
         if data1.values_len != data2.values_len:
-            self.print("Failed at args_len") if self.show_exec else ...
+            self.print("Failed at args_len") if show else ...
             return False
         for arg1,arg2 in zip(data1._values,data2._values):
             if arg1 is Any or arg2 is Any or arg1 == arg2:
                 continue
             else:
-                self.print(f"Failed at values {arg1} x {arg2}") if self.show_exec else ...
+                self.print(f"Failed at values {arg1} x {arg2}") if show else ...
                 return False
         else:
-            self.print("Data is Compatible") if self.show_exec else ...
+            self.print("Data is Compatible") if show else ...
             return True
     
-    def change(self, old_percept:Percept, new_values:tuple | Any):
+    def change(self, old_percept:Percept, new_values:tuple | Any) -> Percept:
         """
         Changes the values of a percept
 
+        The stored percept is replaced by a new one instead of being
+        mutated, so ``old_percept`` keeps its old values and no longer
+        matches the store. Keep the returned percept to change it again.
+
         Parameters
         ----------
             old_percept : Percept
                 The percept to be changed.
             new_values : (tuple | Any)
                 The new arguments for the old percept
+
+        Returns
+        -------
+            Percept: The stored percept with the new values.
         """
         if type(new_values) is not tuple: 
             new_values = (new_values,) 
-        if old_percept.values_len > 0:
-            percept = self.get(old_percept)
-        else:
-            percept = self.get(old_percept,ck_values=False)
-            
-        assert isinstance(percept, Percept)
-        aux_percept = percept.values
-        with self.lock:
-            if isinstance(percept, Percept):
-                percept._values = new_values
+        with self._write_lock:
+            if old_percept.values_len > 0:
+                stored = self.get(old_percept)
+            else:
+                stored = self.get(old_percept,ck_values=False)
                 
-        assert isinstance(percept, Percept)        
-        if percept.name in self._state_percepts:
-            del self._state_percepts[percept.name]
-            del self._states[percept.name]     
-        if percept.group in Group._member_names_:
-            self._add_state(percept)
+            assert isinstance(stored, Percept)
+            aux_percept = stored.values
+            # copy on write: the stored percept is replaced, never mutated, so
+            # snapshots and percepts already handed to agents keep their values
+            percept = Percept(stored.name, new_values, stored._group, stored.adds_event, stored.source)
+            percept_set = self._percepts[stored.group][stored.name]
+            percept_set.discard(stored)
+            self._index_remove(stored)
+            if percept not in percept_set:
+                percept_set.add(percept)
+                self._index_add(percept)
+            else:
+                # an equal percept was already stored, that one is the handle
+                percept = self._stored(percept) or percept
+                    
+            if percept.name in self._state_percepts:
+                del self._state_percepts[percept.name]
+                del self._states[percept.name]     
+            if percept.group in Group._member_names_:
+                self._add_state(percept)
+            batch = self._commit(((percept.group, percept.name),))
+        if batch is not None:
+            batch.changed += 1
+            self.print(f"Changing Percept('{percept.name}', ('{aux_percept}',), '{percept.source}') to {percept}") if self.show_exec else ...
+            return percept
         action, agt = self._check_caller()
         extras = self.env_info
         info = {"old_percept": f"Percept('{percept.name}', ('{aux_percept}',), '{percept.source}')", "new_percept": str(percept), "action":action, "agent": agt}
@@ -470,11 +1111,14 @@ class Environment(metaclass=EnvironmentMultiton):
         if self.show_exec:
             self.print(f"Changing Percept('{percept.name}', ('{aux_percept}',), '{percept.source}') to {percept}")
         self.logger.info(f"Changing Percept", extra=extras)
+        return percept
             
     def _percept_exists(self, key, args, group=DEFAULT_GROUP) -> bool:
         if type(args) is not tuple: 
             args = (args,)
-        return Percept(key,args,group) in self._percepts[group][key]
+        # the live store, so writes of a running batch are seen like get() sees them
+        with self._write_lock:
+            return Percept(key,args,group) in self._percepts[group][key]
 
     def delete(self, percept: List[Percept] | Percept):
         """
@@ -485,14 +1129,29 @@ class Environment(metaclass=EnvironmentMultiton):
             percept : List of Percepts or Percept)
                 The one or multiple Percepts to be deleted from the environment
         """
-        self.print(self._check_caller())
+        batch = self._batch
+        self.print(self._check_caller()) if self.printing and batch is None else ...
         assert percept is not None, f'Percept given to be deleted is None'
         try:
-            if isinstance(percept, list):
-                for prcpt in percept:
-                    self._percepts[prcpt.group][prcpt.name].remove(prcpt)
-            else:
-                self._percepts[percept.group][percept.name].remove(percept)
+            with self._write_lock:
+                touched = set()
+                deleted = 0
+                try:
+                    for prcpt in percept if isinstance(percept, list) else [percept]:
+                        stored = self._stored(prcpt)
+                        self._percepts[prcpt.group][prcpt.name].remove(prcpt)
+                        if stored is not None:
+                            self._index_remove(stored)
+                        touched.add((prcpt.group, prcpt.name))
+                        deleted += 1
+                finally:
+                    # what was removed before a missing percept is still published
+                    batch = self._commit(touched)
+                    if batch is not None:
+                        batch.deleted += deleted
+            if batch is not None:
+                self.print(f'Deleting {percept}') if self.show_exec else ...
+                return
             action, agt = self._check_caller()
             extra = self.env_info
             extra.update({"percept(s)": str(percept), "action":action, "agent": agt})
@@ -502,17 +1161,20 @@ class Environment(metaclass=EnvironmentMultiton):
         except KeyError:
             self.logger.warning(f'{percept} doesnt exist, cannot be deleted',extra=self.env_info)
               
-    def _clean(self, percept_data: Iterable[Percept] | Percept) -> Dict[str, Dict[str, set]]:
+    def _clean(self, percept_data: Iterable[Percept] | Percept, set_source: bool = True) -> Dict[str, Dict[str, set]]:
         match percept_data:
             case None:
                 return dict()
             case Percept():
-                object.__setattr__(percept_data, "source", self.my_name)
+                if set_source:
+                    object.__setattr__(percept_data, "source", self.my_name)
                 return {percept_data.group : {percept_data.name: {percept_data}}}
             case Iterable():
                 percept_dict: Dict[str, Dict[str, set]] = dict()
                 for prc_dt in percept_data:
-                    object.__setattr__(prc_dt, "source", self.my_name)
+                    if set_source:
+                        object.__setattr__(prc_dt, "source", self.my_name)
+                    percept_dict.setdefault(prc_dt.group, dict())
                     if prc_dt.name in percept_dict[prc_dt.group]:
                         percept_dict[prc_dt.group][prc_dt.name].add(prc_dt)
                     else:
@@ -10,10 +10,26 @@
 #     Space, Box, Discrete, MultiDiscrete, MultiBinary, Tuple, Dict,
 # )
 
-from maspy.learning.modelling import (
-    EnvModel,qlearning, sarsa, sequence, combination, permutation, cartesian, listed
+from typing import TYPE_CHECKING
+
+from maspy.learning.groups import (
+    sequence, combination, permutation, cartesian, listed
 )
 
+if TYPE_CHECKING:
+    from maspy.learning.modelling import EnvModel, qlearning, sarsa
+
+# modelling pulls in numpy, so it is only imported on first access
+_MODELLING_NAMES = {"EnvModel", "qlearning", "sarsa"}
+
+def __getattr__(name: str):
+    if name in _MODELLING_NAMES:
+        from maspy.learning import modelling
+        value = getattr(modelling, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # register(
 #     id="taxi_ml",
 #     entry_point="maspy.learning.ex_taxi_ml:TaxiEnv",
@@ -0,0 +1,101 @@
+from typing import TYPE_CHECKING
+import numpy as np
+
+from maspy.learning.qtable import DenseQTable
+from maspy.learning.selection import ActionSelector
+
+if TYPE_CHECKING:
+    from maspy.learning.modelling import EnvModel
+
+class TransitionArrays:
+    """
+    The transition table P of an EnvModel as arrays indexed by (state, action, outcome)
+
+    States are the rows of the given DenseQTable. Pairs with fewer outcomes
+    than the widest one are padded, padded outcomes are never sampled.
+    """
+    def __init__(self, model: 'EnvModel', q_table: DenseQTable) -> None:
+        num_actions = model.num_actions
+        encoded = model._dense_transitions(q_table)
+        num_rows = len(q_table)
+        width = max((len(outcomes) for row in encoded for outcomes in row), default=1)
+
+        self.next_state = np.zeros((num_rows, num_actions, width), dtype=np.int64)
+        self.reward = np.zeros((num_rows, num_actions, width), dtype=np.float64)
+        self.done = np.zeros((num_rows, num_actions, width), dtype=bool)
+        self.cum_prob = np.full((num_rows, num_actions, width), np.inf)
+        self.num_outcomes = np.zeros((num_rows, num_actions), dtype=np.int64)
+        # rows reached only as next states have no transitions of their own
+        self.known = np.zeros(num_rows, dtype=bool)
+
+        for state, row in zip(model.states_list, encoded):
+            s = q_table.encode(state)
+            self.known[s] = True
+            for a, outcomes in enumerate(row):
+                self.num_outcomes[s, a] = len(outcomes)
+                cumulative = 0.0
+                for o, (p, next_state, reward, terminated) in enumerate(outcomes):
+                    cumulative += p
+                    self.next_state[s, a, o] = next_state
+                    self.reward[s, a, o] = reward
+                    self.done[s, a, o] = terminated
+                    self.cum_prob[s, a, o] = cumulative
+        self.width = width
+
+    def sample(self, states: np.ndarray, actions: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Samples one outcome per (state, action) pair, returns next states, rewards and done flags"""
+        if self.width == 1:
+            outcome = np.zeros(len(states), dtype=np.int64)
+        else:
+            cum_prob = self.cum_prob[states, actions]
+            outcome = np.argmax(cum_prob > rng.random(len(states))[:, None], axis=1)
+            # like categorical_sample, falls back to the first outcome
+            outcome[outcome >= self.num_outcomes[states, actions]] = 0
+        return (
+            self.next_state[states, actions, outcome],
+            self.reward[states, actions, outcome],
+            self.done[states, actions, outcome],
+        )
+
+def learn_batch(model: 'EnvModel', q_table: DenseQTable, num_envs: int, num_episodes: int, max_steps: int | None, rng: np.random.Generator) -> None:
+    """
+    Q-learning over ``num_envs`` episodes advanced in lock-step
+
+    Every iteration picks an epsilon-greedy action for each environment,
+    samples all transitions at once and applies the updates with a
+    scatter-add, so environments in the same state and action all count.
+    Finished episodes are restarted until ``num_episodes`` have ended.
+    """
+    arrays = TransitionArrays(model, q_table)
+    values = q_table.values
+    starts = np.array([q_table.encode(state) for state in model.initial_state_distrib], dtype=np.int64)
+    selector = ActionSelector(model.num_actions, rng)
+
+    states = starts[rng.integers(len(starts), size=num_envs)]
+    steps = np.zeros(num_envs, dtype=np.int64)
+    finished = 0
+    while finished < num_episodes:
+        actions = selector.batch_epsilon_greedy(values[states], model.epsilon)
+        next_states, rewards, dones = arrays.sample(states, actions, rng)
+
+        temp_diff = rewards + model.discount_factor * ~dones * values[next_states].max(axis=1) - values[states, actions]
+        np.add.at(values, (states, actions), model.learning_rate * temp_diff)
+        model.metrics.record_td(temp_diff.mean())
+
+        steps += 1
+        ended = dones | (steps >= max_steps) if max_steps else dones
+        live = ~ended
+        if not arrays.known[next_states[live]].all():
+            unknown = next_states[live][~arrays.known[next_states[live]]][0]
+            raise KeyError(f"No transitions for state {q_table.states[unknown]}")
+
+        for env in np.flatnonzero(ended):
+            if dones[env]:
+                model.terminated_states.add(q_table.states[next_states[env]])
+            model._end_episode(int(steps[env]))
+            finished += 1
+            if finished >= num_episodes:
+                break
+        states = np.where(ended, starts[rng.integers(len(starts), size=num_envs)], next_states)
+        steps[ended] = 0
+    model.curr_state = q_table.states[states[0]]
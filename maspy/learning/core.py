@@ -1,8 +1,11 @@
-from typing import Any, Generic, Tuple, TypeVar, SupportsFloat
+from typing import Any, Dict, Generic, Hashable, Iterable, List, Sequence, Tuple, TypeVar, SupportsFloat
+from collections import deque
 import numpy as np
 
 from maspy.learning.space import Space, Discrete
-from maspy.learning.ml_utils import utl_np_random, categorical_sample
+from maspy.learning.ml_utils import utl_np_random
+from maspy.learning.selection import cumulative_probabilities, sample_outcome
+from maspy.learning.statespace import StateSpace
 
 ObsType = TypeVar("ObsType")
 ActType = TypeVar("ActType")
@@ -12,6 +15,7 @@ class HashableWrapper:
         self.original = obj
         self.original_type = type(obj)
         self.hashable = self._make_hashable(obj)
+        self._hash = hash(self.hashable)
 
     def _make_hashable(self, obj):
         if isinstance(obj, dict):
@@ -27,10 +31,17 @@ class HashableWrapper:
             return obj  # Already hashable
     
     def __hash__(self):
-        return hash(self.hashable)
+        return self._hash
     
     def __eq__(self, other):
-        return isinstance(other, HashableWrapper) and self.hashable == other.hashable
+        if self is other:
+            return True
+        return isinstance(other, HashableWrapper) and self._hash == other._hash and self.hashable == other.hashable
+    
+    def __setstate__(self, state):
+        # string hashes differ between processes, so the cached hash is never unpickled
+        self.__dict__.update(state)
+        self._hash = hash(self.hashable)
     
     def __iter__(self):
         return iter(self.hashable)
@@ -39,23 +50,100 @@ class HashableWrapper:
         return f"*{self.original}"
 
 
+class StateId(int):
+    """An id handed out by a StateInterner, told apart from int-valued states"""
+    __slots__ = ()
+
+
+class StateInterner:
+    """
+    Gives every distinct state a small int id, in order of first sight
+
+    Each state is made hashable once, later lookups of the same state,
+    raw or wrapped, are a single dict access. ``states[id]`` holds one
+    canonical HashableWrapper per state, so interned wrappers compare by
+    identity. Ids are StateId instances, a plain int is a state like any
+    other.
+    """
+    def __init__(self, states: Iterable[Any] = ()) -> None:
+        self.ids: Dict[Hashable, StateId] = {}
+        self.states: List[HashableWrapper] = []
+        for state in states:
+            self.encode(state)
+
+    def encode(self, state: Any) -> StateId:
+        """Returns the id of a state (raw, wrapped or already a StateId), interning it if new"""
+        if isinstance(state, HashableWrapper):
+            key = state.hashable
+        elif isinstance(state, StateId):
+            return state
+        else:
+            key = state
+        try:
+            return self.ids[key]
+        except (KeyError, TypeError):
+            # unhashable states (dicts, sets, 1-item lists) need the recursive conversion
+            pass
+        wrapped = state if isinstance(state, HashableWrapper) else HashableWrapper(state)
+        state_id = self.ids.get(wrapped.hashable)
+        if state_id is None:
+            state_id = self.ids[wrapped.hashable] = StateId(len(self.states))
+            self.states.append(wrapped)
+        return state_id
+
+    def decode(self, state_id: int) -> HashableWrapper:
+        return self.states[state_id]
+
+    def wrap(self, state: Any) -> HashableWrapper:
+        """The canonical wrapper of a state"""
+        return self.states[self.encode(state)]
+
+    def __contains__(self, state: Any) -> bool:
+        if isinstance(state, StateId):
+            return 0 <= state < len(self.states)
+        key = state.hashable if isinstance(state, HashableWrapper) else state
+        try:
+            return key in self.ids
+        except TypeError:
+            return HashableWrapper(state).hashable in self.ids
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+
+def random_start(starts: Sequence, rng: np.random.Generator) -> Any:
+    """
+    A uniformly drawn item of the starts
+
+    A StateSpace is drawn from by its exact ``size``, so spaces too large
+    for ``len`` or an int64 take a rejection sampled index of random bits.
+    """
+    size = starts.size if isinstance(starts, StateSpace) else len(starts)
+    if size <= np.iinfo(np.int64).max:
+        return starts[int(rng.integers(size))]
+    bits = size.bit_length()
+    while True:
+        index = int.from_bytes(rng.bytes((bits + 7) // 8), "big") >> (-bits % 8)
+        if index < size:
+            return starts[index]
+
 class Model(Generic[ObsType, ActType]):
     
     action_space: Space[ActType]
     observation_space: Space[ObsType]
-    initial_state_distrib: list[HashableWrapper]
+    initial_state_distrib: Sequence[HashableWrapper]
     P: dict[HashableWrapper, dict[ActType, list[tuple]]]
+    P_cum: dict[tuple, np.ndarray]
     curr_state: HashableWrapper
     last_action: ActType | None
-    states_buffer: list[str]
+    states_buffer: deque[tuple]
     
     _np_random: np.random.Generator | None = None
     _np_random_seed: int | None = None
 
     def look(self, action: ActType) -> Tuple[tuple, SupportsFloat, bool, bool, dict[str, Any]]:
         transitions = self.P[self.curr_state][action]
-        i = categorical_sample([t[0] for t in transitions], self.np_random)
-        p, s, r, t = transitions[i]
+        p, s, r, t = self._pick_transition(self.curr_state, action, transitions)
         return s, r, t, False, {"prob": p}#, "action_mask": self.action_mask(s)})
 
     def step(self, action: ActType) -> Tuple[HashableWrapper, SupportsFloat, bool, bool, dict[str, Any]]:
@@ -64,11 +152,9 @@ class Model(Generic[ObsType, ActType]):
             #print(f'\n## Transitions > {self.curr_state} : {action} [{self.P[self.curr_state]}] = {transitions}')
         except KeyError:
             print(f'\n## Key Error > {self.curr_state} : {action}')
-            for buff in self.states_buffer:
-                print(buff)
+            self._print_states_buffer()
             raise KeyError
-        i = categorical_sample([t[0] for t in transitions], self.np_random)
-        p, s, r, t = transitions[i]
+        p, s, r, t = self._pick_transition(self.curr_state, action, transitions)
         self.curr_state = s
         #print("Core Step", self.curr_state)
         self.last_action = action
@@ -79,7 +165,7 @@ class Model(Generic[ObsType, ActType]):
         if seed is not None:
             self._np_random, self._np_random_seed = utl_np_random(seed)
         
-        self.curr_state = self.initial_state_distrib[np.random.randint(0, len(self.initial_state_distrib))] 
+        self.curr_state = random_start(self.initial_state_distrib, self.np_random)
         #print("Core Reset", self.curr_state)
         self.last_action = None
         assert self.curr_state is not None, "State cannot be None after reset"
@@ -93,6 +179,18 @@ class Model(Generic[ObsType, ActType]):
         
         return self.curr_state, {"prob": 1.0}#, "action_mask": self.action_mask(self.s)}
     
+    def _pick_transition(self, state: HashableWrapper, action: ActType, transitions: list[tuple]) -> tuple:
+        if len(transitions) == 1:
+            return transitions[0]
+        cumulative = self.P_cum.get((state, action))
+        if cumulative is None:
+            cumulative = cumulative_probabilities(transitions)
+        return transitions[sample_outcome(cumulative, self.np_random)]
+    
+    def _print_states_buffer(self, indent: str = '') -> None:
+        for old_state, action, next_state, reward, terminated in self.states_buffer:
+            print(f"{indent}In State <{old_state}> | Make Action <{action}> | Move to State: {next_state} | Reward {reward} / {terminated}")
+    
     @property
     def np_random_seed(self) -> int:
         if self._np_random_seed is None:
@@ -0,0 +1,9 @@
+from enum import Enum
+
+Group = Enum('sequence | combination | permutation | cartesian | listed', ['sequence', 'combination', 'permutation', 'cartesian', 'listed']) # type: ignore[misc]
+
+sequence = Group.sequence
+combination = Group.combination
+permutation = Group.permutation
+cartesian = Group.cartesian
+listed = Group.listed
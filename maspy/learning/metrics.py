@@ -0,0 +1,146 @@
+from typing import Any, Callable, Dict, Iterator, TextIO
+from time import monotonic
+import numpy as np
+import math
+import sys
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream, in constant memory (Welford)"""
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def as_dict(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+class RingBuffer:
+    """The last ``size`` values of a stream in a preallocated array"""
+    def __init__(self, size: int, dtype: Any = np.float64) -> None:
+        assert size > 0, "RingBuffer size must be positive"
+        self.size = size
+        self._data = np.zeros(size, dtype=dtype)
+        self._next = 0
+        self._full = False
+
+    def append(self, value: float) -> None:
+        self._data[self._next] = value
+        self._next += 1
+        if self._next == self.size:
+            self._next = 0
+            self._full = True
+
+    def values(self) -> np.ndarray:
+        """The kept values, oldest first"""
+        if not self._full:
+            return self._data[:self._next].copy()
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def mean(self) -> float:
+        count = len(self)
+        return float(self._data[:count].mean()) if count else 0.0
+
+    def __len__(self) -> int:
+        return self.size if self._full else self._next
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values())
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        values = self.values()
+        return values if dtype is None else values.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.values().tolist()})"
+
+class TrainingMetrics:
+    """
+    Streaming telemetry of a training run
+
+    Temporal differences and episode lengths are folded into running
+    statistics, only the last ``window`` of each is kept for windowed
+    aggregates.
+    """
+    def __init__(self, window: int = 1000) -> None:
+        self.window = window
+        self.td_error = RunningStats()
+        self.steps = RunningStats()
+        self.total_steps = 0
+        self.recent_td = RingBuffer(window)
+        self.recent_steps = RingBuffer(window, dtype=np.int64)
+
+    def record_td(self, td: float) -> None:
+        td = float(td)
+        self.td_error.push(td)
+        self.recent_td.append(td)
+
+    def record_episode(self, steps: int) -> None:
+        self.steps.push(steps)
+        self.total_steps += steps
+        self.recent_steps.append(steps)
+
+    @property
+    def episodes(self) -> int:
+        return self.steps.count
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "episodes": self.episodes,
+            "steps": self.total_steps,
+            "td_error": self.td_error.as_dict(),
+            "episode_steps": self.steps.as_dict(),
+            "recent_td_mean": self.recent_td.mean(),
+            "recent_steps_mean": self.recent_steps.mean(),
+        }
+
+# Called as callback(episode, metrics) every callback_every episodes
+Metrics_Callback = Callable[[int, TrainingMetrics], Any]
+
+class ProgressReporter:
+    """A progress bar redrawn at most once per ``interval`` seconds"""
+    def __init__(self, total: int, prefix: str = '', length: int = 50, interval: float = 0.2, stream: TextIO | None = None) -> None:
+        self.total = total
+        self.prefix = prefix
+        self.length = length
+        self.interval = interval
+        self.stream = stream
+        self._last = -math.inf
+
+    def update(self, done: int, info: str | Callable[[], str] = '') -> None:
+        now = monotonic()
+        if now - self._last < self.interval and done < self.total:
+            return
+        self._last = now
+        if callable(info):
+            info = info()
+        percent = done / self.total if self.total else 1.0
+        filled = int(self.length * percent)
+        bar = '█' * filled + '-' * (self.length - filled)
+        stream = self.stream or sys.stdout
+        stream.write(f'\r{self.prefix}: {done}/{self.total} {info}|{bar}| {percent:.0%}')
+        stream.flush()
+
+    def close(self) -> None:
+        (self.stream or sys.stdout).write('\n')
@@ -1,13 +1,18 @@
 from typing import TYPE_CHECKING, Any, Sequence, Optional
-from collections import defaultdict
-from maspy.learning.core import Model, HashableWrapper
+from collections import defaultdict, deque
+from maspy.learning.core import Model, HashableWrapper, StateInterner, random_start
 from maspy.learning.space import Discrete
-from maspy.learning.ml_utils import monte_carlo_selection
+from maspy.learning.selection import ActionSelector, cumulative_probabilities, sample_outcome
+from maspy.learning.qtable import DenseQTable, Q_BACKENDS
+from maspy.learning.transitions import LazyTransitions
+from maspy.learning.metrics import TrainingMetrics, ProgressReporter, Metrics_Callback
+from maspy.learning.serving import PolicyCache
+from maspy.learning.statespace import StateSpace, CartesianSpace, InternedSpace
 from enum import Enum
+from functools import partial
 from itertools import product, combinations, permutations
 import numpy as np
 import pickle
-import sys
 
 if TYPE_CHECKING:
     from maspy.agent import Agent
@@ -18,16 +23,20 @@ Learn_Method = Enum('qlearning | sarsa', ['qlearning', 'sarsa']) # type: ignore[
 qlearning = Learn_Method.qlearning
 sarsa = Learn_Method.sarsa
 
-Group = Enum('sequence | combination | permutation | cartesian | listed', ['sequence', 'combination', 'permutation', 'cartesian', 'listed']) # type: ignore[misc]
-
-sequence = Group.sequence
-combination = Group.combination
-permutation = Group.permutation
-cartesian = Group.cartesian
-listed = Group.listed
-
 class EnvModel(Model):
-    def __init__(self, env: 'Environment', agent: Optional['Agent'] = None) -> None:
+    def __init__(self, env: 'Environment', agent: Optional['Agent'] = None, lazy: bool = False, cache_size: int | None = None) -> None:
+        """
+        Parameters
+        ----------
+            lazy : bool
+                Computes each P[state][action] on first use instead of
+                calling every transition up front. states_list is then
+                left empty and only reached states are materialized.
+                Ignored for "off-policy" environments, which have no P.
+            cache_size : int, optional
+                With lazy, the most states whose transitions are kept,
+                the least recently used are dropped and recomputed.
+        """
         super().__init__()
         self.name = f'Model_{env.my_name}' if agent is None else f'Model_{agent.my_name}_{env.my_name}'
         print(f'Creating {self.name}')
@@ -37,6 +46,7 @@ class EnvModel(Model):
         from maspy.environment import Action
         self.actions_list: list[HashableWrapper] = []
         self.actions_dict: dict[HashableWrapper, Action] = {}
+        self.action_index: dict[HashableWrapper, int] = {}
         self.orginize_actions(actions)
         self.off_policy = False
   
@@ -44,7 +54,9 @@ class EnvModel(Model):
         #print('States: ',value_lists)
         tuples_values: list = []
         for value in value_lists:
-            if isinstance(value, list): 
+            if isinstance(value, StateSpace):
+                tuples_values.append(value)
+            elif isinstance(value, list): 
                 if len(value_lists) == 1:
                     tuples_values = value_lists
                 else:
@@ -54,19 +66,32 @@ class EnvModel(Model):
             else:
                 tuples_values.append(value)
         #print('Tuples: ',tuples_values)
-        aux_list = list(product(*tuples_values))
+        self._state_keys = list(states.keys())
+        self.lazy = lazy and env.possible_starts != "off-policy"
         self.states_list: list[HashableWrapper] = []
-        for stt in aux_list:
-            #print('Moddeling: ',stt)
-            self.states_list.append(HashableWrapper(stt))
+        if not self.lazy:
+            for stt in product(*tuples_values):
+                #print('Moddeling: ',stt)
+                self.states_list.append(HashableWrapper(stt))
+        # state ids are the positions in states_list, states found later are appended
+        self.interner = StateInterner(self.states_list)
+        num_states = CartesianSpace(tuples_values).size if self.lazy else len(self.states_list)
         
-        self.terminated_states: list[HashableWrapper] = []
+        self.terminated_states: set[HashableWrapper] = set()
         
         self.num_actions = len(self.actions_list)
-        self.P = {
-            state: {action: [] for action in range(self.num_actions)}
-            for state in self.states_list
-        }
+        # reads np_random on every draw, so reset(seed=...) reseeds the selector too
+        self.selector = ActionSelector(self.num_actions, partial(getattr, self, "np_random"))
+        # cumulative outcome probabilities of the pairs with more than one outcome
+        self.P_cum: dict[tuple, np.ndarray] = {}
+        self.P: dict | LazyTransitions
+        if self.lazy:
+            self.P = LazyTransitions(self._lazy_transition, self.num_actions, cache_size)
+        else:
+            self.P = {
+                state: {action: [] for action in range(self.num_actions)}
+                for state in self.states_list
+            }
         
         if isinstance(env.possible_starts,str):
             if env.possible_starts == "off-policy":
@@ -80,9 +105,15 @@ class EnvModel(Model):
             
         #print("initial_state_distrib:", self.initial_state_distrib)
         #print("len:", len(self.initial_state_distrib))
-        self.curr_state = self.initial_state_distrib[np.random.randint(0, len(self.initial_state_distrib))]     
+        self.curr_state = random_start(self.initial_state_distrib, self.np_random)
         self.action_space = Discrete(len(self.actions_list))
-        self.observation_space = Discrete(len(self.states_list))
+        self.observation_space = Discrete(num_states)
+        
+        # greedy actions served to agents, refreshed when the q_table changes
+        self.policy_version = 0
+        self.policy = PolicyCache(self)
+        self._state_names = list(self.initial_states.keys())
+        self._state_cache: tuple = (None, None)
         
         from maspy.admin import Admin
         Admin()._add_model(self)
@@ -139,10 +170,9 @@ class EnvModel(Model):
                     self.actions_dict[args] = action
             else:
                 print(f"Unsupported action type: {action.act_type}")
+        self.action_index = {args: i for i, args in enumerate(self.actions_list)}
     
     def make_policy_table(self, env: 'Environment', states: dict[str, list]):
-        state: dict = {}
-        keys = states.keys()
         assert isinstance(env.possible_starts, dict), "possible_starts must be a dict when not off-policy"
         start_list = list(env.possible_starts.values())
         for percept in env._state_percepts.values():
@@ -150,35 +180,51 @@ class EnvModel(Model):
                 start_list.append(env._states[percept.name])
                 env.possible_starts[percept.name] = env._states[percept.name]
         normalized = [ 
-            [item] if not isinstance(item, list | tuple | set) 
+            item if isinstance(item, StateSpace)
+            else [item] if not isinstance(item, list | tuple | set) 
             else list(item) for item in start_list
         ]
         
         self.initial_states = env.possible_starts.copy()
-        aux_dist = list(product(*normalized))
-        self.initial_state_distrib = [ HashableWrapper(item) for item in aux_dist ]
+        if self.lazy:
+            # starts are only interned once drawn, a whole state space stays unenumerated
+            self.initial_state_distrib = InternedSpace(self.interner, CartesianSpace(normalized))
+            return
+        self.initial_state_distrib = [ self.interner.wrap(item) for item in product(*normalized) ]
         
         for stt in self.states_list:               
             for act in self.actions_list:
-                action = self.actions_dict[act]
-                if action.transition is not None:
-                    func = action.transition
-                else:
-                    func = action.func
-                    
-                for key, val in zip(keys, stt):
-                    state[key] = val
-                if len(action.data) == 1:
-                    results = func(env,state)
-                else:
-                    results = func(env,state,act.original)
-                assert isinstance(results, tuple), "transition returns must be at least state e reward"
-                self.add_transition(stt, results, act)    
+                self.add_transition(stt, self._call_transition(stt, act), act)    
+    
+    def _call_transition(self, stt: HashableWrapper, act: HashableWrapper) -> tuple:
+        action = self.actions_dict[act]
+        if action.transition is not None:
+            func = action.transition
+        else:
+            func = action.func
+        
+        state = dict(zip(self._state_keys, stt))
+        if len(action.data) == 1:
+            results = func(self.env,state)
+        else:
+            results = func(self.env,state,act.original)
+        assert isinstance(results, tuple), "transition returns must be at least state e reward"
+        return results
+    
+    def _lazy_transition(self, state: HashableWrapper, action_idx: int) -> list[tuple]:
+        results = self._call_transition(state, self.actions_list[action_idx])
+        return [self._parse_transition(results)]
                 
     def add_transition(self, state: HashableWrapper, results: tuple, action: Any):
         #print(state, " - ",results, " - ",action)
-        action_idx = self.actions_list.index(action)
-        new_state: HashableWrapper = HashableWrapper(tuple(results[0].values()))
+        action_idx = self.action_index[action]
+        transitions = self.P[state][action_idx]
+        transitions.append(self._parse_transition(results))
+        if len(transitions) > 1:
+            self.P_cum[(state, action_idx)] = cumulative_probabilities(transitions)
+    
+    def _parse_transition(self, results: tuple) -> tuple[float, HashableWrapper, float | int, bool]:
+        new_state: HashableWrapper = self.interner.wrap(tuple(results[0].values()))
         reward: float | int = results[1]
         probability: float = 1.0
         terminated: bool = False
@@ -188,30 +234,44 @@ class EnvModel(Model):
                 probability = result
             elif isinstance(result, bool):
                 terminated = result
-                
-        self.P[state][action_idx].append((probability, new_state, reward, terminated))
         
-    def learn(self, learn_method: Learn_Method, learning_rate: float = 0.05, discount_factor: float = 0.8, epsilon: float = 1, final_epsilon: float = 0.1, max_steps: int | None = None, num_episodes: int = 10000, load_learning: bool = False):   
-        self.learning_rate = learning_rate
-        self.learning_rate_policy = 0.01
-        self.discount_factor = discount_factor
+        return (probability, new_state, reward, terminated)
         
-        self.epsilon = epsilon
-        self.epsilon_decay = epsilon / (num_episodes / 2)
-        self.final_epsilon = final_epsilon
-        
-        self.training_error: list = [] 
-        self.trend: dict = {'avg': 0, 'slope': 0}
-        self.episode_steps: list = []
+    def learn(self, learn_method: Learn_Method, learning_rate: float = 0.05, discount_factor: float = 0.8, epsilon: float = 1, final_epsilon: float = 0.1, max_steps: int | None = None, num_episodes: int = 10000, load_learning: bool = False, q_backend: str = "dict", callback: Metrics_Callback | None = None, callback_every: int = 100):   
+        """
+        Trains the model's q_table
+
+        Parameters
+        ----------
+            q_backend : str
+                "dict" keeps a q-value array per state in a defaultdict.
+                "dense" keeps all q-values in one (n_states, n_actions)
+                array and, for qlearning on a precomputed model, trains
+                on integer state indices.
+            callback : callable, optional
+                Called as ``callback(episode, metrics)`` every
+                ``callback_every`` episodes with the TrainingMetrics.
+        """
+        if q_backend not in Q_BACKENDS:
+            raise ValueError(f"Unsupported q_backend '{q_backend}', expected one of {sorted(Q_BACKENDS)}")
+        self._setup_learning(learning_rate, discount_factor, epsilon, final_epsilon, num_episodes, callback, callback_every)
         
         if load_learning:
             self.load_learning(f'{self.name}_{learn_method.name}_{learning_rate}_{discount_factor}_{epsilon}_{final_epsilon}_{num_episodes}_{max_steps}.pkl')
         else:
-            self.q_table: dict = defaultdict(lambda: np.zeros(self.num_actions))
+            self.q_table: dict | DenseQTable
+            if q_backend == "dense":
+                self.q_table = DenseQTable(self.interner, self.num_actions)
+            else:
+                self.q_table = defaultdict(lambda: np.zeros(self.num_actions))
             self.value_table: dict = defaultdict(lambda: 0.0)
             self.policy_table: dict = defaultdict(lambda: np.full(self.num_actions, 1 / self.num_actions))
             
-        self.states_buffer = []
+        self.states_buffer = deque(maxlen=5)
+        if isinstance(self.q_table, DenseQTable) and not self.off_policy and not self.lazy and learn_method is qlearning:
+            self._learn_dense(self.q_table, num_episodes, max_steps)
+            self.reset_percepts()
+            return
         for i in self.progress_bar(range(1, num_episodes+1), "Training"):
             self.reset()
             done = False
@@ -230,14 +290,13 @@ class EnvModel(Model):
                     except Exception as e:
                         print('\n',e)
                         print(f'@ Current State: {curr_stt}, Action: {action_hashed}')
-                        for buff in self.states_buffer:
-                            print(f'\t{buff}')
+                        self._print_states_buffer('\t')
                         raise
                     #print(" # ",curr_stt," <",stt_len,"> ",results[:stt_len])
                     if stt_len == -1:
-                        next_state = self.curr_state = HashableWrapper((results[:stt_len],))
+                        next_state = self.curr_state = self.interner.wrap((results[:stt_len],))
                     else:
-                        next_state = self.curr_state = HashableWrapper(results[:stt_len])
+                        next_state = self.curr_state = self.interner.wrap(results[:stt_len])
                     reward = results[stt_len]
                     probability = 1.0
                     terminated = False
@@ -249,9 +308,7 @@ class EnvModel(Model):
                             terminated = result
                 else:
                     next_state, reward, terminated, truncated, info = self.step(action)
-                self.states_buffer.append(f"In State <{old_state}> | Make Action <{action}> | Move to State: {next_state} | Reward {reward} / {terminated}")
-                if len(self.states_buffer) > 5:
-                    self.states_buffer.pop(0)
+                self.states_buffer.append((old_state, action, next_state, reward, terminated))
                 #print(f"In State <{old_state}> | Make Action <{action}> | Move to State: {next_state} | Reward {reward} / {terminated} / {truncated} - {info}")
                 #sleep(0.1)
                 try:
@@ -265,25 +322,120 @@ class EnvModel(Model):
                 except Exception as e:
                     print('\n',e)
                     print(f'# Current State: {curr_stt}, Action: {action_hashed}')
-                    for buff in self.states_buffer:
-                        print(f'\t{buff}')
+                    self._print_states_buffer('\t')
                     raise
                 if terminated:
                     done = True
-                    self.terminated_states.append(next_state)
+                    self.terminated_states.add(next_state)
                 step += 1
                 
-            self.episode_steps.append(step)
-            if len(self.episode_steps) % 50 == 0:
-                window = self.episode_steps[-50:]
-                self.trend['avg'] = sum(window) / 50
             #if done and step < max_steps:
             #    print(f" Episode {i} finished in {step} steps : #{self.curr_state}")
-                
-            self.epsilon = max(self.final_epsilon, self.epsilon - self.epsilon_decay)
+            self._end_episode(step)
         self.reset_percepts()
         #self.save_learning(f"{self.name}_{learn_method.name}_{learning_rate}_{discount_factor}_{epsilon}_{final_epsilon}_{num_episodes}_{max_steps}.pkl")
 
+    def learn_batch(self, num_envs: int = 256, learning_rate: float = 0.05, discount_factor: float = 0.8, epsilon: float = 1, final_epsilon: float = 0.1, max_steps: int | None = None, num_episodes: int = 10000, seed: int | None = None, callback: Metrics_Callback | None = None, callback_every: int = 100):
+        """
+        Trains a dense q_table with qlearning over many episodes at once
+
+        Parameters
+        ----------
+            num_envs : int
+                Number of episodes advanced together, each iteration steps
+                all of them with array operations over P.
+            seed : int, optional
+                Seed of the random generator used for starts, actions and
+                transitions.
+        
+        Notes
+        -----
+            Needs the precomputed transition table, so it is not available
+            for "off-policy" models. The metrics record the mean temporal
+            difference of each iteration instead of one per step.
+        """
+        if self.off_policy or self.lazy:
+            raise ValueError(f"{self.name} is {'off-policy' if self.off_policy else 'lazy'}, learn_batch needs the precomputed transitions")
+        assert num_envs > 0, "num_envs must be positive"
+        from maspy.learning.batch import learn_batch
+        self._setup_learning(learning_rate, discount_factor, epsilon, final_epsilon, num_episodes, callback, callback_every)
+        self.q_table = DenseQTable(self.interner, self.num_actions)
+        self.states_buffer = deque(maxlen=5)
+        learn_batch(self, self.q_table, num_envs, num_episodes, max_steps, np.random.default_rng(seed))
+        self.reset_percepts()
+
+    def _setup_learning(self, learning_rate: float, discount_factor: float, epsilon: float, final_epsilon: float, num_episodes: int, callback: Metrics_Callback | None = None, callback_every: int = 100):
+        self.learning_rate = learning_rate
+        self.learning_rate_policy = 0.01
+        self.discount_factor = discount_factor
+        
+        self.epsilon = epsilon
+        self.epsilon_decay = epsilon / (num_episodes / 2)
+        self.final_epsilon = final_epsilon
+        self.policy_version += 1
+        
+        # running statistics, training_error only keeps the latest temporal differences
+        self.metrics = TrainingMetrics()
+        self.training_error = self.metrics.recent_td
+        self.trend: dict = {'avg': 0, 'slope': 0}
+        self.episode_steps: list = []
+        self._callback = callback
+        self._callback_every = callback_every
+
+    def _end_episode(self, step: int):
+        self.episode_steps.append(step)
+        self.metrics.record_episode(step)
+        episode = self.metrics.episodes
+        if episode % 50 == 0:
+            window = self.episode_steps[-50:]
+            self.trend['avg'] = sum(window) / 50
+        self.epsilon = max(self.final_epsilon, self.epsilon - self.epsilon_decay)
+        self.policy_version += 1
+        if self._callback is not None and episode % self._callback_every == 0:
+            self._callback(episode, self.metrics)
+
+    def _dense_transitions(self, q_table: DenseQTable) -> list[list[list[tuple]]]:
+        """P indexed by state and action, with next states replaced by their q_table row"""
+        return [
+            [[(p, q_table.encode(s), r, t) for p, s, r, t in self.P[state][action]] for action in range(self.num_actions)]
+            for state in self.states_list
+        ]
+
+    def _learn_dense(self, q_table: DenseQTable, num_episodes: int, max_steps: int | None):
+        """Q-learning on integer state indices, states are only hashed while encoding P"""
+        transitions = self._dense_transitions(q_table)
+        starts = [q_table.encode(state) for state in self.initial_state_distrib]
+        values = q_table.values
+        selector = self.selector
+        rng = selector.rng
+        state = starts[0]
+        for i in self.progress_bar(range(1, num_episodes+1), "Training"):
+            state = starts[int(rng.integers(len(starts)))]
+            done = False
+            step = 0
+            while not done and not (max_steps and step >= max_steps):
+                if rng.random() < self.epsilon:
+                    action = selector.random_action()
+                else:
+                    action = selector.monte_carlo(values[state])
+                outcomes = transitions[state][action]
+                if len(outcomes) == 1:
+                    _, next_state, reward, terminated = outcomes[0]
+                else:
+                    _, next_state, reward, terminated = outcomes[sample_outcome(self.P_cum[(q_table.states[state], action)], rng)]
+                
+                temp_diff = reward + self.discount_factor * (not terminated) * values[next_state].max() - values[state, action]
+                values[state, action] += self.learning_rate * temp_diff
+                self.metrics.record_td(temp_diff)
+                
+                if terminated:
+                    done = True
+                    self.terminated_states.add(q_table.states[next_state])
+                state = next_state
+                step += 1
+            self._end_episode(step)
+        self.curr_state = q_table.states[state]
+
     def save_learning(self, filename: str):
         with open(filename, 'wb') as file:
             pickle.dump(dict(self.q_table), file)
@@ -295,20 +447,46 @@ class EnvModel(Model):
         with open(filename, 'rb') as file:
             loaded_q_table = pickle.load(file)
         self.q_table = defaultdict(lambda: np.zeros(self.num_actions), loaded_q_table)
+        self.policy_version += 1
         print("Model Loaded!")
     
+    def save_policy(self, filename: str) -> str:
+        """
+        Saves the q_table as a contiguous Q matrix (.npy) and a JSON state-key table (.keys.json)
+
+        Unlike save_learning nothing is pickled, so policies are safe to
+        load from untrusted files. Returns the path of the Q matrix.
+        """
+        from maspy.learning.persistence import save_policy
+        q_table = self.q_table
+        if isinstance(q_table, DenseQTable):
+            states, values = q_table.states, q_table.rows()
+        else:
+            states = list(q_table.keys())
+            values = np.array([q_table[state] for state in states], dtype=np.float64).reshape(len(states), self.num_actions)
+        return save_policy(filename, states, values, self.actions_list)
+    
+    def load_policy(self, filename: str, mmap: bool = True):
+        """
+        Loads a policy written by save_policy into the q_table
+
+        With mmap the Q matrix is memory-mapped read-only, so agents in
+        different processes share one copy; unknown states read as zeros.
+        """
+        from maspy.learning.persistence import load_policy
+        self.q_table = load_policy(filename, self.actions_list, mmap)
+        self.policy_version += 1
+    
     def progress_bar(self, iterable, prefix='', length=50):
-        total = len(iterable)
+        progress = ProgressReporter(len(iterable), prefix, length)
         for i, item in enumerate(iterable):
-            percent = (i + 1) / total
-            filled = int(length * percent)
-            bar = '█' * filled + '-' * (length - filled)
-            sys.stdout.write(f'\r{prefix}: {i+1}/{total} avg_steps({self.trend["avg"]:.2f}) |{bar}| {percent:.0%}')
-            sys.stdout.flush()
+            progress.update(i + 1, lambda: f'avg_steps({self.trend["avg"]:.2f}) ')
             yield item
-        print() 
+        progress.close()
     
     def q_learning_update(self, state, next_state, action: int, reward, terminated):
+        if isinstance(self.q_table, DenseQTable):
+            state, next_state = self.q_table.encode(state), self.q_table.encode(next_state)
         q_table = (not terminated) * np.max(self.q_table[next_state])
         
         temp_diff = (
@@ -317,7 +495,7 @@ class EnvModel(Model):
         
         self.q_table[state][action] += self.learning_rate * temp_diff
         
-        self.training_error.append(temp_diff)
+        self.metrics.record_td(temp_diff)
     
     def sarsa_update(self, state, next_state, action: int, reward, terminated):
         next_action = self.get_action(next_state)
@@ -330,7 +508,7 @@ class EnvModel(Model):
         
         self.q_table[state][action] += self.learning_rate * temp_diff
         
-        self.training_error.append(temp_diff)
+        self.metrics.record_td(temp_diff)
 
     def expected_sarsa_update(self, state, next_state, action: int, reward, terminated, policy):
         if not terminated:
@@ -344,7 +522,7 @@ class EnvModel(Model):
         
         self.q_table[state][action] += self.learning_rate * temp_diff
         
-        self.training_error.append(temp_diff)
+        self.metrics.record_td(temp_diff)
 
         
     def actor_critic_update(self, state, next_state, action: int, reward, terminated):
@@ -359,39 +537,79 @@ class EnvModel(Model):
 
         self.policy_table[state] = self.policy_table[state] / np.sum(self.policy_table[state])
         
-        self.training_error.append(td_error)
+        self.metrics.record_td(td_error)
 
         
-    def get_action(self, state: tuple | HashableWrapper | None = None):
+    def _fill_state(self, state: tuple | HashableWrapper | int) -> tuple | int:
+        """Replaces the Any components of a state with those of curr_state"""
+        if isinstance(state, (int, np.integer)):
+            return state
+        stt: tuple = tuple()
+        for curr_s, s in zip(self.curr_state.original, state):
+            if s == Any:
+                stt += (curr_s,)
+            else:
+                stt += (s,)
+        return stt
+    
+    def get_action(self, state: tuple | HashableWrapper | int | None = None):
         if state is not None:
-            stt: tuple = tuple()
-            for curr_s, s in zip(self.curr_state.original, state):
-                if s == Any:
-                    stt += (curr_s,)
-                else:
-                    stt += (s,)
-            state = stt    
-            #if not isinstance(state, HashableWrapper):
-            state = HashableWrapper(state)
-            action = monte_carlo_selection(self.q_table[state])
+            state = self._fill_state(state)
+            action = self.selector.monte_carlo(self._q_values(self.interner.encode(state)))
             #print(f'state: {state} : {self.q_table[state]} > [{action}] {self.actions_list[action]}')
             return action
             #return int(np.argmax(self.q_table[state]))
         
-        if np.random.uniform(0, 1) < self.epsilon:
-            return self.action_space.sample()
+        if self.selector.rng.random() < self.epsilon:
+            return self.selector.random_action()
         
-        return monte_carlo_selection(self.q_table[self.curr_state])
+        return self.selector.monte_carlo(self.q_table[self.curr_state])
         #return int(np.argmax(self.q_table[self.curr_state]))
 
+    def _q_values(self, state_id: int) -> np.ndarray:
+        q_table = self.q_table
+        if isinstance(q_table, DenseQTable) and q_table.interner is self.interner:
+            return q_table[state_id]
+        return q_table[self.interner.decode(state_id)]
+
+    def best_action(self, state: tuple | HashableWrapper | int | None = None) -> int:
+        """
+        An action of a state, of the current environment state by default
+
+        Drawn like ``get_action`` (Monte Carlo over the q-values, so ties
+        are broken at random) but served from the policy cache, so agents
+        asking again about an unchanged state skip both the percept
+        lookups and the weighting of the q-values.
+        """
+        if state is None:
+            state, _ = self.get_state()
+        else:
+            state = self._fill_state(state)
+        return self.policy.action(self.interner.encode(state))
+    
+    def best_actions(self, states: Sequence[tuple | HashableWrapper | int]) -> list[int]:
+        """Actions of many states drawn like ``best_action``, e.g. one per agent sharing this model"""
+        state_ids = [self.interner.encode(self._fill_state(state)) for state in states]
+        return self.policy.batch(state_ids).tolist()
+    
     def get_state(self) -> tuple: 
+        # the percept lookups are only redone when one of the state percepts changed
+        key = (self.env.percept_versions(self._state_names), len(self.terminated_states))
+        cached_key, result = self._state_cache
+        if key == cached_key:
+            return result
+        result = self._read_state()
+        self._state_cache = (key, result)
+        return result
+    
+    def _read_state(self) -> tuple:
         from maspy.environment import Percept
         state: tuple = tuple()
         for name in self.initial_states.keys():
             percept = self.env.get(Percept(name),ck_values=False)
             assert isinstance(percept, Percept)
             state += (percept.values,)
-        if state in self.terminated_states or HashableWrapper(state) in self.terminated_states:
+        if state in self.interner and self.interner.wrap(state) in self.terminated_states:
             return state, True
         else:
             return state, False
\ No newline at end of file
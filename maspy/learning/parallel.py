@@ -0,0 +1,264 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field
+from contextlib import contextmanager, redirect_stdout
+from functools import partial
+from itertools import product
+from time import perf_counter
+import multiprocessing as mp
+import numpy as np
+import threading
+import os
+
+from maspy.learning.modelling import qlearning, Learn_Method
+from maspy.learning.qtable import DenseQTable
+
+if TYPE_CHECKING:
+    from maspy.learning.modelling import EnvModel
+
+@dataclass
+class TrainResult:
+    """A trained table and its learning curve"""
+    config: Dict[str, Any]
+    q_table: DenseQTable | dict
+    episode_steps: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+# Forked workers inherit these instead of pickling the model and its Environment
+_MODEL: Optional['EnvModel'] = None
+_JOBS: List[Dict[str, Any]] = []
+
+def fork_available() -> bool:
+    return "fork" in mp.get_all_start_methods()
+
+def fork_safe() -> bool:
+    """
+    Whether workers can be forked from this process
+
+    A fork only copies the calling thread, so a lock held by any other
+    thread (the Admin, its printer, running agents) would stay locked in
+    the workers. The model and its Environment hold locks and cannot be
+    pickled for spawn, so with other threads alive training stays in this
+    process instead.
+    """
+    return fork_available() and threading.active_count() == 1
+
+def _seed(model: 'EnvModel', seed: int | None) -> None:
+    # forked workers share the parent's random state, so every job reseeds its own generator
+    model.np_random = np.random.default_rng(seed)
+
+@contextmanager
+def _preserved(model: 'EnvModel'):
+    """
+    Puts the model and its Environment's percepts back as they were
+
+    A job trained in this process must leave the caller's model as a
+    forked worker would: learn replaces the q_table, the statistics and
+    the generator, adds terminated states and resets the percepts.
+    """
+    attributes = dict(vars(model))
+    terminated = set(model.terminated_states)
+    percepts = model.env.snapshot()
+    try:
+        yield
+    finally:
+        vars(model).clear()
+        vars(model).update(attributes)
+        model.terminated_states.clear()
+        model.terminated_states.update(terminated)
+        model.env.restore(percepts)
+
+def _quietly(job: Callable[[Any], tuple], arg: Any) -> tuple:
+    """Runs a job in a worker with its prints discarded"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        return job(arg)
+
+def _train_job(index: int) -> tuple:
+    assert _MODEL is not None
+    job = _JOBS[index]
+    _seed(_MODEL, job["seed"])
+    start = perf_counter()
+    _MODEL.learn(job["method"], q_backend=job["q_backend"], **job["config"])
+    elapsed = perf_counter() - start
+    q_table = _MODEL.q_table
+    if isinstance(q_table, DenseQTable):
+        table: Any = (list(q_table.states), q_table.rows().copy())
+    else:
+        table = dict(q_table)
+    return index, table, list(_MODEL.episode_steps), elapsed
+
+def _rebuild(model: 'EnvModel', table: Any) -> DenseQTable | dict:
+    if isinstance(table, dict):
+        return table
+    states, values = table
+    q_table = DenseQTable(states, model.num_actions)
+    q_table.values[:len(values)] = values
+    return q_table
+
+def train_parallel(
+    model: 'EnvModel',
+    configs: Sequence[Dict[str, Any]],
+    learn_method: Learn_Method = qlearning,
+    q_backend: str = "dense",
+    processes: int | None = None,
+    seed: int | None = None
+) -> List[TrainResult]:
+    """
+    Trains one independent learner per configuration across a process pool
+
+    Parameters
+    ----------
+        model : EnvModel
+            The model to train, each worker trains its own forked copy and
+            the model itself is left untouched.
+        configs : sequence of dicts
+            Keyword arguments for ``EnvModel.learn``, e.g.
+            ``{"learning_rate": 0.1, "num_episodes": 5000}``.
+        processes : int, optional
+            Pool size, defaults to the number of CPUs.
+        seed : int, optional
+            Configuration ``i`` is seeded with ``seed + i``.
+
+    Returns
+    -------
+        One TrainResult per configuration, in the given order.
+
+    Notes
+    -----
+        Workers are forked so the model and its Environment are inherited,
+        not pickled. Where fork is unavailable, or unsafe because other
+        threads are running (see fork_safe), the configurations are
+        trained one after the other in this process.
+    """
+    global _MODEL, _JOBS
+    jobs = [
+        {"config": dict(config), "method": learn_method, "q_backend": q_backend, "seed": None if seed is None else seed + i}
+        for i, config in enumerate(configs)
+    ]
+    _MODEL, _JOBS = model, jobs
+    try:
+        if fork_safe() and len(jobs) > 1 and processes != 1:
+            with mp.get_context("fork").Pool(processes) as pool:
+                outputs = pool.map(partial(_quietly, _train_job), range(len(jobs)))
+        else:
+            outputs = []
+            for i in range(len(jobs)):
+                with _preserved(model):
+                    outputs.append(_train_job(i))
+    finally:
+        _MODEL, _JOBS = None, []
+
+    outputs.sort(key=lambda output: output[0])
+    return [
+        TrainResult(jobs[index]["config"], _rebuild(model, table), steps, elapsed)
+        for index, table, steps, elapsed in outputs
+    ]
+
+def sweep(
+    model: 'EnvModel',
+    grid: Dict[str, Sequence[Any]],
+    learn_method: Learn_Method = qlearning,
+    q_backend: str = "dense",
+    processes: int | None = None,
+    seed: int | None = None,
+    **fixed: Any
+) -> List[TrainResult]:
+    """
+    Trains every combination of a hyperparameter grid in parallel
+
+    ``sweep(model, {"learning_rate": [0.05, 0.1], "discount_factor": [0.8, 0.95]}, num_episodes=5000)``
+    trains four learners, the keyword arguments are shared by all of them.
+    """
+    names = list(grid)
+    configs = [{**fixed, **dict(zip(names, values))} for values in product(*(grid[name] for name in names))]
+    return train_parallel(model, configs, learn_method, q_backend, processes, seed)
+
+def _shared_job(args: tuple) -> tuple:
+    assert _MODEL is not None
+    worker, shm_name, shape, config, seed = args
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        q_table = _MODEL.q_table
+        assert isinstance(q_table, DenseQTable)
+        q_table.values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        _seed(_MODEL, seed)
+        _MODEL._setup_learning(config["learning_rate"], config["discount_factor"], config["epsilon"], config["final_epsilon"], config["num_episodes"])
+        start = perf_counter()
+        _MODEL._learn_dense(q_table, config["num_episodes"], config["max_steps"])
+        elapsed = perf_counter() - start
+        q_table.values = np.zeros((1, 1)) # drops the view before the segment is closed
+        return worker, list(_MODEL.episode_steps), elapsed
+    finally:
+        shm.close()
+
+def train_shared(
+    model: 'EnvModel',
+    workers: int | None = None,
+    num_episodes: int = 10000,
+    learning_rate: float = 0.05,
+    discount_factor: float = 0.8,
+    epsilon: float = 1,
+    final_epsilon: float = 0.1,
+    max_steps: int | None = None,
+    seed: int | None = None
+) -> TrainResult:
+    """
+    Asynchronous Q-learning with every worker updating one shared-memory Q array
+
+    The episodes are split between the workers, which update the table
+    without locks (Hogwild style); occasional lost updates are tolerated by
+    Q-learning. Needs a precomputed model, like the dense learn loop.
+    Without a safe fork (see fork_safe) all episodes run in this process.
+
+    Returns
+    -------
+        A TrainResult with the shared table and the episode steps of all
+        workers, concatenated by worker.
+    """
+    if model.off_policy or model.lazy:
+        raise ValueError(f"{model.name} needs precomputed transitions for shared training")
+    workers = workers or os.cpu_count() or 1
+    q_table = DenseQTable(model.interner, model.num_actions)
+    model._dense_transitions(q_table) # registers every reachable state before the table is shared
+    shape = (len(q_table), model.num_actions)
+    config = {
+        "learning_rate": learning_rate, "discount_factor": discount_factor, "epsilon": epsilon,
+        "final_epsilon": final_epsilon, "max_steps": max_steps,
+    }
+    shares = [num_episodes // workers + (1 if i < num_episodes % workers else 0) for i in range(workers)]
+
+    if not fork_safe() or workers == 1:
+        _seed(model, seed)
+        model._setup_learning(learning_rate, discount_factor, epsilon, final_epsilon, num_episodes)
+        model.q_table = q_table
+        start = perf_counter()
+        model._learn_dense(q_table, num_episodes, max_steps)
+        return TrainResult({**config, "num_episodes": num_episodes}, q_table, list(model.episode_steps), perf_counter() - start)
+
+    global _MODEL
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(np.float64).itemsize)
+    try:
+        shared = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = 0.0
+        model.q_table = q_table
+        _MODEL = model
+        jobs = [
+            (i, shm.name, shape, {**config, "num_episodes": share}, None if seed is None else seed + i)
+            for i, share in enumerate(shares) if share > 0
+        ]
+        start = perf_counter()
+        with mp.get_context("fork").Pool(len(jobs)) as pool:
+            outputs = sorted(pool.map(partial(_quietly, _shared_job), jobs))
+        elapsed = perf_counter() - start
+        q_table.values = shared.copy()
+        del shared
+    finally:
+        _MODEL = None
+        shm.close()
+        shm.unlink()
+
+    model.q_table = q_table
+    steps = [step for _, worker_steps, _ in outputs for step in worker_steps]
+    model.episode_steps = steps
+    return TrainResult({**config, "num_episodes": num_episodes}, q_table, steps, elapsed)
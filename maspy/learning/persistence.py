@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import json
+import os
+
+from maspy.learning.core import HashableWrapper
+from maspy.learning.qtable import DenseQTable
+
+POLICY_FORMAT = "maspy-policy"
+POLICY_VERSION = 1
+
+def policy_paths(filename: str) -> Tuple[str, str]:
+    """The Q matrix and key table files of a policy"""
+    base = filename[:-4] if filename.endswith(".npy") else filename
+    return f"{base}.npy", f"{base}.keys.json"
+
+def encode_key(value: Any) -> Any:
+    """
+    Encodes a state or action value as JSON, tagging the containers JSON lacks
+
+    Tuples, dicts, sets and frozensets become ``{"t": [...]}``,
+    ``{"d": [[key, value], ...]}``, ``{"s": [...]}`` and ``{"f": [...]}``.
+    """
+    match value:
+        case None | bool() | int() | float() | str():
+            return value
+        case tuple():
+            return {"t": [encode_key(v) for v in value]}
+        case list():
+            return {"l": [encode_key(v) for v in value]}
+        case dict():
+            return {"d": [[encode_key(k), encode_key(v)] for k, v in value.items()]}
+        case frozenset():
+            return {"f": [encode_key(v) for v in value]}
+        case set():
+            return {"s": [encode_key(v) for v in value]}
+        case np.integer() | np.floating() | np.bool_():
+            return value.item()
+        case _:
+            raise TypeError(f"Cannot store {type(value).__name__}:{value} in a policy key table")
+
+def decode_key(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    (tag, items), = value.items()
+    match tag:
+        case "t":
+            return tuple(decode_key(v) for v in items)
+        case "l":
+            return [decode_key(v) for v in items]
+        case "d":
+            return {decode_key(k): decode_key(v) for k, v in items}
+        case "f":
+            return frozenset(decode_key(v) for v in items)
+        case "s":
+            return {decode_key(v) for v in items}
+        case _:
+            raise ValueError(f"Unknown key tag '{tag}'")
+
+def save_policy(filename: str, states: List[HashableWrapper], values: np.ndarray, actions: List[HashableWrapper]) -> str:
+    """Writes the Q matrix as .npy and the state and action keys as JSON, returns the .npy path"""
+    matrix_path, keys_path = policy_paths(filename)
+    values = np.ascontiguousarray(values[:len(states)], dtype=np.float64)
+    header: Dict[str, Any] = {
+        "format": POLICY_FORMAT,
+        "version": POLICY_VERSION,
+        "shape": list(values.shape),
+        "actions": [encode_key(action.original) for action in actions],
+        "states": [encode_key(state.original) for state in states],
+    }
+    # the key table is written last, so a complete key table implies a complete matrix
+    np.save(matrix_path, values, allow_pickle=False)
+    tmp_path = f"{keys_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(header, f, separators=(",", ":"))
+    os.replace(tmp_path, keys_path)
+    return matrix_path
+
+def load_policy(filename: str, actions: List[HashableWrapper] | None = None, mmap: bool = True) -> DenseQTable:
+    """
+    Loads a policy written by save_policy as a DenseQTable
+
+    Parameters
+    ----------
+        actions : list of HashableWrapper, optional
+            When given, the stored actions must match them in order.
+        mmap : bool
+            Memory-maps the Q matrix read-only, so processes loading the
+            same policy share its pages instead of copying it.
+    """
+    matrix_path, keys_path = policy_paths(filename)
+    with open(keys_path, encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("format") != POLICY_FORMAT or header.get("version") != POLICY_VERSION:
+        raise ValueError(f"{keys_path} is not a {POLICY_FORMAT} v{POLICY_VERSION} key table")
+
+    stored_actions = [HashableWrapper(decode_key(action)) for action in header["actions"]]
+    if actions is not None and stored_actions != list(actions):
+        raise ValueError(f"Policy actions {stored_actions} do not match the model actions {list(actions)}")
+
+    values = np.load(matrix_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if list(values.shape) != header["shape"]:
+        raise ValueError(f"{matrix_path} has shape {values.shape}, its key table expects {tuple(header['shape'])}")
+    states = [HashableWrapper(decode_key(state)) for state in header["states"]]
+    return DenseQTable(states, len(stored_actions), values=values)
@@ -0,0 +1,84 @@
+from typing import Any, Iterator, List, Sequence
+import numpy as np
+
+from maspy.learning.core import HashableWrapper, StateInterner
+
+Q_BACKENDS = {"dict", "dense"}
+
+class DenseQTable:
+    """
+    Q-values of every state in a single ``(n_states, n_actions)`` array
+
+    States are mapped to row indices once. Indexing with a state, or with
+    its integer index, returns its row as a view, so in-place updates are
+    kept. Unknown states get a new zeroed row, like the ``defaultdict``
+    q_table of EnvModel.
+
+    Given a StateInterner instead of a list of states, the table shares
+    it and its rows are the interned state ids.
+
+    Growing the table reallocates ``values``, so rows taken before a new
+    state was added no longer point at the table.
+
+    A table built over read-only ``values`` (e.g. a memory-mapped policy)
+    never grows, unknown states read as a zeroed row instead.
+    """
+    def __init__(self, states: Sequence[HashableWrapper] | StateInterner, num_actions: int, dtype: Any = np.float64, values: np.ndarray | None = None) -> None:
+        self.num_actions = num_actions
+        self.interner = states if isinstance(states, StateInterner) else StateInterner(states)
+        if values is None:
+            values = np.zeros((max(len(self.interner), 1), num_actions), dtype=dtype)
+        assert values.shape[1:] == (num_actions,) and len(values) >= len(self.interner), "values must have a row per state"
+        self.values: np.ndarray = values
+        self.readonly = not values.flags.writeable
+
+    @property
+    def states(self) -> List[HashableWrapper]:
+        return self.interner.states
+
+    def encode(self, state: Any) -> int:
+        """Returns the row index of a state, adding the state if unknown"""
+        if self.readonly and state not in self.interner:
+            raise KeyError(f"{state} is not in the read-only table")
+        idx = self.interner.encode(state)
+        if idx >= len(self.values):
+            self._grow(idx + 1)
+        return idx
+
+    def _grow(self, size: int) -> None:
+        grown = np.zeros((max(2 * len(self.values), size), self.num_actions), dtype=self.values.dtype)
+        grown[:len(self.values)] = self.values
+        self.values = grown
+
+    def rows(self) -> np.ndarray:
+        """The values with exactly one row per state"""
+        # a shared interner may have grown without this table
+        if len(self.interner) > len(self.values):
+            self._grow(len(self.interner))
+        return self.values[:len(self.interner)]
+
+    def __getitem__(self, state: Any) -> np.ndarray:
+        if self.readonly and state not in self:
+            return np.zeros(self.num_actions, dtype=self.values.dtype)
+        idx = self.encode(state) # may grow values, so it is resolved first
+        return self.values[idx]
+
+    def __setitem__(self, state: HashableWrapper | int, row: Any) -> None:
+        idx = self.encode(state)
+        self.values[idx] = row
+
+    def __contains__(self, state: Any) -> bool:
+        return state in self.interner
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __iter__(self) -> Iterator[HashableWrapper]:
+        return iter(self.states)
+
+    def keys(self) -> List[HashableWrapper]:
+        return list(self.states)
+
+    def items(self) -> Iterator[tuple[HashableWrapper, np.ndarray]]:
+        for idx, state in enumerate(self.states):
+            yield state, self.values[idx]
@@ -0,0 +1,109 @@
+from typing import Callable, Sequence
+import numpy as np
+
+class ActionSelector:
+    """
+    Picks actions from q-value rows, drawing from a single Generator
+
+    Scalar selectors work in buffers allocated once for ``num_actions``,
+    the ``batch_*`` selectors pick one action per row of a
+    ``(n, num_actions)`` array at once.
+
+    ``rng`` may also be a callable returning the Generator to draw from,
+    read on every draw, so a model reseeded after the selector was built
+    is followed.
+    """
+    def __init__(self, num_actions: int, rng: np.random.Generator | Callable[[], np.random.Generator] | None = None) -> None:
+        self.num_actions = num_actions
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._weights = np.empty(num_actions)
+        self._cumulative = np.empty(num_actions)
+
+    @property
+    def rng(self) -> np.random.Generator:
+        return self._rng() if callable(self._rng) else self._rng
+
+    @rng.setter
+    def rng(self, rng: np.random.Generator | Callable[[], np.random.Generator]) -> None:
+        self._rng = rng
+
+    def random_action(self) -> int:
+        return int(self.rng.integers(self.num_actions))
+
+    def greedy(self, q_values: np.ndarray) -> int:
+        return int(q_values.argmax())
+
+    def epsilon_greedy(self, q_values: np.ndarray, epsilon: float) -> int:
+        if self.rng.random() < epsilon:
+            return self.random_action()
+        return int(q_values.argmax())
+
+    def monte_carlo(self, q_values: np.ndarray) -> int:
+        """
+        Picks actions in proportion to their q-value above the row minimum
+
+        Same distribution as ``ml_utils.monte_carlo_selection``: the worst
+        action is never picked, a row of equal values picks uniformly, and
+        an all-zero row picks the first action.
+        """
+        weights = self._weights
+        low = q_values.min()
+        np.subtract(q_values, low, out=weights)
+        if not weights.any():
+            return 0 if low == 0 else self.random_action()
+        cumulative = np.cumsum(weights, out=self._cumulative)
+        return int(np.searchsorted(cumulative, self.rng.random() * cumulative[-1]))
+
+    def boltzmann(self, q_values: np.ndarray, temperature: float = 1.0) -> int:
+        """Picks actions with probability proportional to exp(q / temperature)"""
+        weights = self._weights
+        np.subtract(q_values, q_values.max(), out=weights)
+        weights /= temperature
+        np.exp(weights, out=weights)
+        cumulative = np.cumsum(weights, out=self._cumulative)
+        return min(int(np.searchsorted(cumulative, self.rng.random() * cumulative[-1])), self.num_actions - 1)
+
+    def softmax(self, q_values: np.ndarray) -> int:
+        return self.boltzmann(q_values, 1.0)
+
+    def batch_greedy(self, q_values: np.ndarray) -> np.ndarray:
+        return q_values.argmax(axis=1)
+
+    def batch_epsilon_greedy(self, q_values: np.ndarray, epsilon: float) -> np.ndarray:
+        rows = len(q_values)
+        explore = self.rng.random(rows) < epsilon
+        return np.where(explore, self.rng.integers(self.num_actions, size=rows), q_values.argmax(axis=1))
+
+    def batch_monte_carlo(self, q_values: np.ndarray) -> np.ndarray:
+        low = q_values.min(axis=1, keepdims=True)
+        cumulative = np.cumsum(q_values - low, axis=1)
+        total = cumulative[:, -1]
+        picks = self._batch_pick(cumulative, total)
+        flat = total == 0
+        if flat.any():
+            uniform = self.rng.integers(self.num_actions, size=len(q_values))
+            picks[flat] = np.where(low[flat, 0] == 0, 0, uniform[flat])
+        return picks
+
+    def batch_boltzmann(self, q_values: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+        weights = np.exp((q_values - q_values.max(axis=1, keepdims=True)) / temperature)
+        cumulative = np.cumsum(weights, axis=1)
+        return self._batch_pick(cumulative, cumulative[:, -1])
+
+    def batch_softmax(self, q_values: np.ndarray) -> np.ndarray:
+        return self.batch_boltzmann(q_values, 1.0)
+
+    def _batch_pick(self, cumulative: np.ndarray, total: np.ndarray) -> np.ndarray:
+        draws = self.rng.random(len(cumulative)) * total
+        picks = (cumulative < draws[:, None]).sum(axis=1)
+        return np.minimum(picks, self.num_actions - 1)
+
+def cumulative_probabilities(transitions: Sequence[tuple]) -> np.ndarray:
+    """Running sums of the probabilities of a P[state][action] list"""
+    return np.cumsum([transition[0] for transition in transitions])
+
+def sample_outcome(cumulative: np.ndarray, rng: np.random.Generator) -> int:
+    """Index of a sampled outcome, like ``ml_utils.categorical_sample``"""
+    outcome = int(np.searchsorted(cumulative, rng.random(), side="right"))
+    # probabilities summing below one fall back to the first outcome
+    return outcome if outcome < len(cumulative) else 0
@@ -0,0 +1,82 @@
+from typing import TYPE_CHECKING, Any, Dict, Sequence
+import numpy as np
+
+from maspy.learning.qtable import DenseQTable
+
+if TYPE_CHECKING:
+    from maspy.learning.modelling import EnvModel
+
+def _running_weights(q_values: np.ndarray) -> np.ndarray:
+    """
+    Running sums of the Monte Carlo weights of rows of q-values
+
+    The weights are the q-values above the row minimum, as in
+    ``ActionSelector.monte_carlo``. A flat row of nonzero values weighs
+    every action the same, an all-zero row sums to zero so its draw always
+    lands on the first action.
+    """
+    low = q_values.min(axis=-1, keepdims=True)
+    weights = q_values - low
+    flat = ~weights.any(axis=-1) & (low[..., 0] != 0)
+    weights[flat] = 1
+    return np.cumsum(weights, axis=-1)
+
+class PolicyCache:
+    """
+    Actions of an EnvModel's q_table, memoized by interned state id
+
+    Actions are drawn like ``EnvModel.get_action``, in proportion to their
+    q-value above the row minimum, so tied actions are picked at random
+    instead of always the first one. What is memoized is each state's
+    running sum of weights, a draw is then a single ``searchsorted``.
+
+    The cache is dropped whenever the model's q_table is replaced or its
+    ``policy_version`` moves (after every training episode and on every
+    load), so agents sharing one model only read each row once.
+    """
+    def __init__(self, model: 'EnvModel') -> None:
+        self.model = model
+        self.weights: Dict[int, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self._source: tuple = (None, -1)
+
+    def _sync(self) -> None:
+        source = (getattr(self.model, "q_table", None), self.model.policy_version)
+        if source[0] is not self._source[0] or source[1] != self._source[1]:
+            self.weights = {}
+            self._source = source
+
+    def action(self, state_id: int) -> int:
+        self._sync()
+        cumulative = self.weights.get(state_id)
+        if cumulative is None:
+            self.misses += 1
+            cumulative = self.weights[state_id] = _running_weights(np.array(self.model._q_values(state_id), dtype=float))
+        else:
+            self.hits += 1
+        return int(np.searchsorted(cumulative, self.model.selector.rng.random() * cumulative[-1]))
+
+    def batch(self, state_ids: Sequence[int]) -> np.ndarray:
+        """Actions of many states, the uncached rows are weighted together and all are drawn at once"""
+        self._sync()
+        weights = self.weights
+        missing = [state_id for state_id in dict.fromkeys(state_ids) if state_id not in weights]
+        if missing:
+            self.misses += len(missing)
+            q_table: Any = self.model.q_table
+            if isinstance(q_table, DenseQTable) and q_table.interner is self.model.interner:
+                rows = [q_table.encode(state_id) for state_id in missing]
+                q_values = q_table.values[rows].astype(float)
+            else:
+                q_values = np.array([self.model._q_values(state_id) for state_id in missing], dtype=float)
+            weights.update(zip(missing, _running_weights(q_values)))
+        self.hits += len(state_ids) - len(missing)
+        if not state_ids:
+            return np.zeros(0, dtype=np.int64)
+        cumulative = np.array([weights[state_id] for state_id in state_ids])
+        draws = self.model.selector.rng.random(len(cumulative)) * cumulative[:, -1]
+        return (cumulative < draws[:, None]).sum(axis=1)
+
+    def clear(self) -> None:
+        self.weights = {}
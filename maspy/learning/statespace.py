@@ -0,0 +1,257 @@
+from typing import Any, Iterator, List, Sequence, Tuple
+from abc import abstractmethod
+from collections.abc import Sequence as SequenceABC
+from itertools import chain, combinations, permutations, product
+from math import comb, perm, prod
+
+def _position(values: Sequence, item: Any) -> int:
+    """Position of item in values, raises ValueError when missing"""
+    for i, value in enumerate(values):
+        if value is item or value == item:
+            return i
+    raise ValueError(f"{item!r} is not in the state space")
+
+def _size(values: Sequence) -> int:
+    """Number of states of a space or a plain sequence"""
+    return values.size if isinstance(values, StateSpace) else len(values)
+
+class StateSpace(SequenceABC):
+    """
+    Read only sequence of the states of a percept, computed on demand
+
+    Subclasses give the size, the state at an index and the index of a
+    state without building the states, iteration is delegated to
+    itertools so the order is the one ``list(...)`` would have produced.
+    ``size`` is exact for any space, ``len`` only up to ``sys.maxsize``.
+    """
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        """Number of states, exact even past ``sys.maxsize``"""
+
+    def __len__(self) -> int:
+        return self.size
+
+    @abstractmethod
+    def _get(self, index: int) -> Any:
+        """The state at an index already checked to be in range"""
+
+    def __getitem__(self, index: Any) -> Any:
+        size = self.size
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(size))]
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self._get(index)
+
+    def __contains__(self, state: Any) -> bool:
+        try:
+            self.index(state)
+        except ValueError:
+            return False
+        return True
+
+    def __add__(self, other: Sequence) -> 'ChainSpace':
+        return ChainSpace([self, other])
+
+    def __radd__(self, other: Sequence) -> 'ChainSpace':
+        return ChainSpace([other, self])
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.size} states)"
+
+class ListedSpace(StateSpace):
+    """The given values, one state each"""
+    def __init__(self, values: Sequence) -> None:
+        self.values = tuple(values)
+
+    @property
+    def size(self) -> int:
+        return len(self.values)
+
+    def _get(self, index: int) -> Any:
+        return self.values[index]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.values)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        return _position(self.values, state)
+
+class CombinationSpace(StateSpace):
+    """
+    Combinations of ``values`` for every size in ``sizes``, in itertools order
+
+    States are indexed with the combinatorial number system, the
+    combinations of each size form one block of ``comb(n, size)`` states.
+    """
+    def __init__(self, values: Sequence, sizes: Sequence[int]) -> None:
+        self.values = tuple(values)
+        self.sizes = tuple(sizes)
+        self._blocks = [comb(len(self.values), size) for size in self.sizes]
+
+    @property
+    def size(self) -> int:
+        return sum(self._blocks)
+
+    def _get(self, index: int) -> Tuple:
+        for size, block in zip(self.sizes, self._blocks):
+            if index < block:
+                break
+            index -= block
+        n = len(self.values)
+        state: List = []
+        pos = 0
+        for left in range(size, 0, -1):
+            # combinations starting at pos take the next comb(n - pos - 1, left - 1) indexes
+            while index >= (skip := comb(n - pos - 1, left - 1)):
+                index -= skip
+                pos += 1
+            state.append(self.values[pos])
+            pos += 1
+        return tuple(state)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return chain.from_iterable(combinations(self.values, size) for size in self.sizes)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        if not isinstance(state, tuple) or len(state) not in self.sizes:
+            raise ValueError(f"{state!r} is not in the state space")
+        size = len(state)
+        n = len(self.values)
+        offset = sum(self._blocks[:self.sizes.index(size)])
+        pos = 0
+        for left, item in zip(range(size, 0, -1), state):
+            found = pos + _position(self.values[pos:], item)
+            offset += sum(comb(n - p - 1, left - 1) for p in range(pos, found))
+            pos = found + 1
+        return offset
+
+class PermutationSpace(StateSpace):
+    """
+    Permutations of ``values`` for every size in ``sizes``, in itertools order
+
+    The permutations of each size form one block of ``perm(n, size)``
+    states, inside it the index is decoded digit by digit like a factorial
+    number over the values still unused.
+    """
+    def __init__(self, values: Sequence, sizes: Sequence[int]) -> None:
+        self.values = tuple(values)
+        self.sizes = tuple(sizes)
+        self._blocks = [perm(len(self.values), size) for size in self.sizes]
+
+    @property
+    def size(self) -> int:
+        return sum(self._blocks)
+
+    def _get(self, index: int) -> Tuple:
+        for size, block in zip(self.sizes, self._blocks):
+            if index < block:
+                break
+            index -= block
+        unused = list(self.values)
+        state: List = []
+        for taken in range(size):
+            digit, index = divmod(index, perm(len(unused) - 1, size - taken - 1))
+            state.append(unused.pop(digit))
+        return tuple(state)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return chain.from_iterable(permutations(self.values, size) for size in self.sizes)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        if not isinstance(state, tuple) or len(state) not in self.sizes:
+            raise ValueError(f"{state!r} is not in the state space")
+        size = len(state)
+        offset = sum(self._blocks[:self.sizes.index(size)])
+        unused = list(self.values)
+        for taken, item in enumerate(state):
+            digit = _position(unused, item)
+            offset += digit * perm(len(unused) - 1, size - taken - 1)
+            unused.pop(digit)
+        return offset
+
+class CartesianSpace(StateSpace):
+    """
+    Cartesian product of ``ranges``, in itertools order
+
+    Each state is a mixed radix number, the last range being the digit
+    that changes fastest.
+    """
+    def __init__(self, ranges: Sequence[Sequence]) -> None:
+        self.ranges = [r if isinstance(r, (range, StateSpace)) else tuple(r) for r in ranges]
+        self._radices = [_size(r) for r in self.ranges]
+
+    @property
+    def size(self) -> int:
+        return prod(self._radices)
+
+    def _get(self, index: int) -> Tuple:
+        state: List = []
+        for values, radix in zip(reversed(self.ranges), reversed(self._radices)):
+            index, digit = divmod(index, radix)
+            state.append(values[digit])
+        return tuple(reversed(state))
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return product(*self.ranges)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        if not isinstance(state, tuple) or len(state) != len(self.ranges):
+            raise ValueError(f"{state!r} is not in the state space")
+        offset = 0
+        for values, radix, item in zip(self.ranges, self._radices, state):
+            digit = values.index(item) if isinstance(values, (range, StateSpace)) else _position(values, item)
+            offset = offset * radix + digit
+        return offset
+
+class ChainSpace(StateSpace):
+    """Spaces one after the other, like the ``+`` of their lists"""
+    def __init__(self, parts: Sequence[Sequence]) -> None:
+        self.parts: List[Sequence] = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, ChainSpace) else [part])
+
+    @property
+    def size(self) -> int:
+        return sum(_size(part) for part in self.parts)
+
+    def _get(self, index: int) -> Any:
+        for part in self.parts:
+            if index < _size(part):
+                return part[index]
+            index -= _size(part)
+        raise IndexError(f"{type(self).__name__} index out of range")
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self.parts)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        offset = 0
+        for part in self.parts:
+            try:
+                return offset + part.index(state)
+            except ValueError:
+                offset += _size(part)
+        raise ValueError(f"{state!r} is not in the state space")
+
+class InternedSpace(StateSpace):
+    """The states of ``space`` as the canonical wrappers of ``interner``, interned when first read"""
+    def __init__(self, interner: Any, space: StateSpace) -> None:
+        self.interner = interner
+        self.space = space
+
+    @property
+    def size(self) -> int:
+        return self.space.size
+
+    def _get(self, index: int) -> Any:
+        return self.interner.wrap(self.space[index])
+
+    def __iter__(self) -> Iterator:
+        return map(self.interner.wrap, self.space)
+
+    def index(self, state: Any, start: int = 0, stop: Any = None) -> int:
+        return self.space.index(getattr(state, "original", state))
@@ -0,0 +1,62 @@
+from typing import Any, Callable, Iterator, Mapping
+from collections import OrderedDict
+from numbers import Integral
+
+from maspy.learning.core import HashableWrapper
+
+class _LazyRow(dict):
+    """Transitions of one state, each action is computed on first access"""
+    def __init__(self, owner: 'LazyTransitions', state: HashableWrapper) -> None:
+        super().__init__()
+        self.owner = owner
+        self.state = state
+
+    def __missing__(self, action: int) -> list[tuple]:
+        if not (isinstance(action, Integral) and 0 <= action < self.owner.num_actions):
+            raise KeyError(action)
+        transitions = self.owner.compute(self.state, action)
+        self.owner.computed += 1
+        self[action] = transitions
+        return transitions
+
+class LazyTransitions(Mapping):
+    """
+    On-demand transition table, a drop-in for the P dict of EnvModel
+
+    ``P[state][action]`` calls ``compute(state, action)`` the first time it
+    is read and keeps the result, so only reached states are materialized.
+    With a ``cache_size`` only that many states are kept, evicting the
+    least recently used one.
+    """
+    def __init__(self, compute: Callable[[HashableWrapper, int], list[tuple]], num_actions: int, cache_size: int | None = None) -> None:
+        assert cache_size is None or cache_size > 0, "cache_size must be positive"
+        self.compute = compute
+        self.num_actions = num_actions
+        self.cache_size = cache_size
+        self.computed = 0
+        self.evictions = 0
+        self._rows: OrderedDict[HashableWrapper, _LazyRow] = OrderedDict()
+
+    def __getitem__(self, state: HashableWrapper) -> _LazyRow:
+        row = self._rows.get(state)
+        if row is not None:
+            self._rows.move_to_end(state)
+            return row
+        row = self._rows[state] = _LazyRow(self, state)
+        if self.cache_size is not None and len(self._rows) > self.cache_size:
+            self._rows.popitem(last=False)
+            self.evictions += 1
+        return row
+
+    def __contains__(self, state: Any) -> bool:
+        """Only tells if the state is currently cached"""
+        return state in self._rows
+
+    def __iter__(self) -> Iterator[HashableWrapper]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def clear(self) -> None:
+        self._rows.clear()
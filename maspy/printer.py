@@ -0,0 +1,80 @@
+from threading import Thread, Lock, Event, local, current_thread
+from collections import deque
+from itertools import count
+from typing import List, Optional
+from maspy.utils import bcolors
+import sys
+
+class PrintBuffer:
+    """Collects MASPY prints in per-thread buffers and writes them to stdout in batches.
+
+    Each printing thread appends to its own deque, so printing never contends
+    on a shared queue. A single writer thread periodically hands off every
+    buffer, restores the global print order and adds the colour codes.
+    """
+    def __init__(self, interval: float = 0.05, batch_size: int = 1000) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self._local = local()
+        self._lock = Lock()
+        self._buffers: List[tuple[Thread, deque]] = []
+        self._order = count()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def put(self, color: str, name: str, text: str) -> None:
+        """Queues an already joined message, formatting is left to the writer thread"""
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = deque()
+            with self._lock:
+                self._buffers.append((current_thread(), buffer))
+        buffer.append((next(self._order), color, name, text))
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="maspy-printer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stops the writer thread after writing everything still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        records: list = []
+        with self._lock:
+            buffers = self._buffers.copy()
+        finished = []
+        for owner, buffer in buffers:
+            try:
+                while True:
+                    records.append(buffer.popleft())
+            except IndexError:
+                pass
+            if not owner.is_alive() and not buffer:
+                finished.append((owner, buffer))
+        if finished:
+            with self._lock:
+                for entry in finished:
+                    self._buffers.remove(entry)
+        if not records:
+            return
+        records.sort(key=lambda record: record[0])
+        for start in range(0, len(records), self.batch_size):
+            lines = [
+                f"{color}{name}> {text}{bcolors.ENDCOLOR}"
+                for _, color, name, text in records[start:start + self.batch_size]
+            ]
+            sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
@@ -0,0 +1,200 @@
+from typing import Any, Dict, List, Iterable, Iterator, Callable, Optional, IO
+from tempfile import TemporaryDirectory
+from heapq import merge
+import json
+import csv
+import os
+import re
+
+FULL_COLUMNS = [
+    "Time", "Instance", "Cycle", "Operation", "Description", "Received Msgs", "Event",
+    "Retrieved Plans", "Events","Intentions", "Completed Event", "Connected Envs",
+    "Connected Chs", "Beliefs", "Goals"
+]
+SHORT_COLUMNS = ["Time", "Instance", "Cycle", "Operation", "Description"]
+
+# Column name -> key inside an Agent's cycle log
+LOG_KEYS = {
+    "Cycle": "cycle",
+    "Operation": "decision",
+    "Description": "description",
+    "Completed Goal": "running_goal",
+    "Received Msgs": "last_recv",
+    "Event": "event",
+    "Completed Event": "last_event",
+    "Retrieved Plans": "retrieved_plans",
+    "Events": "events",
+    "Connected Envs": "connected_envs",
+    "Connected Chs": "connected_chs",
+    "Intentions": "intentions",
+    "Beliefs": "beliefs",
+    "Goals": "goals",
+}
+
+REPORT_FORMATS = {"csv", "parquet", "xlsx"}
+XLSX_MAX_ROWS = 1_048_575 # Excel sheet limit, minus the header row
+
+_instance_number = re.compile(r'_(\d+)$')
+
+def _instance_key(instance: str) -> int:
+    match = _instance_number.search(instance)
+    return int(match.group(1)) if match else 0
+
+# Columns kept numeric in Parquet, the others are stored as strings
+PARQUET_INT_COLUMNS = {"Cycle"}
+
+def _cell(value: Any) -> Any:
+    """Numbers, strings and None are kept as they are, anything else becomes its str"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+def _text(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+class ReportWriter:
+    """
+    Streams cycle-log rows to a CSV, Parquet or XLSX report
+
+    Rows are buffered up to ``chunk_size``, full chunks are sorted and
+    spilled to run files, one JSON row per line so numbers keep their
+    type, and merged by (Time, Instance) on close. Memory is bounded by
+    the chunk size, not by the number of cycle entries.
+    """
+    def __init__(
+        self,
+        output_file: str,
+        fmt: str = "csv",
+        columns: List[str] = FULL_COLUMNS,
+        chunk_size: int = 100_000,
+        progress: Optional[Callable[[float], Any]] = None
+    ) -> None:
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unsupported report format '{fmt}', expected one of {sorted(REPORT_FORMATS)}")
+        assert chunk_size > 0, "chunk_size must be positive"
+        self.output_file = output_file
+        self.fmt = fmt
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+        self.total_rows = 0
+        self._chunk: List[tuple] = []
+        self._runs: List[str] = []
+        self._tmp_dir: TemporaryDirectory | None = None
+
+    def add(self, sys_time: float, instance: str, log: Dict[str, Any]) -> None:
+        """Adds one cycle-log entry of an instance to the report"""
+        row = tuple(_cell(log.get(LOG_KEYS[column])) for column in self.columns[2:])
+        self._chunk.append((float(sys_time), _instance_key(instance), instance, row))
+        self.total_rows += 1
+        if len(self._chunk) >= self.chunk_size:
+            self._spill()
+
+    def add_logs(self, logs: Iterable[tuple[float, str, Dict[str, Any]]]) -> None:
+        for sys_time, instance, log in logs:
+            self.add(sys_time, instance, log)
+
+    def _spill(self) -> None:
+        if self._tmp_dir is None:
+            self._tmp_dir = TemporaryDirectory(prefix="maspy_report_")
+        self._chunk.sort(key=lambda entry: entry[:2])
+        path = os.path.join(self._tmp_dir.name, f"run_{len(self._runs)}.jsonl")
+        with open(path, "w", encoding="utf-8") as run_file:
+            for sys_time, number, instance, row in self._chunk:
+                run_file.write(json.dumps([sys_time, number, instance, *row]))
+                run_file.write("\n")
+        self._runs.append(path)
+        self._chunk = []
+
+    @staticmethod
+    def _read_run(run_file: IO[str]) -> Iterator[tuple]:
+        for line in run_file:
+            entry = json.loads(line)
+            yield (entry[0], entry[1], entry[2], tuple(entry[3:]))
+
+    def _sorted_rows(self, files: List[IO[str]]) -> Iterator[tuple]:
+        if not self._runs:
+            self._chunk.sort(key=lambda entry: entry[:2])
+            yield from self._chunk
+            return
+        if self._chunk:
+            self._spill()
+        for path in self._runs:
+            files.append(open(path, encoding="utf-8"))
+        yield from merge(*(self._read_run(f) for f in files), key=lambda entry: entry[:2])
+
+    def _report_rows(self) -> Iterator[list]:
+        files: List[IO[str]] = []
+        step = max(self.total_rows // 100, 1)
+        try:
+            for done, (sys_time, _, instance, row) in enumerate(self._sorted_rows(files), 1):
+                yield [sys_time, instance, *row]
+                if self.progress is not None and (done % step == 0 or done == self.total_rows):
+                    self.progress(done / self.total_rows * 100)
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self) -> str:
+        """Merges all buffered rows and writes the final report, returning its path"""
+        path = f"{self.output_file}.{self.fmt}"
+        try:
+            match self.fmt:
+                case "csv":
+                    self._write_csv(path)
+                case "parquet":
+                    self._write_parquet(path)
+                case "xlsx":
+                    self._write_xlsx(path)
+        finally:
+            self._chunk = []
+            self._runs = []
+            if self._tmp_dir is not None:
+                self._tmp_dir.cleanup()
+                self._tmp_dir = None
+        return path
+
+    def _write_csv(self, path: str) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            writer.writerows(self._report_rows())
+
+    def _write_parquet(self, path: str) -> None:
+        try:
+            import pyarrow as pa # type: ignore
+            import pyarrow.parquet as pq # type: ignore
+        except ImportError as e:
+            raise ImportError("Parquet reports require 'pyarrow' (pip install pyarrow)") from e
+        schema = pa.schema([("Time", pa.float64())] + [
+            (column, pa.int64() if column in PARQUET_INT_COLUMNS else pa.string()) for column in self.columns[1:]
+        ])
+        convert = [None] + [None if column in PARQUET_INT_COLUMNS else _text for column in self.columns[1:]]
+        with pq.ParquetWriter(path, schema) as writer:
+            group: List[list] = []
+            for row in self._report_rows():
+                group.append([value if to is None else to(value) for to, value in zip(convert, row)])
+                if len(group) >= self.chunk_size:
+                    writer.write_table(pa.Table.from_pylist([dict(zip(self.columns, r)) for r in group], schema))
+                    group = []
+            if group or self.total_rows == 0:
+                writer.write_table(pa.Table.from_pylist([dict(zip(self.columns, r)) for r in group], schema))
+
+    def _write_xlsx(self, path: str) -> None:
+        try:
+            from openpyxl import Workbook # type: ignore
+        except ImportError as e:
+            raise ImportError("Excel reports require 'openpyxl' (pip install openpyxl)") from e
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Report")
+        sheet.append(self.columns)
+        sheet_rows = 0
+        for row in self._report_rows():
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Report_{len(workbook.worksheets) + 1}")
+                sheet.append(self.columns)
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+        workbook.save(path)
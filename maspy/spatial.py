@@ -0,0 +1,90 @@
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+from itertools import product
+from numbers import Real
+import math
+
+Coordinates = Tuple[float, ...]
+
+def as_coordinates(value: Any) -> Coordinates | None:
+    """The value as a tuple of numbers, or None when it is not a position"""
+    if isinstance(value, Real) and not isinstance(value, bool):
+        return (value,)
+    if isinstance(value, (tuple, list)) and value and all(isinstance(v, Real) and not isinstance(v, bool) for v in value):
+        return tuple(value)
+    return None
+
+class GridIndex:
+    """
+    Uniform grid over the positions of stored items
+
+    Items are hashed into square cells of side ``cell_size``, so radius
+    and rectangle queries only visit the cells they overlap. Works for
+    any number of dimensions, all positions of one index must share it.
+    """
+    def __init__(self, cell_size: float = 1.0) -> None:
+        assert cell_size > 0, "cell_size must be positive"
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, ...], Dict[int, Any]] = dict()
+        self.positions: Dict[int, Tuple[Tuple[int, ...], Coordinates]] = dict()
+
+    def _cell(self, coords: Sequence[float]) -> Tuple[int, ...]:
+        size = self.cell_size
+        return tuple(math.floor(c / size) for c in coords)
+
+    def insert(self, item: Any, coords: Sequence[float]) -> None:
+        self.remove(item)
+        coords = tuple(coords)
+        cell = self._cell(coords)
+        self.cells.setdefault(cell, dict())[id(item)] = item
+        self.positions[id(item)] = (cell, coords)
+
+    def remove(self, item: Any) -> None:
+        entry = self.positions.pop(id(item), None)
+        if entry is None:
+            return
+        cell = self.cells[entry[0]]
+        del cell[id(item)]
+        if not cell:
+            del self.cells[entry[0]]
+
+    def _scan(self, low: Sequence[float], high: Sequence[float]) -> Iterator[Tuple[Any, Coordinates]]:
+        low_cell, high_cell = self._cell(low), self._cell(high)
+        span = [range(a, b + 1) for a, b in zip(low_cell, high_cell)]
+        # a sparse index is cheaper to walk than a wide query box
+        if math.prod(len(r) for r in span) > len(self.cells):
+            cells: Any = (
+                items for cell, items in self.cells.items()
+                if all(a <= c <= b for a, c, b in zip(low_cell, cell, high_cell))
+            )
+        else:
+            cells = (self.cells[cell] for cell in product(*span) if cell in self.cells)
+        for items in cells:
+            for key, item in list(items.items()):
+                yield item, self.positions[key][1]
+
+    def in_rect(self, low: Sequence[float], high: Sequence[float]) -> List[Any]:
+        """Items inside the box from ``low`` to ``high``, borders included"""
+        return [
+            item for item, coords in self._scan(low, high)
+            if all(a <= c <= b for a, c, b in zip(low, coords, high))
+        ]
+
+    def near(self, center: Sequence[float], radius: float) -> List[Any]:
+        """Items at an euclidean distance of at most ``radius`` from ``center``"""
+        low = [c - radius for c in center]
+        high = [c + radius for c in center]
+        squared = radius * radius
+        return [
+            item for item, coords in self._scan(low, high)
+            if sum((c - o) ** 2 for c, o in zip(coords, center)) <= squared
+        ]
+
+    def position(self, item: Any) -> Coordinates | None:
+        entry = self.positions.get(id(item))
+        return None if entry is None else entry[1]
+
+    def __contains__(self, item: Any) -> bool:
+        return id(item) in self.positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
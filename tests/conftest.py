@@ -0,0 +1,14 @@
+import pytest
+
+from maspy import Admin
+
+@pytest.fixture(autouse=True, scope="session")
+def quiet_admin():
+    Admin().block_prints()
+    yield Admin()
+
+@pytest.fixture(scope="session")
+def taxi_model():
+    from maspy.bench.scenarios import BenchTaxi
+    from maspy.learning import EnvModel
+    return EnvModel(BenchTaxi())
@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+import threading
+
+import pytest
+
+from maspy import Admin, Agent
+from maspy.environment import Environment, Percept, action
+from maspy.learning.groups import listed
+
+class Counter(Environment):
+    def __init__(self, env_name):
+        super().__init__(env_name)
+        self.create(Percept("count", 0))
+
+    @action(listed, ("up",), lambda state, action: (state, 0))
+    def bump(self, agt, step):
+        return step
+
+    def count(self, agt):
+        return 5
+
+def test_only_actions_and_named_methods_are_queued(request):
+    env = Counter(request.node.name)
+    agent = Agent(f"{request.node.name}_agent")
+    Admin().connect_to(agent, env)
+    env.queue_actions(worker=False)
+    queued = agent.bump(1)
+    assert isinstance(queued, Future)
+    assert agent.count() == 5
+    env.queue_actions(worker=False, methods=["count"])
+    assert isinstance(agent.count(), Future)
+    env.queue_actions(False)
+    assert queued.result() == 1
+    assert agent.count() == 5
+
+def _connected(request, env_class=Counter):
+    env = env_class(request.node.name)
+    agent = Agent(f"{request.node.name}_agent")
+    Admin().connect_to(agent, env)
+    return env, agent
+
+def test_environment_methods_are_resolved_once(request):
+    env, agent = _connected(request)
+    method = agent.count
+    assert agent.__dict__["count"] is method
+    assert agent.count is method and method() == 5
+
+def test_disconnecting_forgets_the_resolved_methods(request):
+    env, agent = _connected(request)
+    assert agent.count() == 5
+    agent.disconnect_from(env)
+    assert "count" not in agent.__dict__
+    with pytest.raises(AttributeError):
+        agent.count
+
+def test_environment_values_are_not_cached(request):
+    env, agent = _connected(request)
+    env.level = 1
+    agent.level
+    assert "level" not in agent.__dict__
+
+class Watched(Counter):
+    def perceive_for(self, agent_name):
+        agent = self._agents[agent_name]
+        # runs while the agent holds its env_lock
+        self.seen = (getattr(agent, "missing_here", None), agent.count())
+        return None
+
+def test_lookups_from_environment_hooks_do_not_deadlock(request):
+    env, agent = _connected(request, Watched)
+    thread = threading.Thread(target=agent._perception, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert env.seen == (None, 5)
@@ -0,0 +1,29 @@
+import json
+from pathlib import Path
+
+from maspy.bench.__main__ import main
+from maspy.bench.import_time import check_lazy_imports
+from maspy.bench.runner import run_scenario
+
+def test_killed_run_is_recorded_as_timed_out():
+    result = run_scenario("lockstep", {"agents": 20, "steps": 20}, timeout=0.01)
+    assert result["status"] == "timed_out"
+    assert result["timed_out"]
+    assert "elapsed_s" not in result
+
+def test_cli_continues_after_a_killed_run(capsys):
+    assert main(["--quick", "--json", "--timeout", "0.01", "lockstep", "broadcast"]) == 1
+    results = json.loads(capsys.readouterr().out)["results"]
+    assert [result["scenario"] for result in results] == ["lockstep", "broadcast"]
+    assert all(result["status"] == "timed_out" for result in results)
+
+def test_table_reports_killed_runs(capsys):
+    assert main(["--quick", "--timeout", "0.01", "lockstep"]) == 1
+    assert "killed after --timeout" in capsys.readouterr().out
+
+def test_importing_maspy_loads_neither_numpy_nor_pandas(monkeypatch):
+    # the probe interpreter finds maspy through its working directory
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    check_lazy_imports()
+    check_lazy_imports("import maspy")
+    check_lazy_imports("from maspy.learning import sequence, listed")
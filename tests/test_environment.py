@@ -0,0 +1,241 @@
+from contextlib import nullcontext
+from typing import Any
+import random
+
+import pytest
+
+from maspy.environment import Environment, Percept
+
+@pytest.fixture
+def env(request):
+    env = Environment(request.node.name)
+    env.printing = False
+    return env
+
+def test_index_matches_unhashable_arguments_like_a_scan(env):
+    env.index_percept("spot", 0, 1)
+    env.create([Percept("spot", (i, [i]), "Spots", False) for i in range(5)])
+    env.create(Percept("spot", (9, {"owner": [1, 2]}), "Spots", False))
+    assert env.get(Percept("spot", (1, [1.0]))).values == (1, [1])
+    assert env.get(Percept("spot", (Any, [2.0]))).values == (2, [2])
+    assert env.get(Percept("spot", (9, {"owner": [1.0, 2]}))).values[0] == 9
+    assert env.get(Percept("spot", (1, (1,)))) is None
+
+def test_index_falls_back_to_a_scan_for_unknown_unhashables_in_queries(env):
+    class Tag:
+        __hash__ = None
+        def __init__(self, value):
+            self.value = value
+        def __eq__(self, other):
+            return getattr(other, "value", other) == self.value
+    env.index_percept("spot", 1)
+    env.create([Percept("spot", (0, 1), "Spots", False), Percept("spot", (1, 2), "Spots", False)])
+    assert env.get(Percept("spot", (Any, Tag(2)))).values == (1, 2)
+    assert env.get(Percept("spot", (Any, Tag(3)))) is None
+
+def test_change_returns_the_new_handle(env):
+    env.create(Percept("light", "red"))
+    old = env.get(Percept("light", Any))
+    new = env.change(old, "green")
+    assert new.values == "green" and old.values == "red"
+    assert env.change(new, "blue").values == "blue"
+    assert env.get(Percept("light", "blue")) is not None
+
+def test_reads_inside_a_batch_see_its_writes(env):
+    printed = []
+    env.print = printed.append
+    env.create(Percept("light", "red"))
+    with env.batch():
+        env.change(env.get(Percept("light", Any)), "green")
+        env.print_percepts
+    assert "green" in printed[-1] and "red" not in printed[-1]
+
+def _published(env, name):
+    return {percept.values for percept in env._perception()["none"].get(name, ())}
+
+def test_a_batch_that_raises_publishes_the_mutations_done_before(env):
+    env.create([Percept("light", "red"), Percept("door", "closed")])
+    versions = env.percept_versions(["light", "door"])
+    with pytest.raises(RuntimeError):
+        with env.batch() as summary:
+            env.change(env.get(Percept("light", Any)), "green")
+            env.create(Percept("bell", "ringing"))
+            assert _published(env, "light") == {"red"} and not _published(env, "bell")
+            raise RuntimeError("interrupted")
+    assert env._batch is None and summary.changed == 1 and summary.created == 1
+    assert _published(env, "light") == {"green"} and _published(env, "bell") == {"ringing"}
+    assert _published(env, "door") == {"closed"}
+    assert env.percept_versions(["light", "door"]) == (versions[0] + 1, versions[1])
+    # later mutations are published right away again
+    env.change(env.get(Percept("door", Any)), "open")
+    assert _published(env, "door") == {"open"}
+
+def test_nested_batches_publish_once(env):
+    published = []
+    publish = env._publish
+    def counting_publish(touched):
+        touched = set(touched)
+        published.append(touched)
+        publish(touched)
+    env._publish = counting_publish
+    env.create(Percept("light", "red"))
+    published.clear()
+    versions = env.percept_versions(["light", "bell"])
+    with env.batch() as outer:
+        env.change(env.get(Percept("light", Any)), "green")
+        with env.batch() as inner:
+            assert inner is outer
+            env.change(env.get(Percept("light", Any)), "blue")
+            env.create(Percept("bell", "ringing"))
+        assert not published and _published(env, "light") == {"red"}
+    assert published == [{("none", "light"), ("none", "bell")}]
+    assert _published(env, "light") == {"blue"} and _published(env, "bell") == {"ringing"}
+    assert env.percept_versions(["light", "bell"]) == (versions[0] + 1, versions[1] + 1)
+    assert (outer.created, outer.changed) == (1, 2)
+
+def test_concurrent_batches_are_never_perceived_torn(env):
+    from threading import Thread
+    env.create([Percept("left", 0), Percept("right", 0)])
+    writes, torn, perceived = 300, [], [0]
+
+    def writer(start):
+        for number in range(start, start + writes):
+            with env.batch():
+                left = env.get(Percept("left", Any))
+                env.change(left, number)
+                env.change(env.get(Percept("right", Any)), number)
+
+    def reader():
+        while any(thread.is_alive() for thread in writers):
+            percepts = env._perception()["none"]
+            (left,), (right,) = percepts["left"], percepts["right"]
+            perceived[0] += 1
+            if left.values != right.values:
+                torn.append((left, right))
+
+    writers = [Thread(target=writer, args=(start,)) for start in (1, 10_000, 20_000)]
+    readers = [Thread(target=reader) for _ in range(3)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers + readers:
+        thread.join()
+    assert perceived[0] > 0
+    assert torn == []
+
+def test_switching_the_queue_off_resolves_every_call(env):
+    from threading import Thread
+    calls = []
+    env.queue_actions()
+    worker = env._worker
+    futures = []
+
+    def caller():
+        for number in range(200):
+            futures.append(env.enqueue(calls.append, (number,)))
+
+    callers = [Thread(target=caller) for _ in range(4)]
+    for thread in callers:
+        thread.start()
+    env.queue_actions(False)
+    for thread in callers:
+        thread.join()
+    for future in futures:
+        future.result(timeout=5)
+    assert len(calls) == 800
+    worker.join(timeout=5)
+    assert env._action_queue is None and env._worker is None
+
+def test_queue_can_be_turned_back_on(env):
+    env.queue_actions()
+    env.queue_actions(False)
+    env.queue_actions()
+    assert env.enqueue(lambda: 3).result(timeout=5) == 3
+    env.queue_actions(False)
+
+def _labels(percepts):
+    return {percept.values[2] for percept in percepts}
+
+def _scan_near(env, center, radius):
+    boxes = env.get(Percept("box"), all=True, ck_values=False) or []
+    return {box.values[2] for box in boxes
+            if isinstance(box.values[0], int) and sum((c - p) ** 2 for c, p in zip(center, box.values[:2])) <= radius ** 2}
+
+def _scan_rect(env, low, high):
+    boxes = env.get(Percept("box"), all=True, ck_values=False) or []
+    return {box.values[2] for box in boxes
+            if isinstance(box.values[0], int) and all(a <= p <= b for a, p, b in zip(low, box.values[:2], high))}
+
+def test_near_and_in_rect_match_a_scan(env):
+    rng = random.Random(7)
+    env.spatial_index("box", coords=(0, 1), cell_size=2.5)
+    env.create([Percept("box", (rng.randint(-20, 20), rng.randint(-20, 20), i)) for i in range(300)])
+    env.create(Percept("box", ("nowhere", "nowhere", "lost")))
+    def check():
+        for _ in range(40):
+            center = (rng.uniform(-20, 20), rng.uniform(-20, 20))
+            radius = rng.choice([0, 0.5, 1, 3, 7.5, 30])
+            assert _labels(env.near("box", center, radius)) == _scan_near(env, center, radius)
+            low = (rng.randint(-22, 20), rng.randint(-22, 20))
+            high = (low[0] + rng.randint(0, 10), low[1] + rng.randint(0, 10))
+            assert _labels(env.in_rect("box", low, high)) == _scan_rect(env, low, high)
+    check()
+    for i in rng.sample(range(300), 60):
+        box = env.get(Percept("box", (Any, Any, i)))
+        env.change(box, (rng.randint(-20, 20), rng.randint(-20, 20), i))
+    for i in rng.sample(range(300), 60):
+        box = env.get(Percept("box", (Any, Any, i)))
+        if box is not None:
+            env.delete(box)
+    check()
+    assert "lost" not in _labels(env.in_rect("box", (-100, -100), (100, 100)))
+
+def test_local_view_only_hides_far_indexed_percepts(env):
+    positions = {"here": (0, 0), "away": (100, 100), "everywhere": None}
+    env.spatial_index("box", coords=(0, 1))
+    env.spatial_index("rock", coords=(0, 1))
+    env.create([Percept("box", (1, 1, "close")), Percept("box", (9, 9, "far")), Percept("box", ("?", "?", "unplaced"))])
+    env.create(Percept("rock", (50, 50, "boulder")))
+    env.create(Percept("light", "green"))
+    env.local_view(2, positions.get, names=["box"])
+    def seen(agent_name, name):
+        return {percept.values if name == "light" else percept.values[2] for percept in env._perception(agent_name)["none"][name]}
+    assert seen("here", "box") == {"close", "unplaced"}
+    assert seen("away", "box") == {"unplaced"}
+    # names outside the view and percepts without an index are not filtered
+    assert seen("away", "rock") == {"boulder"} and seen("away", "light") == {"green"}
+    assert seen("everywhere", "box") == {"close", "far", "unplaced"}
+    env.local_view(None)
+    assert seen("away", "box") == {"close", "far", "unplaced"}
+
+def test_restore_keeps_the_published_percepts_indexed(env):
+    env.spatial_index("box", coords=(0, 1))
+    env.local_view(2, lambda agent_name: (0, 0))
+    env.create([Percept("box", (1, 1, "near")), Percept("box", (50, 50, "far"))])
+    token = env.snapshot()
+    far = env.get(Percept("box", (50, 50, Any)))
+    env.change(env.change(far, (50, 50, "moved")), (50, 50, "far"))
+    env.restore(token)
+    boxes = env._perception("watcher")["none"]["box"]
+    assert {box.values[2] for box in boxes} == {"near"}
+    live = env._percepts["none"]["box"]
+    assert {id(box) for box in env._snapshot["none"]["box"]} == {id(box) for box in live}
+    assert {id(box) for box in env._name_index["box"].values()} == {id(box) for box in live}
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_restore_brings_back_the_snapshot(env, batched):
+    env.index_percept("spot", 0)
+    env.create([Percept("spot", (i, "free"), "Spots") for i in range(4)])
+    token = env.snapshot()
+    env.change(env.get(Percept("spot", (0, Any))), (0, "taken"))
+    env.delete(env.get(Percept("spot", (1, Any))))
+    env.create(Percept("spot", (9, "free"), "Spots"))
+    env.create(Percept("sign", "open"))
+    with env.batch() if batched else nullcontext():
+        env.restore(token)
+    assert env._snapshot["Spots"]["spot"] == token.percepts["Spots"]["spot"]
+    assert "sign" not in env._snapshot.get("none", {})
+    assert env.get(Percept("spot", (1, "free"))) is not None
+    assert env.get(Percept("spot", (0, "taken"))) is None and env.get(Percept("spot", (9, Any))) is None
+    live = env._percepts["Spots"]["spot"]
+    assert {id(spot) for spot in env._snapshot["Spots"]["spot"]} == {id(spot) for spot in live}
+    assert {id(spot) for spot in env._name_index["spot"].values()} == {id(spot) for spot in live}
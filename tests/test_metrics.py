@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+import pytest
+
+from maspy.learning import metrics
+from maspy.learning.metrics import ProgressReporter, RingBuffer, RunningStats
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(3).normal(1e6, 25.0, size=5000)
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+    assert stats.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+def test_running_stats_of_short_streams():
+    stats = RunningStats()
+    assert stats.as_dict() == {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+    stats.push(4.0)
+    assert stats.as_dict() == {"count": 1, "mean": 4.0, "std": 0.0, "min": 4.0, "max": 4.0}
+
+def test_ring_buffer_wraps_and_keeps_the_last_values_in_order():
+    buffer = RingBuffer(4)
+    for value in range(3):
+        buffer.append(value)
+    assert list(buffer) == [0, 1, 2] and len(buffer) == 3
+    for value in range(3, 10):
+        buffer.append(value)
+    assert buffer.values().tolist() == [6, 7, 8, 9]
+    assert np.asarray(buffer, dtype=np.int64).tolist() == [6, 7, 8, 9]
+    assert len(buffer) == 4 and buffer.mean() == 7.5
+
+def test_ring_buffer_wraps_exactly_at_its_size():
+    buffer = RingBuffer(3, dtype=np.int64)
+    for value in range(6):
+        buffer.append(value)
+    assert buffer.values().tolist() == [3, 4, 5]
+
+def test_progress_is_redrawn_at_most_once_per_interval(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(metrics, "monotonic", lambda: clock[0])
+    stream = io.StringIO()
+    progress = ProgressReporter(10, "Training", length=10, interval=0.5, stream=stream)
+    calls = []
+    def info():
+        calls.append(clock[0])
+        return ""
+    for done in range(1, 10):
+        progress.update(done, info)
+        clock[0] += 0.2
+    # drawn at 100.0, 100.6 and 101.2, the last update always draws
+    progress.update(10, info)
+    progress.close()
+    lines = stream.getvalue().split("\r")[1:]
+    assert [line.split(" ")[1] for line in lines] == ["1/10", "4/10", "7/10", "10/10"]
+    assert len(calls) == 4
+    assert stream.getvalue().endswith("100%\n")
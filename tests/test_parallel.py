@@ -0,0 +1,59 @@
+import threading
+
+import numpy as np
+import pytest
+
+from maspy.learning import parallel
+from maspy.learning.parallel import fork_safe, sweep
+
+def test_fork_is_unsafe_while_other_threads_run():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert not fork_safe()
+    finally:
+        stop.set()
+        thread.join()
+
+def test_training_stays_in_process_while_other_threads_run(taxi_model, monkeypatch):
+    def no_fork(*args, **kwargs):
+        raise AssertionError("forked with other threads alive")
+    monkeypatch.setattr(parallel.mp, "get_context", no_fork)
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        results = sweep(taxi_model, {"learning_rate": [0.1, 0.2]}, num_episodes=20, max_steps=50, seed=1)
+    finally:
+        stop.set()
+        thread.join()
+    assert [result.config["learning_rate"] for result in results] == [0.1, 0.2]
+    assert all(len(result.episode_steps) == 20 for result in results)
+
+@pytest.mark.skipif(not parallel.fork_available(), reason="needs the fork start method")
+def test_forked_sweep_matches_in_process_training(taxi_model):
+    assert fork_safe()
+    forked = sweep(taxi_model, {"learning_rate": [0.1, 0.2]}, num_episodes=30, max_steps=50, seed=4)
+    local = sweep(taxi_model, {"learning_rate": [0.1, 0.2]}, num_episodes=30, max_steps=50, seed=4, processes=1)
+    assert [result.episode_steps for result in forked] == [result.episode_steps for result in local]
+
+def _model_state(model):
+    return (
+        getattr(model, "q_table", None), getattr(model, "episode_steps", None), getattr(model, "epsilon", None),
+        model.np_random.bit_generator.state, set(model.terminated_states), model.env.snapshot().percepts,
+    )
+
+@pytest.mark.parametrize("processes", [1, None])
+def test_training_leaves_the_callers_model_untouched(taxi_model, processes):
+    if processes is None and not parallel.fork_available():
+        pytest.skip("needs the fork start method")
+    taxi_model.reset(seed=2)
+    before = _model_state(taxi_model)
+    global_state = np.random.get_state()[1].copy()
+    sweep(taxi_model, {"learning_rate": [0.1, 0.2]}, num_episodes=20, max_steps=50, processes=processes)
+    after = _model_state(taxi_model)
+    assert after[0] is before[0] and after[1] is before[1] and after[2] == before[2]
+    assert after[3] == before[3] and after[4] == before[4]
+    assert after[5] == before[5]
+    assert (np.random.get_state()[1] == global_state).all()
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+from maspy.learning import qlearning
+from maspy.learning.core import HashableWrapper
+from maspy.learning.persistence import decode_key, encode_key, policy_paths
+
+@pytest.mark.parametrize("value", [
+    None, 3, 2.5, "R", ((1, 2), "T", (3, 4)), [1, (2, 3)],
+    {"a": (1, 2), 3: frozenset({4})}, {1, 2}, frozenset({"x"}),
+])
+def test_keys_round_trip_through_json(value):
+    assert decode_key(json.loads(json.dumps(encode_key(value)))) == value
+
+def test_unknown_key_types_are_refused():
+    with pytest.raises(TypeError):
+        encode_key(object())
+
+@pytest.fixture
+def trained(taxi_model):
+    taxi_model.reset(seed=1)
+    taxi_model.learn(qlearning, num_episodes=30, max_steps=100, q_backend="dense")
+    return taxi_model
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_policy_loads_back(trained, tmp_path, mmap):
+    expected = {state: np.array(trained.q_table[state]) for state in trained.q_table.keys()}
+    path = trained.save_policy(str(tmp_path / "taxi"))
+    assert (path, str(tmp_path / "taxi.keys.json")) == policy_paths(str(tmp_path / "taxi"))
+    version = trained.policy_version
+    trained.load_policy(path, mmap=mmap)
+    assert trained.policy_version == version + 1
+    assert trained.q_table.readonly is mmap
+    assert len(trained.q_table) == len(expected)
+    for state, row in expected.items():
+        np.testing.assert_array_equal(trained.q_table[state], row)
+    # a state the policy never saw is served as zeros, without growing a read-only table
+    unseen = HashableWrapper(((9, 9), "X", (9, 9)))
+    assert not trained.q_table[unseen].any()
+
+def test_policy_of_other_actions_is_refused(trained, tmp_path):
+    path = trained.save_policy(str(tmp_path / "taxi"))
+    from maspy.learning.persistence import load_policy
+    with pytest.raises(ValueError):
+        load_policy(path, trained.actions_list[:-1])
+
+def test_truncated_matrix_is_refused(trained, tmp_path):
+    path = trained.save_policy(str(tmp_path / "taxi"))
+    np.save(path, np.zeros((1, trained.num_actions)))
+    with pytest.raises(ValueError):
+        trained.load_policy(path)
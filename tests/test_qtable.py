@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from maspy.learning import qlearning, sarsa
+from maspy.learning.core import HashableWrapper, StateId, StateInterner
+from maspy.learning.qtable import DenseQTable
+
+def _train(model, backend, method):
+    model.reset(seed=5)
+    np.random.seed(5)
+    model.learn(method, num_episodes=40, max_steps=100, q_backend=backend)
+    return {state: np.array(model.q_table[state]) for state in list(model.q_table.keys())}, list(model.episode_steps)
+
+def _greedy_rollouts(model, max_steps=50):
+    # taxi is deterministic, so every start state has a single greedy return
+    rollouts = []
+    for state in model.initial_state_distrib:
+        total = steps = 0
+        terminated = False
+        while not terminated and steps < max_steps:
+            _, state, reward, terminated = model.P[state][int(np.argmax(model.q_table[state]))][0]
+            total += reward
+            steps += 1
+        rollouts.append((total, steps))
+    return rollouts
+
+@pytest.mark.parametrize("method", [qlearning, sarsa])
+def test_dense_backend_learns_the_same_values_as_dict(taxi_model, method):
+    by_dict, dict_steps = _train(taxi_model, "dict", method)
+    dense, dense_steps = _train(taxi_model, "dense", method)
+    assert dense_steps == dict_steps
+    for state, row in by_dict.items():
+        np.testing.assert_array_equal(dense[state], row)
+    # the dense table holds a row for every state, the ones never updated stay at zero
+    for state in dense.keys() - by_dict.keys():
+        assert not dense[state].any()
+
+def test_rows_are_views_and_unknown_states_grow_the_table():
+    table = DenseQTable([HashableWrapper((0,)), HashableWrapper((1,))], 3)
+    table[HashableWrapper((1,))][2] = 4.0
+    assert table[StateId(1)][2] == 4.0
+    row = table[HashableWrapper((5,))]
+    assert len(table) == 3 and not row.any()
+    assert HashableWrapper((5,)) in table
+
+def test_int_states_are_interned_instead_of_read_as_ids():
+    interner = StateInterner([7, 0])
+    ids = [interner.encode(state) for state in (7, 0, 1, np.int64(7))]
+    assert ids == [0, 1, 2, 0]
+    assert all(isinstance(state_id, StateId) for state_id in ids)
+    assert [interner.decode(state_id).original for state_id in ids] == [7, 0, 1, 7]
+    assert interner.encode(ids[2]) is ids[2]
+    assert 1 in interner and StateId(2) in interner and StateId(3) not in interner
+    assert 5 not in interner and len(interner) == 3
+
+def test_readonly_table_reads_unknown_states_as_zero():
+    values = np.ones((1, 2))
+    values.flags.writeable = False
+    table = DenseQTable([HashableWrapper((0,))], 2, values=values)
+    assert not table[HashableWrapper((9,))].any()
+    assert len(table) == 1
+    with pytest.raises(KeyError):
+        table.encode(HashableWrapper((9,)))
+
+def test_batch_learning_finds_the_same_greedy_policy(taxi_model):
+    settings = dict(learning_rate=1.0, discount_factor=0.9, num_episodes=3000, max_steps=100)
+    taxi_model.reset(seed=1)
+    np.random.seed(1)
+    taxi_model.learn(qlearning, q_backend="dense", **settings)
+    serial = _greedy_rollouts(taxi_model)
+    taxi_model.learn_batch(num_envs=64, seed=1, **settings)
+    batch = _greedy_rollouts(taxi_model)
+    assert batch == serial
+    assert all(steps < 50 for _, steps in serial)
@@ -0,0 +1,55 @@
+import csv
+import random
+
+import pytest
+
+from maspy.report import ReportWriter, SHORT_COLUMNS
+
+def _log(cycle, decision="step", description=None):
+    return {"cycle": cycle, "decision": decision, "description": description}
+
+def _entries(count, seed=0):
+    rng = random.Random(seed)
+    return [(float(rng.randrange(20)), f"Ag_{rng.randrange(1, 12)}", _log(n)) for n in range(count)]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_rows_are_merged_by_time_then_instance_number(tmp_path, chunk_size):
+    entries = _entries(200)
+    writer = ReportWriter(str(tmp_path / "report"), "csv", SHORT_COLUMNS, chunk_size=chunk_size)
+    writer.add_logs(entries)
+    path = writer.close()
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == SHORT_COLUMNS
+    keys = [(float(row[0]), int(row[1].rsplit("_", 1)[1])) for row in rows[1:]]
+    assert len(keys) == len(entries)
+    # Ag_10 sorts after Ag_2, by number and not by text
+    assert keys == sorted(keys)
+    assert sorted(row[2] for row in rows[1:]) == sorted(str(log["cycle"]) for _, _, log in entries)
+
+def test_csv_writes_none_as_empty(tmp_path):
+    writer = ReportWriter(str(tmp_path / "report"), "csv", SHORT_COLUMNS, chunk_size=1)
+    writer.add(1.0, "Ag_1", _log(3))
+    writer.add(0.5, "Ag_1", _log(2))
+    with open(writer.close(), newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[1:] == [["0.5", "Ag_1", "2", "step", ""], ["1.0", "Ag_1", "3", "step", ""]]
+
+@pytest.mark.parametrize("chunk_size", [2, 1000])
+def test_xlsx_keeps_native_types(tmp_path, chunk_size):
+    openpyxl = pytest.importorskip("openpyxl")
+    writer = ReportWriter(str(tmp_path / "report"), "xlsx", SHORT_COLUMNS, chunk_size=chunk_size)
+    writer.add(2.0, "Ag_2", _log(5, description=["a", "b"]))
+    writer.add(1.0, "Ag_1", _log(4))
+    writer.add(1.0, "Ag_10", _log(6))
+    sheet = openpyxl.load_workbook(writer.close()).active
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert rows[1:] == [
+        [1.0, "Ag_1", 4, "step", None],
+        [1.0, "Ag_10", 6, "step", None],
+        [2.0, "Ag_2", 5, "step", "['a', 'b']"],
+    ]
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReportWriter(str(tmp_path / "report"), "ods")
@@ -0,0 +1,26 @@
+import numpy as np
+
+from maspy.learning.selection import ActionSelector
+
+def _draws(model, count=20):
+    return [model.selector.random_action() for _ in range(count)]
+
+def test_reset_with_a_seed_reseeds_the_selector(taxi_model):
+    taxi_model.reset(seed=7)
+    first = _draws(taxi_model)
+    taxi_model.reset(seed=7)
+    assert _draws(taxi_model) == first
+    taxi_model.reset(seed=8)
+    assert _draws(taxi_model) != first
+
+def test_selector_follows_a_replaced_generator(taxi_model):
+    taxi_model.np_random = np.random.default_rng(3)
+    first = _draws(taxi_model)
+    taxi_model.np_random = np.random.default_rng(3)
+    assert _draws(taxi_model) == first
+
+def test_monte_carlo_never_picks_the_worst_action():
+    selector = ActionSelector(3, np.random.default_rng(0))
+    picks = {selector.monte_carlo(np.array([1.0, -5.0, 2.0])) for _ in range(200)}
+    assert picks == {0, 2}
+    assert selector.monte_carlo(np.zeros(3)) == 0
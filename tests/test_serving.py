@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from maspy.learning.qtable import DenseQTable
+
+@pytest.fixture
+def flat_model(taxi_model):
+    taxi_model.q_table = DenseQTable(taxi_model.interner, taxi_model.num_actions)
+    taxi_model.reset(seed=1)
+    yield taxi_model
+    del taxi_model.q_table
+
+def _state(model, index=0):
+    return model.states_list[index].original
+
+def test_ties_are_broken_at_random(flat_model):
+    state_id = flat_model.interner.encode(_state(flat_model))
+    flat_model.q_table.values[flat_model.q_table.encode(state_id)] = 1.0
+    picks = {flat_model.best_action(_state(flat_model)) for _ in range(200)}
+    assert picks == set(range(flat_model.num_actions))
+
+def test_actions_follow_the_monte_carlo_weights(flat_model):
+    row = flat_model.q_table.values[flat_model.q_table.encode(flat_model.interner.encode(_state(flat_model)))]
+    row[:] = 0.0
+    row[1] = row[3] = 2.0
+    misses = flat_model.policy.misses
+    picks = {flat_model.best_action(_state(flat_model)) for _ in range(200)}
+    assert picks == {1, 3}
+    assert flat_model.policy.misses == misses + 1
+
+def test_all_zero_rows_pick_the_first_action(flat_model):
+    states = [_state(flat_model, i) for i in range(5)]
+    assert flat_model.best_actions(states) == [0] * 5
+    assert flat_model.best_action(states[0]) == 0
+
+def test_batch_draws_match_single_draws(flat_model):
+    flat_model.q_table.values[:] = 0.0
+    flat_model.q_table.values[:, 2] = 1.0
+    flat_model.q_table.values[:4, 4] = 1.0
+    states = [_state(flat_model, i) for i in range(8)]
+    draws = np.array([flat_model.best_actions(states) for _ in range(100)])
+    assert set(draws[:, :4].ravel()) == {2, 4}
+    assert set(draws[:, 4:].ravel()) == {2}
+    assert {flat_model.best_action(states[0]) for _ in range(100)} == {2, 4}
@@ -0,0 +1,60 @@
+from itertools import chain, combinations, permutations, product
+
+import numpy as np
+import pytest
+
+from maspy.learning.core import Model, StateInterner, random_start
+from maspy.learning.statespace import (
+    CartesianSpace, ChainSpace, CombinationSpace, InternedSpace, ListedSpace, PermutationSpace, StateSpace
+)
+
+VALUES = ("a", "b", "c", "d")
+
+SPACES = [
+    (ListedSpace(VALUES), list(VALUES)),
+    (CombinationSpace(VALUES, (1, 2, 4)), list(chain(*(combinations(VALUES, n) for n in (1, 2, 4))))),
+    (PermutationSpace(VALUES, (0, 2, 3)), list(chain(*(permutations(VALUES, n) for n in (0, 2, 3))))),
+    (CartesianSpace([range(3), VALUES, (True, False)]), list(product(range(3), VALUES, (True, False)))),
+    (ListedSpace("xy") + CartesianSpace([range(2), range(2)]), ["x", "y", *product(range(2), range(2))]),
+]
+
+@pytest.mark.parametrize("space, states", SPACES, ids=lambda value: type(value).__name__)
+def test_spaces_round_trip_like_their_lists(space, states):
+    assert list(space) == states
+    assert space.size == len(space) == len(states)
+    for index, state in enumerate(states):
+        assert space[index] == state
+        assert space.index(state) == index
+    assert space[-1] == states[-1]
+    assert space[1:4] == states[1:4]
+    assert "missing" not in space
+    with pytest.raises(IndexError):
+        space[len(states)]
+
+def test_chained_spaces_flatten():
+    space = ChainSpace([ListedSpace("ab"), ListedSpace("c") + ListedSpace("d")])
+    assert len(space.parts) == 3 and list(space) == ["a", "b", "c", "d"]
+
+def test_huge_spaces_round_trip_without_len():
+    space = CartesianSpace([range(10**10)] * 3)
+    assert space.size == 10**30
+    state = (123, 10**10 - 1, 42)
+    assert space[space.index(state)] == state
+    with pytest.raises(OverflowError):
+        len(space)
+
+def test_reset_draws_from_spaces_past_maxsize():
+    model = Model()
+    model.initial_state_distrib = InternedSpace(StateInterner(), CartesianSpace([range(10**10)] * 3))
+    state, _ = model.reset(seed=3)
+    assert all(0 <= value < 10**10 for value in state.original)
+    assert model.reset(seed=3)[0] is state
+    assert random_start(ListedSpace("ab"), np.random.default_rng(0)) in ("a", "b")
+
+def test_state_spaces_must_define_size_and_get():
+    class Partial(StateSpace):
+        @property
+        def size(self):
+            return 1
+    with pytest.raises(TypeError):
+        Partial()
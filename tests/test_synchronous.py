@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from maspy.environment import Environment
+
+SYSTEM = """
+from maspy import *
+
+class Asker(Agent):
+    @pl(gain, Goal("ask", Any))
+    def asking(self, src, name):
+        value = self.send(name, askOneReply, Belief("value", Any))
+        self.print(f"answer {value}")
+        {extra}
+        Admin().stop_system()
+
+Admin().sys_settings(synchronous=True, max_ticks=20)
+Asker("asker").add(Goal("ask", "informant"))
+Asker("informant").add(Belief("value", 42))
+Admin().start_system()
+"""
+
+def _run_system(tmp_path, extra=""):
+    """Output of a synchronous system run in a fresh interpreter, the Admin being a process wide singleton"""
+    script = textwrap.dedent(SYSTEM.replace("{extra}", extra))
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+    done = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    return done.stdout + done.stderr
+
+def test_ask_reply_is_answered_inside_the_tick(tmp_path):
+    output = _run_system(tmp_path)
+    assert "answer Belief value(42)" in output
+    assert "Timeout" not in output
+
+def test_wait_is_rejected_in_synchronous_mode(tmp_path):
+    output = _run_system(tmp_path, 'self.wait(5)')
+    assert "cannot wait in synchronous mode" in output
+
+def test_waiting_on_a_call_queued_in_the_same_batch_raises(request):
+    env = Environment(request.node.name)
+    env.queue_actions(worker=False)
+    with env.batch():
+        future = env.enqueue(lambda: 7)
+        with pytest.raises(RuntimeError):
+            future.result()
+    env.queue_actions(False)
+    assert future.result() == 7
@@ -0,0 +1,54 @@
+import pytest
+
+from maspy.learning.core import HashableWrapper
+from maspy.learning.transitions import LazyTransitions
+
+def _counting_table(cache_size=None):
+    calls = []
+    def compute(state, action):
+        calls.append((state, action))
+        return [(1.0, HashableWrapper((state.original[0] + action,)), -1, False)]
+    return LazyTransitions(compute, num_actions=2, cache_size=cache_size), calls
+
+def _state(value):
+    return HashableWrapper((value,))
+
+def test_lazy_transitions_match_the_eager_table():
+    from maspy.bench.scenarios import BenchTaxi
+    from maspy.learning import EnvModel
+    # its own environment, changing the state percepts narrows their spaces
+    env = BenchTaxi("LazyTaxi")
+    taxi_model = EnvModel(env)
+    lazy = EnvModel(env, lazy=True, cache_size=50)
+    for state in taxi_model.states_list:
+        for action in range(taxi_model.num_actions):
+            assert lazy.P[state][action] == taxi_model.P[state][action]
+    assert len(lazy.P) == 50
+    assert lazy.P.evictions == len(taxi_model.states_list) - 50
+
+def test_actions_are_computed_once_per_cached_row():
+    table, calls = _counting_table()
+    row = table[_state(0)]
+    assert row[1] == row[1] == table[_state(0)][1]
+    assert calls == [(_state(0), 1)] and table.computed == 1
+    with pytest.raises(KeyError):
+        row[2]
+
+def test_cache_size_evicts_the_least_recently_used_state():
+    table, _ = _counting_table(cache_size=2)
+    table[_state(0)][0]
+    table[_state(1)][0]
+    table[_state(0)][0] # 0 is now more recent than 1
+    table[_state(2)][0]
+    assert list(table) == [_state(0), _state(2)]
+    assert _state(1) not in table
+    assert table.evictions == 1 and len(table) == 2
+
+def test_evicted_rows_are_recomputed_with_the_same_transitions():
+    table, calls = _counting_table(cache_size=1)
+    first = list(table[_state(3)][1])
+    table[_state(4)][1]
+    assert _state(3) not in table
+    assert table[_state(3)][1] == first == [(1.0, _state(4), -1, False)]
+    assert calls.count((_state(3), 1)) == 2
+    assert table.computed == 3 and table.evictions == 2